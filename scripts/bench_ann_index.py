@@ -0,0 +1,99 @@
+"""인프로세스 벡터 인덱스 벤치마크 (전수 검색 / IVF / ChromaDB)
+
+군집 구조가 있는 합성 벡터로 각 인덱스의 적재 시간, 질의 지연, 전수 검색 대비
+recall@k를 비교합니다. ChromaDB가 설치되어 있으면 HNSW 컬렉션도 함께 측정합니다.
+
+사용법: python scripts/bench_ann_index.py [--n 100000] [--dim 512] [--queries 200] [--nprobe 16]
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.rag.ann_index import NumpyVectorIndex
+from src.rag.vector_store import CHROMADB_AVAILABLE
+
+
+def make_vectors(centers: np.ndarray, n: int, seed: int) -> np.ndarray:
+    """군집 중심 주변의 합성 벡터 (같은 중심에서 뽑은 질의는 색인에 없는 새 점)"""
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, len(centers), size=n)
+    return centers[labels] + rng.normal(size=(n, centers.shape[1])).astype(np.float32)
+
+
+def measure(name, search, queries, truth, top_k, build_seconds):
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(found) & expected) / top_k)
+    latencies.sort()
+    print(
+        f"{name:<12} build {build_seconds:7.2f}s | p50 {statistics.median(latencies):7.2f}ms "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1]:7.2f}ms | recall@{top_k} {np.mean(recalls):.3f}"
+    )
+
+
+def run(n: int, dim: int, n_queries: int, top_k: int, nprobe: int, batch: int):
+    centers = np.random.default_rng(0).normal(size=(max(n // 100, 10), dim)).astype(np.float32)
+    vectors = make_vectors(centers, n, seed=1)
+    queries = make_vectors(centers, n_queries, seed=2)
+    ids = [f"r{i}" for i in range(n)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        exact = NumpyVectorIndex(tmp, "exact", brute_force_max=n)
+        start = time.perf_counter()
+        for i in range(0, n, batch):
+            exact.upsert(ids[i:i + batch], vectors[i:i + batch], ids[i:i + batch])
+        exact_build = time.perf_counter() - start
+        truth = [{r[0] for r in exact.search(q, top_k)} for q in queries]
+        measure("numpy-exact", lambda q: [r[0] for r in exact.search(q, top_k)],
+                queries, truth, top_k, exact_build)
+
+        ivf = NumpyVectorIndex(tmp, "ivf", brute_force_max=0, nprobe=nprobe)
+        start = time.perf_counter()
+        for i in range(0, n, batch):
+            ivf.upsert(ids[i:i + batch], vectors[i:i + batch], ids[i:i + batch])
+        ivf.search(queries[0], top_k)  # 군집 학습 포함
+        ivf_build = time.perf_counter() - start
+        measure(f"numpy-ivf{nprobe}", lambda q: [r[0] for r in ivf.search(q, top_k)],
+                queries, truth, top_k, ivf_build)
+
+        if not CHROMADB_AVAILABLE:
+            print("chromadb 미설치 - ChromaDB 비교 생략")
+            return
+        import chromadb
+        from chromadb.config import Settings
+
+        client = chromadb.PersistentClient(path=str(Path(tmp) / "chroma"),
+                                           settings=Settings(anonymized_telemetry=False))
+        collection = client.get_or_create_collection("bench", metadata={"hnsw:space": "cosine"})
+        start = time.perf_counter()
+        step = min(batch, client.get_max_batch_size())
+        for i in range(0, n, step):
+            collection.add(ids=ids[i:i + step], embeddings=vectors[i:i + step].tolist())
+        chroma_build = time.perf_counter() - start
+        measure("chroma-hnsw",
+                lambda q: collection.query(query_embeddings=[q.tolist()], n_results=top_k)["ids"][0],
+                queries, truth, top_k, chroma_build)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="인프로세스 벡터 인덱스 벤치마크")
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--batch", type=int, default=5000)
+    args = parser.parse_args()
+    run(args.n, args.dim, args.queries, args.top_k, args.nprobe, args.batch)
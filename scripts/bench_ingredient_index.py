@@ -0,0 +1,95 @@
+"""재료 키워드 매칭 벤치마크 (전체 쌍 비교 vs 재료 역색인, 레시피별 비교 vs 비트셋)
+
+합성 레시피 코퍼스에서 보유 재료 목록으로 매칭률 상위 k개를 구하는 시간과,
+후보 레시피 묶음의 매칭률/부족 재료를 계산하는 시간을 비교합니다.
+
+사용법: python scripts/bench_ingredient_index.py [--recipes 100000] [--queries 50] [--candidates 1000]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.rag.ingredient_index import IngredientIndex, IngredientMatcher, RecipeBitsets
+
+BASE = [
+    "우유", "계란", "두부", "양파", "대파", "마늘", "당근", "감자", "고구마", "시금치",
+    "김치", "된장", "고추장", "돼지고기", "소고기", "닭가슴살", "연어", "고등어", "새우", "오징어",
+    "치즈", "버터", "사과", "토마토", "오이", "양배추", "버섯", "콩나물", "깻잎", "부추",
+]
+PREFIXES = ["", "", "", "다진", "냉동", "국산", "생", "말린"]
+
+
+def pairwise_top_k(recipes, available, k):
+    """기존 방식: 레시피마다 재료 × 보유 재료 부분 문자열 비교"""
+    scored = []
+    for key, ingredients in recipes.items():
+        matched = sum(1 for i in ingredients if any(i in a or a in i for a in available))
+        if matched:
+            scored.append((matched / len(ingredients), key))
+    scored.sort(reverse=True)
+    return scored[:k]
+
+
+def run(n_recipes: int, n_queries: int, top_k: int, n_candidates: int):
+    rng = random.Random(0)
+    vocabulary = [p + b for b in BASE for p in set(PREFIXES)]
+    recipes = {
+        f"r{i}": rng.sample(vocabulary, rng.randint(3, 8)) + [f"특제소스{i % 5000}"]
+        for i in range(n_recipes)
+    }
+
+    start = time.perf_counter()
+    index = IngredientIndex()
+    index.add_many(recipes.items())
+    print(f"index build: {time.perf_counter() - start:.2f}s ({n_recipes} recipes)")
+
+    queries = [rng.sample(BASE, rng.randint(2, 4)) for _ in range(n_queries)]
+    for name, search in (
+        ("pairwise", lambda q: pairwise_top_k(recipes, q, top_k)),
+        ("inverted", lambda q: index.top_k(q, top_k)),
+    ):
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"{name:<9} p50 {statistics.median(latencies):8.2f}ms  max {max(latencies):8.2f}ms")
+
+    # 후보 묶음 점수 계산 (매칭률 + 부족 재료 + 임박 재료 포함 여부)
+    candidates = list(recipes.values())[:n_candidates]
+    bitsets = RecipeBitsets(candidates)
+
+    def per_recipe(query):
+        matcher, urgent = IngredientMatcher(query), IngredientMatcher(query[:1])
+        return [
+            (matcher.match_rate(r), [i for i in r if not matcher.matches(i)], any(urgent.matches(i) for i in r))
+            for r in candidates
+        ]
+
+    def batched(query):
+        return bitsets.match_rates(query), bitsets.missing(query), bitsets.uses_any(query[:1])
+
+    for name, score in (("matcher", per_recipe), ("bitsets", batched)):
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            score(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"{name:<9} p50 {statistics.median(latencies):8.2f}ms  ({n_candidates} candidates)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="재료 키워드 매칭 벤치마크")
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--candidates", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.recipes, args.queries, args.top_k, args.candidates)
@@ -0,0 +1,99 @@
+"""로컬 재고 DB 벤치마크 (bulk upsert / 조회)
+
+사용법: python scripts/bench_inventory_db.py [--rows 1000000] [--users 1000] [--url sqlite+aiosqlite:///./data/bench.db]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+LOCATIONS = ["냉장", "냉동", "실온"]
+CATEGORIES = ["채소", "육류", "유제품", "과일", "기타"]
+
+
+def make_rows(start: int, count: int, users: int, today: date):
+    """벤치마크용 합성 재고 행"""
+    now = datetime.now()
+    rows = []
+    for i in range(start, start + count):
+        rows.append({
+            "user_id": f"user-{i % users}",
+            "item_id": f"item-{i}",
+            "item_name": f"재료{i % 500}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "quantity": float(i % 12 + 1),
+            "unit": "개",
+            "location": LOCATIONS[i % len(LOCATIONS)],
+            "bbox_2d": None,
+            "purchase_date": today,
+            "expiry_date": today + timedelta(days=i % 60),
+            "added_date": now,
+            "last_updated": now,
+        })
+    return rows
+
+
+async def run(rows: int, users: int, batch: int, url: str):
+    os.environ["DATABASE_URL"] = url
+    from src.database.repository import InventoryRepository
+    from src.database.session import dispose_engine
+
+    repo = InventoryRepository()
+    if not repo.available:
+        print("비동기 DB 드라이버가 없습니다 (aiosqlite/asyncpg 설치 필요)")
+        return
+
+    today = date.today()
+
+    # 쓰기: 배치 단위 bulk upsert
+    start = time.perf_counter()
+    for offset in range(0, rows, batch):
+        await repo.bulk_upsert_rows(make_rows(offset, min(batch, rows - offset), users, today))
+    write_elapsed = time.perf_counter() - start
+    print(f"쓰기: {rows:,}행 {write_elapsed:.2f}초 ({rows / write_elapsed:,.0f} rows/sec)")
+
+    # 재쓰기: 같은 키 upsert (갱신 경로)
+    update_rows = min(rows, 100_000)
+    start = time.perf_counter()
+    await repo.bulk_upsert_rows(make_rows(0, update_rows, users, today))
+    update_elapsed = time.perf_counter() - start
+    print(f"갱신: {update_rows:,}행 {update_elapsed:.2f}초 ({update_rows / update_elapsed:,.0f} rows/sec)")
+
+    # 읽기: 사용자별 전체 로드 (user_id 인덱스)
+    samples = min(users, 200)
+    start = time.perf_counter()
+    loaded = 0
+    for u in range(samples):
+        loaded += len(await repo.load_inventory(f"user-{u}"))
+    read_elapsed = time.perf_counter() - start
+    print(
+        f"사용자별 로드: {samples}회 {read_elapsed:.2f}초 "
+        f"(평균 {read_elapsed / samples * 1000:.1f}ms, {loaded / read_elapsed:,.0f} rows/sec)"
+    )
+
+    # 읽기: 유통기한 임박 조회 (expiry_date 인덱스)
+    start = time.perf_counter()
+    for u in range(samples):
+        await repo.find_expiring(f"user-{u}", today + timedelta(days=3), limit=50)
+    expiring_elapsed = time.perf_counter() - start
+    print(f"임박 재고 조회: {samples}회 평균 {expiring_elapsed / samples * 1000:.1f}ms")
+
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="재고 DB 벤치마크")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--url", default="sqlite+aiosqlite:///./data/bench_inventory.db")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.rows, args.users, args.batch, args.url))
@@ -0,0 +1,55 @@
+"""재고 엔진 동시성 처리량 벤치마크 (여러 스레드가 여러 냉장고에 스캔 반영)
+
+사용법: python scripts/bench_inventory_engine.py [--threads 8] [--fridges 4] [--scans 2000] [--items 5]
+"""
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.core.inventory_engine import STORAGE_LOCATIONS, InventoryEngine
+
+NAMES = [f"재료{i}" for i in range(20)]
+
+
+def run(n_threads: int, n_fridges: int, scans_per_thread: int, items_per_scan: int):
+    engine = InventoryEngine()
+
+    def worker(worker_id: int):
+        for i in range(scans_per_thread):
+            fridge = engine.fridge(f"fridge-{(worker_id + i) % n_fridges}")
+            fridge.apply_scan([
+                {"name": NAMES[(i + k) % len(NAMES)], "quantity": (i % 15) + 1,
+                 "location": STORAGE_LOCATIONS[k % len(STORAGE_LOCATIONS)]}
+                for k in range(items_per_scan)
+            ])
+            fridge.snapshot()
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(n_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    total_scans = n_threads * scans_per_thread
+    print(
+        f"스캔 {total_scans:,}회 ({n_threads} 스레드, 냉장고 {n_fridges}개, 스캔당 {items_per_scan}개): "
+        f"{elapsed:.2f}초, {total_scans / elapsed:,.0f} scans/sec"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="재고 엔진 처리량 벤치마크")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--fridges", type=int, default=4)
+    parser.add_argument("--scans", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=5)
+    args = parser.parse_args()
+    run(args.threads, args.fridges, args.scans, args.items)
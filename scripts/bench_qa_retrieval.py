@@ -0,0 +1,122 @@
+"""QA 검색 벤치마크 (전체 재고 프롬프트 vs 하이브리드 검색)
+
+재고 크기별로 챗봇 프롬프트 토큰 수와 질문당 검색 지연을 비교합니다.
+임베딩은 오프라인 실행을 위해 텍스트 해시 기반 의사 임베딩을 사용합니다.
+
+사용법: python scripts/bench_qa_retrieval.py [--items 5000] [--queries 200] [--dim 256]
+"""
+import argparse
+import hashlib
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.rag.qa_retriever import QARetriever, count_tokens, inventory_doc  # noqa: E402
+from src.rag.vector_store import DEFAULT_RECIPES  # noqa: E402
+
+INGREDIENTS = [
+    "우유", "계란", "두부", "양파", "대파", "마늘", "당근", "감자", "고구마", "시금치",
+    "김치", "된장", "고추장", "돼지고기", "소고기", "닭가슴살", "연어", "고등어", "새우", "오징어",
+    "치즈", "요거트", "버터", "사과", "바나나", "딸기", "토마토", "오이", "양배추", "브로콜리",
+]
+CATEGORIES = ["채소", "육류", "생선", "유제품", "과일", "기타"]
+LOCATIONS = ["냉장", "냉동", "실온"]
+QUESTIONS = [
+    "우유 얼마나 남았어?",
+    "유통기한 임박한 재료 알려줘",
+    "돼지고기로 뭐 만들 수 있어?",
+    "냉동실에 있는 생선 뭐 있지?",
+    "두부랑 김치로 만들 요리 추천해줘",
+    "과일 중에 빨리 먹어야 하는 거 있어?",
+    "오늘 저녁 뭐 먹을까?",
+]
+
+
+def make_inventory(n: int, today: date):
+    return [
+        {
+            "item_id": f"item-{i}",
+            "name": f"{INGREDIENTS[i % len(INGREDIENTS)]}{'' if i < len(INGREDIENTS) else i // len(INGREDIENTS)}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "quantity": i % 7 + 1,
+            "unit": "개",
+            "location": LOCATIONS[i % len(LOCATIONS)],
+            "expiry_date": (today + timedelta(days=i % 45 - 5)).isoformat(),
+        }
+        for i in range(n)
+    ]
+
+
+def make_embed_fn(dim: int):
+    """텍스트 해시로 시드한 의사 임베딩 (네트워크 없이 벡터 경로 측정용)"""
+    def embed(texts):
+        vectors = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+            vectors.append(np.random.default_rng(seed).standard_normal(dim).astype(np.float32))
+        return vectors
+    return embed
+
+
+def full_dump_tokens(items) -> int:
+    """기존 방식: 전체 재고를 프롬프트에 나열"""
+    lines = [
+        f"- {item.get('name')} (수량: {item.get('quantity')}{item.get('unit')}, 유통기한: {item.get('expiry_date')})"
+        for item in items
+    ]
+    return count_tokens("\n".join(lines))
+
+
+def run(items: int, queries: int, dim: int):
+    today = date.today()
+    sizes = sorted({s for s in (100, 1000, items) if s <= items})
+
+    print(f"{'items':>7} {'full prompt tok':>16} {'retrieved tok':>14} {'p50 ms':>8} {'p95 ms':>8} {'index s':>8}")
+    for size in sizes:
+        inventory = make_inventory(size, today)
+        retriever = QARetriever(make_embed_fn(dim))
+        retriever.add_recipes(DEFAULT_RECIPES)
+
+        start = time.perf_counter()
+        retriever.load_inventory("bench", inventory)
+        index_seconds = time.perf_counter() - start
+
+        latencies, tokens = [], []
+        for i in range(queries):
+            question = QUESTIONS[i % len(QUESTIONS)]
+            start = time.perf_counter()
+            context = retriever.retrieve(question, "bench", prefer_expiring="유통기한" in question)
+            latencies.append((time.perf_counter() - start) * 1000)
+            tokens.append(context.tokens)
+
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(
+            f"{size:>7} {full_dump_tokens(inventory):>16} {int(statistics.mean(tokens)):>14} "
+            f"{statistics.median(latencies):>8.2f} {p95:>8.2f} {index_seconds:>8.2f}"
+        )
+
+    # 스캔 변경분 반영 비용 (재고 10건 변경)
+    changed = [dict(doc, quantity=99) for doc in make_inventory(10, today)]
+    start = time.perf_counter()
+    retriever.apply_inventory_delta("bench", changed, ["item-11", "item-12"])
+    print(f"\ndelta(10 upserts, 2 deletes) on {sizes[-1]} items: {(time.perf_counter() - start) * 1000:.2f}ms")
+    doc_id, _, payload = inventory_doc(changed[0])
+    print(f"sample: {payload['text']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="QA 검색 벤치마크")
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=256)
+    args = parser.parse_args()
+    run(args.items, args.queries, args.dim)
@@ -0,0 +1,97 @@
+"""RecipeVectorStore 오프라인 벤치마크 (색인/질의/재현율)
+
+네트워크 없이 임베딩 백엔드(기본: hashed)로 합성 레시피를 색인하고 재료 목록 질의의
+지연, recall@k(질의 재료를 모두 포함한 레시피가 상위 k에 있는 비율), 상위 k 레시피의
+평균 매칭률(레시피 재료 중 보유 재료 비율)을 벡터 검색 단독 / 하이브리드로 비교합니다.
+
+사용법: python scripts/bench_vector_store.py [--recipes 10000] [--queries 500] [--backend hashed]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+INGREDIENTS = [
+    "우유", "계란", "두부", "양파", "대파", "마늘", "당근", "감자", "고구마", "시금치",
+    "김치", "된장", "고추장", "돼지고기", "소고기", "닭가슴살", "연어", "고등어", "새우", "오징어",
+    "치즈", "요거트", "버터", "사과", "바나나", "딸기", "토마토", "오이", "양배추", "브로콜리",
+    "애호박", "버섯", "콩나물", "깻잎", "부추", "쌀", "국수", "떡", "어묵", "베이컨",
+]
+DISHES = ["볶음", "찌개", "국", "조림", "무침", "구이", "전", "샐러드", "덮밥", "볶음밥"]
+
+
+def make_recipes(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    recipes = []
+    for i in range(n):
+        ingredients = rng.sample(INGREDIENTS, rng.randint(3, 6))
+        recipes.append({
+            "title": f"{ingredients[0]}{rng.choice(DISHES)} {i}",
+            "ingredients": ingredients,
+            "description": f"{ingredients[0]}와 {ingredients[1]}로 만드는 요리",
+        })
+    return recipes
+
+
+def run(n_recipes: int, n_queries: int, backend: str, top_k: int):
+    os.environ["EMBEDDING_BACKEND"] = backend
+    from src.agents.recipe_agent import calculate_match_rate
+    from src.rag.embeddings import get_embedder
+    from src.rag.vector_store import RecipeVectorStore
+
+    recipes = make_recipes(n_recipes)
+    with tempfile.TemporaryDirectory() as persist_dir:
+        store = RecipeVectorStore(persist_directory=persist_dir)
+        print(f"backend: {get_embedder().model}, collection: {store.collection_name}")
+
+        start = time.perf_counter()
+        for i in range(0, len(recipes), 5000):
+            store.add_recipes(recipes[i:i + 5000])
+        elapsed = time.perf_counter() - start
+        print(f"index {n_recipes} recipes : {elapsed:.2f}s ({n_recipes / elapsed:.0f} recipes/sec)")
+
+        rng = random.Random(1)
+        queries = []
+        for _ in range(n_queries):
+            target = rng.choice(recipes)
+            queries.append(rng.sample(target["ingredients"], min(3, len(target["ingredients"]))))
+
+        modes = (
+            ("vector", lambda q: [r for _, r in store.vector_search(q, top_k)]),
+            ("hybrid", lambda q: store.search_recipes(q, top_k=top_k)),
+        )
+        for name, search in modes:
+            latencies, hits, rates = [], 0, []
+            for query in queries:
+                start = time.perf_counter()
+                results = search(query)
+                latencies.append((time.perf_counter() - start) * 1000)
+                # 질의 재료를 모두 포함하는 레시피가 상위 k에 있는지
+                if any(set(query) <= set(r.get("ingredients", [])) for r in results):
+                    hits += 1
+                rates.extend(calculate_match_rate(r.get("ingredients", []), query) for r in results)
+
+            latencies.sort()
+            print(
+                f"{name:<6} p50 {statistics.median(latencies):.2f}ms, "
+                f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f}ms, "
+                f"recall@{top_k} {hits / n_queries:.2%}, mean match rate {statistics.mean(rates):.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RecipeVectorStore 오프라인 벤치마크")
+    parser.add_argument("--recipes", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--backend", default="hashed", choices=["hashed", "local", "openai"])
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+    run(args.recipes, args.queries, args.backend, args.top_k)
@@ -0,0 +1,70 @@
+"""YOLO 타일 탐지 벤치마크 (전체 이미지 1회 vs 전체 + 겹치는 타일 배치)
+
+냉장고 사진 폴더에서 모드별 탐지 지연 시간과 박스 수를 비교하고, 정답 박스가 있으면
+재현율(IoU 0.5 이상으로 찾은 정답 비율)도 계산합니다. ultralytics가 설치되어 있어야 합니다.
+
+정답 파일 형식 (JSON): {"사진 파일명": [[ymin, xmin, ymax, xmax], ...]} (0-1000 스케일)
+
+사용법: python scripts/bench_yolo_tiling.py <사진 폴더> [--labels labels.json] [--repeat 3]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.agents.vision_agent import _get_yolo_model, calculate_iou, detect_with_yolo
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def recall(detections, truths, threshold=0.5):
+    if not truths:
+        return None
+    found = sum(
+        1 for truth in truths if any(calculate_iou(truth, d["bbox_2d"]) >= threshold for d in detections)
+    )
+    return found / len(truths)
+
+
+def run(image_dir: Path, labels_path: Path, repeat: int):
+    images = sorted(p for p in image_dir.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not images:
+        print(f"사진 없음: {image_dir}")
+        return
+    labels = json.loads(labels_path.read_text(encoding="utf-8")) if labels_path else {}
+    if _get_yolo_model() is None:
+        print("YOLO 모델을 불러올 수 없습니다 (ultralytics 설치 확인)")
+        return
+    detect_with_yolo(str(images[0]), tiling="false")  # 워밍업
+
+    for mode in ("false", "auto", "true"):
+        latencies, counts, recalls = [], [], []
+        for image in images:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                detections = detect_with_yolo(str(image), tiling=mode)
+                latencies.append((time.perf_counter() - start) * 1000)
+            counts.append(len(detections))
+            r = recall(detections, labels.get(image.name, []))
+            if r is not None:
+                recalls.append(r)
+        recall_text = f"  recall {statistics.mean(recalls):.3f}" if recalls else ""
+        print(
+            f"tiling={mode:<5} p50 {statistics.median(latencies):8.1f}ms  max {max(latencies):8.1f}ms"
+            f"  boxes/img {statistics.mean(counts):6.1f}{recall_text}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="YOLO 타일 탐지 벤치마크")
+    parser.add_argument("image_dir", type=Path)
+    parser.add_argument("--labels", type=Path, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.image_dir, args.labels, args.repeat)
@@ -0,0 +1,39 @@
+"""레시피 코퍼스 일괄 적재 CLI
+
+사용법: python scripts/ingest_recipes.py recipes.jsonl [--format csv] [--chunk-size 1000] [--no-resume]
+
+중단되면 같은 명령을 다시 실행해 마지막 체크포인트부터 이어서 적재합니다.
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.rag.ingest import DEFAULT_CHUNK_SIZE, SUPPORTED_FORMATS, ingest_recipes  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="레시피 코퍼스 일괄 적재")
+    parser.add_argument("path", help="JSONL 또는 CSV 레시피 파일")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, help="파일 형식 (기본: 확장자로 판단)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--no-resume", action="store_true", help="체크포인트를 무시하고 처음부터 적재")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    stats = ingest_recipes(
+        args.path,
+        fmt=args.format,
+        chunk_size=args.chunk_size,
+        resume=not args.no_resume,
+    )
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
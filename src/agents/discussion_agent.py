@@ -1,13 +1,147 @@
 """Discussion Agent - Recipe Agent와 Recommendation Agent 간 토론"""
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import logging
 import os
+from collections import Counter
 from openai import OpenAI
 from ..core.state import FridgeState
+from ..core.structured_output import strict_object, structured_completion
+from ..rag.ingredient_index import RecipeBitsets
+from ..rag.ingredient_normalizer import get_resolver, item_ingredient_id
+from ..rag.vector_store import parse_cooking_minutes
 
 logger = logging.getLogger(__name__)
 
+# 표준 재료 분류 → 토론 테마
+THEME_BY_CATEGORY = {
+    "육류": "Meat",
+    "해산물": "Seafood",
+    "채소": "Veggie",
+    "콩": "Veggie",
+}
+
+# 결정적 선택 가중치 (토론 프롬프트의 평가 기준과 동일)
+DISCUSSION_WEIGHTS = {"urgent": 0.35, "match": 0.30, "theme": 0.20, "time": 0.15}
+DISCUSSION_CANDIDATES = 7
+DISCUSSION_PICKS = 3
+# 선택된 레시피와 밀려난 후보의 점수 차가 이보다 작으면 LLM 토론으로 결정
+DISCUSSION_LLM_MARGIN = float(os.getenv("DISCUSSION_LLM_MARGIN", 0.05))
+
+# LLM 토론 응답 스키마 (짧은 키, 잘려도 선택 목록이 남도록 논의 내용을 마지막에)
+DISCUSSION_FIELDS = {
+    "s": ("selected_recipes", {"t": "title", "r": "reason", "p": "priority_score"}),
+    "d": "discussion",
+}
+DISCUSSION_SCHEMA = strict_object({
+    "s": {
+        "type": "array",
+        "items": strict_object({
+            "t": {"type": "string"},
+            "r": {"type": "string"},
+            "p": {"type": "number"},
+        }),
+    },
+    "d": {"type": "string"},
+})
+
+# 요리 스타일 키워드 (제목에서 가장 뒤에 끝나는 키워드 기준: "김치볶음밥" → 밥/면)
+RECIPE_STYLES = {
+    "국물": ["국", "탕", "찌개", "전골", "죽", "스프", "수프"],
+    "볶음": ["볶음"],
+    "구이": ["구이", "스테이크"],
+    "무침": ["무침", "샐러드", "나물"],
+    "찜/조림": ["찜", "조림"],
+    "튀김/전": ["튀김", "전", "부침"],
+    "밥/면": ["밥", "덮밥", "면", "국수", "파스타", "우동"],
+}
+
+# 토론 통계 (가중 점수로 바로 결정한 횟수, LLM 토론 횟수)
+DISCUSSION_STATS: Counter = Counter()
+
+
+def recipe_style(title: str) -> str:
+    """레시피 제목 → 요리 스타일 (키워드가 없으면 "기타")"""
+    best, best_end = "기타", -1
+    for style, keywords in RECIPE_STYLES.items():
+        for keyword in keywords:
+            position = title.rfind(keyword)
+            if position >= 0 and position + len(keyword) > best_end:
+                best, best_end = style, position + len(keyword)
+    return best
+
+
+def _time_score(cooking_time: Any) -> float:
+    """조리 시간 점수 (15분 이하 1점, 60분 이상 0점, 알 수 없으면 0.5점)"""
+    minutes = parse_cooking_minutes(cooking_time)
+    if minutes is None:
+        return 0.5
+    return min(1.0, max(0.0, (60 - minutes) / 45))
+
+
+def score_recipes(
+    recipes: List[Dict[str, Any]], urgent_items: List[str], main_category: str
+) -> List[Dict[str, float]]:
+    """레시피별 평가 기준 점수(0~1)와 가중 합계(total)"""
+    resolver = get_resolver()
+    bitsets = RecipeBitsets([r.get("ingredients_needed", []) for r in recipes])
+    urgent_counts = bitsets.match_counts(urgent_items)
+    urgent_total = len(set(urgent_items))
+
+    scores = []
+    for recipe, urgent_count in zip(recipes, urgent_counts):
+        ingredients = recipe.get("ingredients_needed", [])
+        themed = sum(
+            1 for name in ingredients
+            if THEME_BY_CATEGORY.get(resolver.category(resolver.resolve(name))) == main_category
+        )
+        criteria = {
+            "urgent": min(1.0, urgent_count / urgent_total) if urgent_total else 0.0,
+            "match": float(recipe.get("match_rate", 0) or 0),
+            "theme": themed / len(ingredients) if ingredients else 0.0,
+            "time": _time_score(recipe.get("cooking_time")),
+        }
+        criteria["total"] = sum(DISCUSSION_WEIGHTS[k] * criteria[k] for k in DISCUSSION_WEIGHTS)
+        scores.append(criteria)
+    return scores
+
+
+def select_recipes(
+    recipes: List[Dict[str, Any]], totals: List[float], k: int = DISCUSSION_PICKS
+) -> Tuple[List[int], float]:
+    """가중 점수 순으로 k개를 고르되 아직 고르지 않은 스타일을 우선
+
+    반환: (선택 인덱스, 결정 여유) - 결정 여유는 각 선택 시점에 선택된 레시피와 끝내
+    선택되지 못한 최고 경쟁 후보의 점수 차 중 최솟값 (경쟁 후보가 없으면 inf).
+    """
+    styles = [recipe_style(r.get("title", "")) for r in recipes]
+    remaining = sorted(range(len(recipes)), key=lambda i: -totals[i])
+    picks: List[int] = []
+    rounds = []
+    used_styles = set()
+    while remaining and len(picks) < k:
+        eligible = [i for i in remaining if styles[i] not in used_styles] or remaining
+        choice = eligible[0]
+        picks.append(choice)
+        used_styles.add(styles[choice])
+        remaining.remove(choice)
+        rounds.append((choice, eligible[1:]))
+
+    margin = float("inf")
+    for choice, rivals in rounds:
+        rival = next((i for i in rivals if i not in picks), None)
+        if rival is not None:
+            margin = min(margin, totals[choice] - totals[rival])
+    return picks, margin
+
+
+def _selection_reason(recipe: Dict[str, Any], criteria: Dict[str, float]) -> str:
+    return (
+        f"임박 재료 활용 {criteria['urgent']:.0%} · 매칭률 {criteria['match']:.0%} · "
+        f"테마 재료 {criteria['theme']:.0%} · 조리 {recipe.get('cooking_time') or '시간 미상'} "
+        f"({recipe_style(recipe.get('title', ''))})"
+    )
+
 
 def discussion_agent_node(state: FridgeState) -> FridgeState:
     """Discussion Agent 노드 - Recipe Agent와 Recommendation Agent가 논의하여 최고의 요리 선택"""
@@ -24,55 +158,18 @@ def discussion_agent_node(state: FridgeState) -> FridgeState:
             state["current_step"] = "discussion_completed"
             return state
 
-        # OpenAI 클라이언트 초기화
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
         # 보유 재료 목록
         all_items = detected_items + user_confirmed_items
         available_ingredients = [item.get("name", "") for item in all_items]
 
-        # 주요 카테고리 분석 (간단한 키워드 기반)
-        meat_keywords = [
-            "고기",
-            "쇠고기",
-            "돼지고기",
-            "닭고기",
-            "소고기",
-            "양고기",
-            "베이컨",
-            "햄",
-        ]
-        seafood_keywords = [
-            "생선",
-            "고등어",
-            "오징어",
-            "새우",
-            "조개",
-            "해물",
-            "게",
-            "낙지",
-        ]
-        veggie_keywords = [
-            "시금치",
-            "당근",
-            "양파",
-            "브로콜리",
-            "두부",
-            "버섯",
-            "파",
-            "마늘",
-            "배추",
-        ]
-
+        # 주요 카테고리 분석 (표준 재료 분류 기반)
+        resolver = get_resolver()
         category_counts = {"Meat": 0, "Seafood": 0, "Veggie": 0}
 
-        for item in available_ingredients:
-            if any(k in item for k in meat_keywords):
-                category_counts["Meat"] += 1
-            elif any(k in item for k in seafood_keywords):
-                category_counts["Seafood"] += 1
-            elif any(k in item for k in veggie_keywords):
-                category_counts["Veggie"] += 1
+        for item in all_items:
+            theme = THEME_BY_CATEGORY.get(resolver.category(item_ingredient_id(item)))
+            if theme:
+                category_counts[theme] += 1
 
         # 가장 많은 카테고리 선정
         main_category = max(category_counts, key=category_counts.get)
@@ -97,6 +194,41 @@ def discussion_agent_node(state: FridgeState) -> FridgeState:
             if item.get("urgency") in ["즉시소비", "3일이내"]
         ]
 
+        # 토론 프롬프트의 가중치로 먼저 결정적으로 선택
+        candidates = recipe_suggestions[:DISCUSSION_CANDIDATES]
+        scores = score_recipes(candidates, urgent_items, main_category)
+        picks, margin = select_recipes(candidates, [c["total"] for c in scores])
+        deterministic_selection = [
+            {
+                "title": candidates[i].get("title", ""),
+                "reason": _selection_reason(candidates[i], scores[i]),
+                "priority_score": round(scores[i]["total"] * 100, 1),
+            }
+            for i in picks
+        ]
+
+        # 순위가 확실하고 토론 내용을 요청하지 않았으면 LLM 호출 생략
+        if margin >= DISCUSSION_LLM_MARGIN and not state.get("discussion_narrative"):
+            DISCUSSION_STATS["deterministic"] += 1
+            state["recipe_suggestions"] = [candidates[i] for i in picks]
+            state["discussion_result"] = {
+                "discussion": (
+                    f"가중 점수(임박 재료 35%, 매칭률 30%, {main_category} 테마 20%, 조리 시간 15%)와 "
+                    "스타일 다양성으로 선택"
+                    + (f" (다음 후보와 점수 차 {margin:.2f})" if margin != float("inf") else "")
+                ),
+                "selected_recipes": deterministic_selection,
+                "method": "deterministic",
+            }
+            state["current_step"] = "discussion_completed"
+            logger.info(
+                f"Discussion Agent 완료: {len(picks)}개 레시피 결정적 선택 ({main_category} 테마, LLM 생략)"
+            )
+            return state
+
+        DISCUSSION_STATS["llm"] += 1
+        logger.info(f"점수 차 {margin:.3f} < {DISCUSSION_LLM_MARGIN} 또는 토론 요청 - LLM 토론 진행")
+
         # 토론 프롬프트 구성
         discussion_prompt = f"""당신은 Recipe Agent와 Recommendation Agent가 함께 논의하는 오케스트레이터입니다.
 현재 주요 식재료 테마는 '{main_category}'입니다.
@@ -110,7 +242,7 @@ def discussion_agent_node(state: FridgeState) -> FridgeState:
 Recipe Agent가 추천한 레시피 후보들:
 """
 
-        for idx, recipe in enumerate(recipe_suggestions[:7], 1):  # 후보를 좀 더 많이 봄
+        for idx, recipe in enumerate(candidates, 1):  # 후보를 좀 더 많이 봄
             discussion_prompt += f"""
 {idx}. {recipe.get("title", "")}
    - 매칭률: {recipe.get("match_rate", 0):.2%}
@@ -145,30 +277,16 @@ Recipe Agent와 Recommendation Agent의 역할:
 
 논의 과정을 보여주고, 최종적으로 선택된 3개 레시피의 제목과 선택 이유를 JSON 형식으로 반환하세요.
 
-형식:
-{{
-  "discussion": "에이전트 간 논의 내용 (카테고리별 전문가 관점 포함)",
-  "selected_recipes": [
-    {{
-      "title": "레시피 제목 1",
-      "reason": "선택 이유",
-      "priority_score": 점수
-    }},
-    {{
-      "title": "레시피 제목 2",
-      "reason": "선택 이유",
-      "priority_score": 점수
-    }},
-     {{
-      "title": "레시피 제목 3",
-      "reason": "선택 이유",
-      "priority_score": 점수
-    }}
-  ]
-}}
+형식 (s: 선택한 레시피 3개 [t: 제목, r: 선택 이유, p: 점수], d: 에이전트 간 논의 내용):
+{{"s": [{{"t": "레시피 제목", "r": "선택 이유", "p": 점수}}, ...], "d": "에이전트 간 논의 내용 (카테고리별 전문가 관점 포함)"}}
 """
 
-        response = client.chat.completions.create(
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        discussion_result, complete = structured_completion(
+            client,
+            "discussion",
+            DISCUSSION_SCHEMA,
+            DISCUSSION_FIELDS,
             model="gpt-4o-mini",
             messages=[
                 {
@@ -185,43 +303,21 @@ Recipe Agent와 Recommendation Agent가 논의하는 과정을 이끌며, 두 
             temperature=0.7,
         )
 
-        # 응답 파싱
-        content = response.choices[0].message.content
-
-        # JSON 추출
-        import json
-        import re
-
-        json_match = re.search(r"\{.*\}", content, re.DOTALL)
-        if json_match:
-            json_str = json_match.group()
-            try:
-                discussion_result = json.loads(json_str)
-            except json.JSONDecodeError:
-                discussion_result = None
-        else:
-            discussion_result = None
-
-        if not discussion_result:
-            # JSON 파싱 실패 혹은 없음 -> 상위 3개 자동 선택
+        if not isinstance(discussion_result, dict) or not discussion_result.get("selected_recipes"):
+            # JSON 파싱 실패 혹은 선택 없음 -> 가중 점수 선택 사용
             discussion_result = {
-                "discussion": "자동 선택: 상위 3개 레시피 (토론 파싱 실패)",
-                "selected_recipes": [],
+                "discussion": "자동 선택: 가중 점수 상위 레시피 (토론 파싱 실패)",
+                "selected_recipes": deterministic_selection,
             }
-            for i in range(min(3, len(recipe_suggestions))):
-                discussion_result["selected_recipes"].append(
-                    {
-                        "title": recipe_suggestions[i].get("title", ""),
-                        "reason": "우선순위 점수 기반 자동 선택",
-                        "priority_score": recipe_suggestions[i].get(
-                            "priority_score", 0
-                        ),
-                    }
-                )
+        elif not complete:
+            # 선택 목록을 먼저 받으므로 논의 내용이 잘려도 선택은 유지
+            discussion_result.setdefault("discussion", "")
+            discussion_result["truncated"] = True
+        discussion_result["method"] = "llm"
 
         # 선택된 레시피의 전체 정보 가져오기
         selected_recipe_titles = [
-            r["title"] for r in discussion_result.get("selected_recipes", [])
+            r.get("title") for r in discussion_result.get("selected_recipes", [])
         ]
         final_selected_recipes = []
 
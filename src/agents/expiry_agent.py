@@ -1,9 +1,10 @@
 """Expiry Agent - 유통기한 관리"""
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import logging
 from ..core.state import FridgeState
 from ..utils.date_calculator import calculate_days_left, get_urgency_level, adjust_expiry_for_opened
+from ..rag.ingredient_normalizer import get_resolver, item_ingredient_id
 
 logger = logging.getLogger(__name__)
 
@@ -95,16 +96,13 @@ EXPIRY_DB = {
 }
 
 
-def get_expiry_info(item_name: str) -> Dict[str, Any]:
-    """식재료별 유통기한 정보 조회"""
-    # 정확한 매칭 시도
-    if item_name in EXPIRY_DB:
-        return EXPIRY_DB[item_name]
-    
-    # 부분 매칭 시도
-    for key, value in EXPIRY_DB.items():
-        if key in item_name or item_name in key:
-            return value
+def get_expiry_info(item_name: str, ingredient_id: Optional[int] = None) -> Dict[str, Any]:
+    """식재료별 유통기한 정보 조회 (표준 재료 ID 기준, 없으면 이름으로 해석)"""
+    resolver = get_resolver()
+    if ingredient_id is None:
+        ingredient_id = resolver.resolve(item_name)
+    if ingredient_id is not None and resolver.names[ingredient_id] in EXPIRY_DB:
+        return EXPIRY_DB[resolver.names[ingredient_id]]
     
     # 기본값 반환
     return {"base_days": 7, "storage": "냉장"}
@@ -129,7 +127,7 @@ def expiry_agent_node(state: FridgeState) -> FridgeState:
         
         for item in detected_items:
             item_name = item.get("name", "알 수 없음")
-            expiry_info = get_expiry_info(item_name)
+            expiry_info = get_expiry_info(item_name, item_ingredient_id(item))
             
             # 기본 유통기한 일수
             base_days = expiry_info.get("base_days", 7)
@@ -1,13 +1,28 @@
 """Inventory Agent - 재고 관리"""
 from typing import Dict, Any, List
-from datetime import datetime
 import logging
 from ..core.state import FridgeState
+from ..core.inventory_engine import get_inventory_engine
+from ..rag.ingredient_normalizer import get_resolver, item_ingredient_id
 
 logger = logging.getLogger(__name__)
 
-# 간단한 인메모리 재고 저장소 (실제로는 DB 사용)
-_inventory_store: Dict[str, Dict[str, Any]] = {}
+# 실온 보관 채소/과일
+ROOM_TEMPERATURE_ITEMS = {"양파", "마늘", "감자", "바나나"}
+ROOM_TEMPERATURE_IDS = get_resolver().ids(ROOM_TEMPERATURE_ITEMS)
+
+
+def determine_storage_location(item: Dict[str, Any]) -> str:
+    """보관 위치 결정 (카테고리 기반)"""
+    category = item.get("category", "기타")
+    if category in ["육류", "생선", "유제품"]:
+        return "냉장"
+    if "냉동" in (item.get("packaging") or ""):
+        return "냉동"
+    if category in ["과일", "채소"] and item_ingredient_id(item) in ROOM_TEMPERATURE_IDS:
+        # 일부는 실온 보관
+        return "실온"
+    return "냉장"
 
 
 def inventory_agent_node(state: FridgeState) -> FridgeState:
@@ -25,71 +40,48 @@ def inventory_agent_node(state: FridgeState) -> FridgeState:
                 "실온": 0
             }
             state["inventory_changes"] = {"새로 추가": [], "소진됨": []}
+            state["inventory_delta"] = {}
             state["inventory_warnings"] = []
             state["current_step"] = "inventory_completed"
             return state
         
-        # 카테고리별 분류
-        categories = {"냉장": 0, "냉동": 0, "실온": 0}
-        new_items = []
-        updated_items = []
+        # 유통기한 정보는 detected_items 와 같은 순서로 항목마다 하나씩 계산됨
+        expiry_data = state.get("expiry_data", [])
+        if len(expiry_data) != len(detected_items):
+            expiry_data = [{}] * len(detected_items)
+
+        updates = []
+        for item, expiry in zip(detected_items, expiry_data):
+            updates.append({
+                "name": item.get("name", "알 수 없음"),
+                "category": item.get("category", "기타"),
+                "quantity": item.get("quantity", 1),
+                "unit": item.get("unit", "개"),
+                "location": determine_storage_location(item),
+                "bbox_2d": item.get("bbox_2d"),
+                "purchase_date": expiry.get("purchase_date"),
+                "expiry_date": expiry.get("expiry_date")
+            })
         
-        for item in detected_items:
-            item_name = item.get("name", "알 수 없음")
-            category = item.get("category", "기타")
-            quantity = item.get("quantity", 1)
-            
-            # 보관 위치 결정 (카테고리 기반)
-            storage_location = "냉장"
-            if category in ["육류", "생선", "유제품"]:
-                storage_location = "냉장"
-            elif "냉동" in item.get("packaging", ""):
-                storage_location = "냉동"
-            elif category in ["과일", "채소"]:
-                # 일부는 실온 보관
-                if item_name in ["양파", "마늘", "감자", "바나나"]:
-                    storage_location = "실온"
-                else:
-                    storage_location = "냉장"
-            
-            categories[storage_location] = categories.get(storage_location, 0) + 1
-            
-            # 재고 업데이트
-            if item_name not in _inventory_store:
-                _inventory_store[item_name] = {
-                    "name": item_name,
-                    "category": category,
-                    "quantity": quantity,
-                    "unit": item.get("unit", "개"),
-                    "added_date": datetime.now().isoformat(),
-                    "last_updated": datetime.now().isoformat(),
-                    "location": storage_location
-                }
-                new_items.append(item_name)
-            else:
-                _inventory_store[item_name]["quantity"] = quantity
-                _inventory_store[item_name]["last_updated"] = datetime.now().isoformat()
-                updated_items.append(item_name)
+        # 냉장고별 재고 업데이트 - 이전 스냅샷과 비교하여 차이만 반영
+        fridge = get_inventory_engine().fridge(state.get("fridge_id"))
+        result = fridge.apply_scan(updates)
         
-        # 경고 생성
-        warnings = []
-        for item_name, item_data in _inventory_store.items():
-            quantity = item_data.get("quantity", 0)
-            if quantity > 10:
-                warnings.append(f"🟡 과다: {item_name} ({quantity}개, 권장 3개)")
-        
-        # 현재 재고 상태
-        inventory_status = {
-            "총 품목 수": len(_inventory_store),
-            "냉장": categories.get("냉장", 0),
-            "냉동": categories.get("냉동", 0),
-            "실온": categories.get("실온", 0)
-        }
+        inventory_status = result["status"]
+        warnings = result["warnings"]
         
         # 변화 추적
         inventory_changes = {
-            "새로 추가": new_items,
-            "소진됨": []  # 실제로는 이전 재고와 비교 필요
+            "새로 추가": [r["name"] for r in result["added"]],
+            "소진됨": [r["name"] for r in result["consumed"]],
+            "이동됨": [r["name"] for r in result["moved"]],
+            "수량 변경": [r["name"] for r in result["quantity_changed"]]
+        }
+        
+        # 영속화용 차이 (변경된 레코드만)
+        state["inventory_delta"] = {
+            kind: result[kind]
+            for kind in ("added", "consumed", "moved", "quantity_changed")
         }
         
         # State 업데이트
@@ -107,6 +99,7 @@ def inventory_agent_node(state: FridgeState) -> FridgeState:
         state["errors"].append(f"Inventory Agent 오류: {str(e)}")
         state["inventory_status"] = {}
         state["inventory_changes"] = {}
+        state["inventory_delta"] = {}
         state["inventory_warnings"] = []
         state["current_step"] = "inventory_error"
         return state
@@ -1,9 +1,13 @@
 """Orchestrator - LangGraph 실행 진입점"""
+import asyncio
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 from ..core.state import FridgeState
 from ..core.graph import create_fridge_graph
+from ..core.inventory_engine import DEFAULT_FRIDGE_ID, get_inventory_engine
+from ..database.repository import get_inventory_repository
+from ..rag.qa_retriever import get_qa_retriever
 
 logger = logging.getLogger(__name__)
 
@@ -12,7 +16,9 @@ def initialize_state(
     image_path: Optional[str] = None, 
     image_data: Optional[bytes] = None,
     servings: int = 2,
-    diet_type: str = "general"
+    diet_type: str = "general",
+    fridge_id: str = DEFAULT_FRIDGE_ID,
+    discussion_narrative: bool = False
 ) -> FridgeState:
     """초기 State 생성"""
     return FridgeState(
@@ -20,13 +26,18 @@ def initialize_state(
         image_data=image_data,
         servings=servings,
         diet_type=diet_type,
+        fridge_id=fridge_id,
+        discussion_narrative=discussion_narrative,
         detected_items=[],
         unidentified_items=[],
         user_confirmed_items=[],
+        vision_stats={},
+        speculative_recipes=None,
         expiry_data=[],
         expiry_alerts=[],
         inventory_status={},
         inventory_changes={},
+        inventory_delta={},
         inventory_warnings=[],
         recipe_suggestions=[],
         discussion_result=None,
@@ -39,18 +50,60 @@ def initialize_state(
     )
 
 
+def build_inventory_delta_rows(
+    inventory_delta: Dict[str, List[Dict[str, Any]]]
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """재고 차이를 영속화용 upsert 행과 삭제 ID 목록으로 변환
+
+    구매일/유통기한은 재고 레코드에 있는 값을 그대로 씁니다. 새로 추가된 항목은
+    이번 스캔의 값, 이동/수량 변경 항목은 저장된 값이므로 스캔마다 기한이 늘어나지 않습니다.
+    """
+    upserts: Dict[str, Dict[str, Any]] = {}
+    for kind in ("added", "moved", "quantity_changed"):
+        for record in inventory_delta.get(kind, []):
+            upserts[record["item_id"]] = record
+
+    deleted_item_ids = [r["item_id"] for r in inventory_delta.get("consumed", [])]
+    return list(upserts.values()), deleted_item_ids
+
+
+async def ensure_inventory_loaded(fridge_id: str) -> None:
+    """냉장고 재고를 로컬 DB에서 엔진으로 최초 1회 로드
+
+    로드에 실패하면 빈 재고로 시작하지 않고 예외를 올립니다. 빈 재고에 스캔을
+    반영하면 item_id가 다시 0번부터 발급되어 저장된 행을 덮어쓰기 때문입니다.
+    냉장고는 로드되지 않은 상태로 남아 다음 요청에서 다시 시도합니다.
+    """
+    fridge = get_inventory_engine().fridge(fridge_id)
+    if fridge.hydrated:
+        return
+    try:
+        records = await get_inventory_repository().load_inventory(fridge_id)
+    except Exception as e:
+        logger.error(f"재고 DB 로드 실패: {e}")
+        raise RuntimeError(f"재고 DB 로드 실패: {e}") from e
+    fridge.hydrate(records)
+
+
 async def run_orchestrator(
     image_path: Optional[str] = None, 
     image_data: Optional[bytes] = None,
     servings: int = 2,
-    diet_type: str = "general"
+    diet_type: str = "general",
+    fridge_id: str = DEFAULT_FRIDGE_ID,
+    discussion_narrative: bool = False
 ) -> Dict[str, Any]:
     """오케스트레이터 실행"""
     try:
-        logger.info(f"오케스트레이터 시작 (인분: {servings}, 식단: {diet_type})")
+        logger.info(f"오케스트레이터 시작 (인분: {servings}, 식단: {diet_type}, 냉장고: {fridge_id})")
         
         # State 초기화
-        initial_state = initialize_state(image_path, image_data, servings, diet_type)
+        initial_state = initialize_state(
+            image_path, image_data, servings, diet_type, fridge_id, discussion_narrative
+        )
+        
+        # 이전 스캔 재고 로드 (재고 차이 계산용)
+        await ensure_inventory_loaded(fridge_id)
         
         # 그래프 생성 및 실행
         graph = create_fridge_graph()
@@ -72,6 +125,7 @@ async def run_orchestrator(
             "detected_items": detected_items,
             "unidentified_items": final_state.get("unidentified_items", []),
             "user_confirmed_items": final_state.get("user_confirmed_items", []),
+            "vision_stats": final_state.get("vision_stats", {}),
             "expiry_data": final_state.get("expiry_data", []),
             "expiry_alerts": final_state.get("expiry_alerts", []),
             "inventory_status": final_state.get("inventory_status", {}),
@@ -90,12 +144,35 @@ async def run_orchestrator(
         }
         
         from ..core.supabase_client import SupabaseManager
+        from ..core.write_behind import get_persistence_queue
         
-        # Save results to Supabase
-        combined_inventory = final_state.get("expiry_data", [])
-        if combined_inventory:
-            logger.info(f"Saving {len(combined_inventory)} items to Supabase...")
-            await SupabaseManager().save_inventory_items(combined_inventory)
+        # 로컬 DB 및 Supabase에 이전 스캔 대비 변경분만 저장
+        upserts, deleted_item_ids = build_inventory_delta_rows(final_state.get("inventory_delta", {}))
+        if upserts or deleted_item_ids:
+            try:
+                await get_inventory_repository().apply_delta(fridge_id, upserts, deleted_item_ids)
+            except Exception as e:
+                logger.error(f"재고 DB 저장 실패: {e}")
+
+            # QA 검색 인덱스에도 변경분만 반영 (적재된 냉장고만)
+            try:
+                await asyncio.to_thread(
+                    get_qa_retriever().apply_inventory_delta, fridge_id, upserts, deleted_item_ids
+                )
+            except Exception as e:
+                logger.error(f"QA 인덱스 갱신 실패: {e}")
+
+            # Supabase 반영은 write-behind 큐로 위임 (응답 지연/실패와 분리)
+            if not SupabaseManager().disabled:
+                logger.info(
+                    f"Queueing inventory delta for Supabase "
+                    f"({len(upserts)} upserts, {len(deleted_item_ids)} deletes)..."
+                )
+                await get_persistence_queue().enqueue({
+                    "fridge_id": fridge_id,
+                    "upserts": upserts,
+                    "deleted_item_ids": deleted_item_ids,
+                })
             
         logger.info(f"오케스트레이터 완료: {result['current_step']}")
         
@@ -1,73 +1,260 @@
+import os
+import asyncio
 import logging
-import json
 from datetime import datetime
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
 
+from ..core.chat_session import ChatSession
+from ..core.inventory_engine import DEFAULT_FRIDGE_ID
 from ..core.supabase_client import SupabaseManager
+from ..database.repository import get_inventory_repository
+from ..rag.qa_retriever import DEFAULT_TOKEN_BUDGET, RetrievedContext, count_tokens, get_qa_retriever
 
 logger = logging.getLogger(__name__)
 
+# 인덱스 최초 적재 시 필요한 컬럼만 조회
+QA_INVENTORY_COLUMNS = ("item_id", "name", "quantity", "unit", "category", "location", "expiry_date")
 
-async def answer_user_question(question: str) -> str:
-    """
-    Supabase에 저장된 냉장고 재료 데이터를 기반으로 사용자 질문에 답변합니다.
-    """
-    try:
-        # 1. Supabase에서 최신 재료 목록 가져오기
-        manager = SupabaseManager()
-        items = await manager.get_all_inventory()
-
-        # 데이터 요약 (토큰 절약)
-        inventory_summary = []
-        for item in items:
-            summary = f"- {item.get('name')} (수량: {item.get('quantity')}{item.get('unit')}, 유통기한: {item.get('expiry_date')})"
-            inventory_summary.append(summary)
-
-        inventory_text = (
-            "\n".join(inventory_summary)
-            if inventory_summary
-            else "냉장고가 비어있습니다."
-        )
+# 이 키워드가 있으면 유통기한 임박/경과 재료를 우선 포함
+EXPIRED_KEYWORDS = ["유통기한", "만료", "지난", "임박", "상한", "버려", "버릴", "폐기"]
 
-        # 2. LLM 호출 준비
-        llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7)
+# 최근 대화 원문에 쓸 토큰 예산 - 넘치는 오래된 턴은 요약으로 접음
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", 800))
+# 요약 후 남길 최근 대화 비율 (매 턴 요약하지 않도록 여유를 둠)
+HISTORY_KEEP_RATIO = 0.5
 
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    """당신은 냉장고 관리 AI 비서 'FridgeAI'입니다.
+QA_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """당신은 냉장고 관리 AI 비서 'FridgeAI'입니다.
 사용자의 냉장고 재료 목록을 확인하고, 그에 기반하여 질문에 답변하세요.
 재료가 없거나 부족하면 솔직하게 말하고, 가능한 레시피나 조언을 제공하세요.
 
-현재 냉장고 재료 목록:
+질문과 관련된 냉장고 재료 목록:
 {inventory}
 
+참고할 레시피/리포트:
+{knowledge}
+
+이전 대화 요약:
+{summary}
+
 오늘 날짜: {date}
 answer in Korean.
 """,
-                ),
-                ("human", "{question}"),
-            ]
+        ),
+        MessagesPlaceholder("history"),
+        ("human", "{question}"),
+    ]
+)
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """냉장고 챗봇 대화를 이어가기 위한 요약을 갱신하세요.
+기존 요약에 새 대화 내용을 합쳐, 사용자의 선호/제약, 언급된 재료, 결정된 사항 위주로
+5문장 이내 한국어로 작성하세요.""",
+        ),
+        ("human", "기존 요약:\n{summary}\n\n새 대화:\n{transcript}"),
+    ]
+)
+
+
+@lru_cache(maxsize=1)
+def get_qa_chain():
+    """질의응답 체인 (프로세스당 1회 생성)"""
+    return QA_PROMPT | ChatOpenAI(model="gpt-4o-mini", temperature=0.7) | StrOutputParser()
+
+
+@lru_cache(maxsize=1)
+def get_summary_chain():
+    """대화 요약 체인"""
+    return SUMMARY_PROMPT | ChatOpenAI(model="gpt-4o-mini", temperature=0) | StrOutputParser()
+
+
+# 백그라운드 요약 태스크 참조 유지
+_background_tasks = set()
+
+
+async def load_inventory_rows(fridge_id: str) -> List[Dict[str, Any]]:
+    """QA 인덱스 최초 적재용 재고 행 (로컬 DB 우선, 비어 있으면 Supabase)"""
+    try:
+        rows = await get_inventory_repository().load_inventory(fridge_id)
+    except Exception as e:
+        logger.error(f"재고 DB 로드 실패: {e}")
+        rows = []
+    if not rows:
+        rows = await SupabaseManager().query_inventory(
+            columns=QA_INVENTORY_COLUMNS, fridge_id=fridge_id
         )
+    return rows
+
+
+def select_inventory_lines(
+    session: ChatSession,
+    context: RetrievedContext,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+) -> List[str]:
+    """이번 질문의 검색 결과 + 세션에서 앞서 언급된 재료를 예산 안에서 결합"""
+    lines, used = [], context.tokens
+    for line in context.inventory:
+        lines.append(line)
+    included = set(lines)
+    for line in session.inventory_lines:
+        if line in included:
+            continue
+        cost = count_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        included.add(line)
+        used += cost
+    return lines
+
+
+def select_history(
+    turns: List[Tuple[str, str]],
+    token_budget: Optional[int] = None,
+) -> Tuple[List[Tuple[str, str]], int]:
+    """예산 안에 들어가는 최근 턴과, 예산을 넘긴 오래된 턴 수"""
+    token_budget = token_budget or CHAT_HISTORY_TOKEN_BUDGET
+    used, start = 0, len(turns)
+    while start > 0:
+        cost = count_tokens(turns[start - 1][1]) + 4
+        if used + cost > token_budget:
+            break
+        used += cost
+        start -= 1
+    start += start % 2  # 질문/답변 쌍 단위로 자름
+    return turns[start:], start
 
-        chain = prompt | llm | StrOutputParser()
 
-        # 3. 답변 생성
-        response = await chain.ainvoke(
-            {
-                "inventory": inventory_text,
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "question": question,
-            }
+async def fold_old_turns(session: ChatSession) -> None:
+    """예산을 넘긴 오래된 턴을 누적 요약으로 접음 (새 턴만 요약 - 전체 재요약 없음)"""
+    async with session.lock:
+        _, overflow = select_history(session.turns)
+        if overflow == 0:
+            return
+        # 여유를 두고 접어 다음 몇 턴은 요약 없이 진행
+        _, keep_from = select_history(session.turns, int(CHAT_HISTORY_TOKEN_BUDGET * HISTORY_KEEP_RATIO))
+        old_turns = session.turns[:keep_from]
+        transcript = "\n".join(
+            f"{'사용자' if role == 'human' else 'AI'}: {content}" for role, content in old_turns
         )
+        try:
+            summary = await get_summary_chain().ainvoke(
+                {"summary": session.summary or "없음", "transcript": transcript}
+            )
+        except Exception as e:
+            logger.error(f"대화 요약 실패: {e}")
+            # 요약 실패 시 질문만 간단히 남김
+            questions = [content[:80] for role, content in old_turns if role == "human"]
+            summary = " / ".join(filter(None, [session.summary] + questions))[-1000:]
+        session.summary = summary
+        session.turns = session.turns[keep_from:]
+        session.summarized_turns += len(old_turns)
 
+
+async def _prepare_turn(question: str, session: ChatSession) -> Tuple[Dict[str, Any], List[str]]:
+    """프롬프트 입력 구성 (세션 락을 잡은 상태에서 호출)"""
+    fridge_id = session.fridge_id
+
+    # 검색 인덱스에서 질문 관련 재료만 가져오기 (세션 재고 캐시는 재고 변경 시 무효화)
+    retriever = get_qa_retriever()
+    await retriever.ensure_inventory(fridge_id, lambda: load_inventory_rows(fridge_id))
+    session.sync_inventory(retriever.inventory_version(fridge_id))
+    context = await asyncio.to_thread(
+        retriever.retrieve,
+        question,
+        fridge_id,
+        prefer_expiring=any(keyword in question for keyword in EXPIRED_KEYWORDS),
+    )
+    inventory_lines = select_inventory_lines(session, context)
+    history, _ = select_history(session.turns)
+    logger.info(
+        f"QA context: {len(inventory_lines)}/{context.candidates} items, "
+        f"{len(context.knowledge)} docs, {len(history)} history turns"
+    )
+
+    inputs = {
+        "inventory": "\n".join(inventory_lines) if inventory_lines else "냉장고가 비어있습니다.",
+        "knowledge": "\n".join(context.knowledge) if context.knowledge else "없음",
+        "summary": session.summary or "없음",
+        "history": history,
+        "date": datetime.now().strftime("%Y-%m-%d"),
+        "question": question,
+    }
+    return inputs, inventory_lines
+
+
+def _finish_turn(session: ChatSession, question: str, response: str, inventory_lines: List[str]) -> None:
+    """턴 기록 후 오래된 턴은 응답 이후 백그라운드에서 요약"""
+    session.inventory_lines = inventory_lines
+    session.add_turn(question, response)
+
+    if session.session_id and select_history(session.turns)[1] > 0:
+        task = asyncio.create_task(fold_old_turns(session))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+async def answer_user_question(
+    question: str,
+    fridge_id: Optional[str] = None,
+    session: Optional[ChatSession] = None,
+) -> str:
+    """
+    냉장고 재료 데이터를 기반으로 사용자 질문에 답변합니다.
+    전체 재고 대신 질문과 관련된 재료/레시피만 토큰 예산 안에서 프롬프트에 포함하고,
+    세션이 주어지면 최근 대화 + 이전 대화 요약을 함께 전달합니다.
+    """
+    try:
+        if session is None:
+            session = ChatSession(session_id="", fridge_id=fridge_id or DEFAULT_FRIDGE_ID)
+
+        async with session.lock:
+            inputs, inventory_lines = await _prepare_turn(question, session)
+            response = await get_qa_chain().ainvoke(inputs)
+
+        _finish_turn(session, question, response, inventory_lines)
         return response
 
     except Exception as e:
         logger.error(f"QA Failed: {e}")
         return "죄송합니다. 답변을 생성하는 중에 오류가 발생했습니다. (데이터베이스 연결 문제일 수 있습니다)"
+
+
+async def stream_user_answer(
+    question: str,
+    fridge_id: Optional[str] = None,
+    session: Optional[ChatSession] = None,
+) -> AsyncIterator[str]:
+    """
+    `answer_user_question`의 스트리밍 버전 - 생성되는 토큰 조각을 바로 내보냅니다.
+    소비자가 중간에 제너레이터를 닫으면(클라이언트 연결 종료) LLM 스트림도 닫혀
+    더 이상 토큰을 생성하지 않으며, 미완성 답변은 대화 기록에 남기지 않습니다.
+    """
+    if session is None:
+        session = ChatSession(session_id="", fridge_id=fridge_id or DEFAULT_FRIDGE_ID)
+
+    async with session.lock:
+        inputs, inventory_lines = await _prepare_turn(question, session)
+
+        chunks: List[str] = []
+        stream = get_qa_chain().astream(inputs)
+        try:
+            async for chunk in stream:
+                if chunk:
+                    chunks.append(chunk)
+                    yield chunk
+        finally:
+            await stream.aclose()
+
+    _finish_turn(session, question, "".join(chunks), inventory_lines)
@@ -1,42 +1,100 @@
 """Recipe Agent - 레시피 추천"""
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence
 import logging
 import os
 import json
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
 from openai import OpenAI
 from ..core.state import FridgeState
-from ..rag.vector_store import get_vector_store
+from ..rag.vector_store import RecipeFilter, get_vector_store, recipe_id
+from ..rag.ingredient_index import RecipeBitsets, get_matcher
 
 logger = logging.getLogger(__name__)
 
+# 식단 키워드 점수로 재정렬할 후보 수 (조건은 검색 단계에서 이미 적용됨)
+DIET_RERANK_CANDIDATES = 10
+
+# 추천 레시피 수와 인덱스 우선 조회 기준
+# 매칭률 RECIPE_MIN_MATCH_RATE 이상인 인덱스 레시피가 RECIPE_MIN_INDEX_HITS개 이상이면
+# LLM을 호출하지 않고, 부족하면 모자란 만큼만 생성해 인덱스에 다시 저장합니다.
+RECIPE_SUGGESTION_COUNT = 20
+RECIPE_MIN_MATCH_RATE = float(os.getenv("RECIPE_MIN_MATCH_RATE", 0.5))
+RECIPE_MIN_INDEX_HITS = int(os.getenv("RECIPE_MIN_INDEX_HITS", 10))
+
+# 추측 실행: 비전 분류가 끝나기 전에 확실한 재료 일부로 레시피 추천을 미리 시작하고,
+# 전체 재료가 확정되면 그 결과를 다시 채점해 후보에 합칩니다 (두 LLM 지연을 겹침)
+RECIPE_SPECULATION = os.getenv("RECIPE_SPECULATION", "true").lower() in ("1", "true", "yes")
+SPECULATION_MIN_SEED = 3
+SPECULATION_TIMEOUT = float(os.getenv("RECIPE_SPECULATION_TIMEOUT", 30))
+
+# 식단 타입별 검색 조건과 키워드
+DIET_PROFILES = {
+    "diet": {
+        "max_calories": 300,
+        "keywords": ["샐러드", "구운", "저칼로리", "단백질"],
+        "avoid": ["튀김", "기름", "당분"],
+    },
+    "health": {
+        "max_calories": 500,
+        "keywords": ["영양", "균형", "건강", "신선"],
+        "prefer": ["생선", "채소", "잡곡"],
+    },
+    "patient": {
+        "max_calories": 250,
+        "keywords": ["부드러운", "소화", "영양", "죽", "스프"],
+        "avoid": ["매운", "짜다", "기름진"],
+    },
+}
+
+# 레시피 엔진 통계 (인덱스만으로 응답한 횟수, LLM 호출 횟수, 인덱스에 저장한 생성 레시피 수)
+RECIPE_ENGINE_STATS: Counter = Counter()
+
+# 생성 레시피 인덱스 저장 (임베딩 요청이 응답을 늦추지 않도록 백그라운드에서)
+_writeback_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recipe-writeback")
+_pending_writebacks: "set[Future]" = set()
+_writeback_lock = threading.Lock()
+
+_speculation_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="recipe-speculation")
+
 
 def calculate_match_rate(
     recipe_ingredients: List[str], available_ingredients: List[str]
 ) -> float:
-    """레시피 재료와 보유 재료의 매칭률 계산"""
-    if not recipe_ingredients:
-        return 0.0
+    """레시피 재료와 보유 재료의 매칭률 계산 (정규화 후 부분 매칭 허용)"""
+    return get_matcher(tuple(available_ingredients)).match_rate(recipe_ingredients)
+
+
+def score_recipes(
+    recipes: List[Dict[str, Any]], available_ingredients: List[str]
+) -> RecipeBitsets:
+    """후보 레시피 묶음의 match_rate를 비트셋으로 한 번에 계산해 붙이고 비트셋을 반환"""
+    bitsets = RecipeBitsets([r.get("ingredients", []) for r in recipes])
+    for recipe, rate in zip(recipes, bitsets.match_rates(available_ingredients)):
+        recipe["match_rate"] = float(rate)
+    return bitsets
 
-    matched = 0
-    for ingredient in recipe_ingredients:
-        # 부분 매칭 허용
-        for available in available_ingredients:
-            if ingredient in available or available in ingredient:
-                matched += 1
-                break
 
-    return matched / len(recipe_ingredients)
+def diet_filter(diet_type: str | None) -> Optional[RecipeFilter]:
+    """식단 타입 → 검색 조건 (조건이 없는 식단은 None)"""
+    profile = DIET_PROFILES.get(diet_type or "", {})
+    recipe_filter = RecipeFilter(
+        max_calories=profile.get("max_calories"),
+        avoid=profile.get("avoid", []),
+    )
+    return recipe_filter or None
 
 
 def generate_recipes_with_gpt(
     available_ingredients: List[str],
     urgent_items: List[str],
     diet_type: str | None = None,
+    count: int = RECIPE_SUGGESTION_COUNT,
+    exclude_titles: Sequence[str] = (),
 ) -> List[Dict[str, Any]]:
     """GPT-4o-mini로 보유 재료 기반 레시피 동적 생성"""
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
     urgent_note = ""
     if urgent_items:
         urgent_note = (
@@ -54,12 +112,16 @@ def generate_recipes_with_gpt(
     elif diet_type == "general":
         diet_instruction = "\n🍽️ 일반 식단으로 다양하고 맛있는 요리로 구성하세요."
 
+    exclude_note = ""
+    if exclude_titles:
+        exclude_note = f"\n이미 추천된 요리 (제외): {', '.join(exclude_titles)}"
+
     prompt = f"""냉장고에 다음 식재료가 있습니다:
 {", ".join(available_ingredients)}
 {urgent_note}
-{diet_instruction}
+{diet_instruction}{exclude_note}
 
-위 재료를 최대한 활용하여 만들 수 있는 한국 요리 20가지를 추천해주세요.
+위 재료를 최대한 활용하여 만들 수 있는 한국 요리 {count}가지를 추천해주세요.
 유통기한 임박 재료가 있다면 그 재료를 사용하는 레시피를 우선 포함하세요.
 
 각 레시피는 반드시 아래 JSON 형식으로 반환하세요:
@@ -80,11 +142,12 @@ def generate_recipes_with_gpt(
 
 규칙:
 - 보유 재료를 최대한 활용하는 현실적인 레시피
-- 20가지 모두 서로 다른 요리 (국, 찌개, 볶음, 무침, 구이, 샐러드, 죽, 스프, pasta, rice dish 등 다양하게)
+- {count}가지 모두 서로 다른 요리 (국, 찌개, 볶음, 무침, 구이, 샐러드, 죽, 스프, pasta, rice dish 등 다양하게)
 - 매번 다른 창의적인 조합 추천
 - JSON만 반환"""
 
     try:
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         response = client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
@@ -106,8 +169,148 @@ def generate_recipes_with_gpt(
         return []
 
 
+def write_back_recipes(recipes: List[Dict[str, Any]]) -> Optional[Future]:
+    """생성 레시피를 인덱스에 저장 (다음 요청부터 LLM 없이 검색됨)"""
+    from ..rag.ingest import normalize_recipe
+
+    normalized = [r for r in (normalize_recipe(recipe) for recipe in recipes) if r]
+    if not normalized:
+        return None
+
+    def _store():
+        try:
+            get_vector_store().add_recipes(normalized)
+            RECIPE_ENGINE_STATS["written_back"] += len(normalized)
+        except Exception as e:
+            logger.error(f"생성 레시피 인덱스 저장 오류: {e}")
+
+    future = _writeback_executor.submit(_store)
+    with _writeback_lock:
+        _pending_writebacks.add(future)
+    future.add_done_callback(lambda f: _pending_writebacks.discard(f))
+    return future
+
+
+def flush_recipe_writeback(timeout: float | None = None) -> None:
+    """대기 중인 인덱스 저장 완료까지 대기 (테스트/종료 시)"""
+    with _writeback_lock:
+        pending = list(_pending_writebacks)
+    for future in pending:
+        future.result(timeout=timeout)
+
+
+def suggest_recipes(
+    available_ingredients: List[str],
+    urgent_items: List[str],
+    diet_type: str | None = None,
+    count: int = RECIPE_SUGGESTION_COUNT,
+    prefetched: Sequence[Dict[str, Any]] = (),
+    write_back: bool = True,
+) -> List[Dict[str, Any]]:
+    """인덱스 우선 레시피 추천
+
+    1. 레시피 인덱스에서 식단 조건을 만족하는 후보를 검색
+       (prefetched: 추측 실행으로 미리 받은 레시피 - 현재 재료로 다시 채점해 후보에 합침)
+    2. 매칭률 기준을 넘는 후보가 충분하면 그대로 반환 (LLM 호출 없음)
+    3. 부족하면 모자란 수만큼만 gpt-4o-mini로 생성하고 인덱스에 다시 저장
+       (write_back=False면 저장하지 않음 - 추측 실행은 최종 결과에 채택된 것만 저장됨)
+    결과 레시피에는 match_rate(0~1)와 source("index" / "generated")가 붙습니다.
+    """
+    recipe_filter = diet_filter(diet_type)
+
+    try:
+        candidates = get_vector_store().search_recipes(
+            available_ingredients, top_k=count, recipe_filter=recipe_filter
+        )
+    except Exception as e:
+        logger.error(f"레시피 인덱스 검색 오류: {e}")
+        candidates = []
+    for recipe in candidates:
+        recipe["source"] = "index"
+    seen_titles = {r.get("title") for r in candidates}
+    speculated = []  # 추측 실행에서 생성되어 아직 인덱스에 없는 레시피
+    for recipe in prefetched:
+        if recipe.get("title") not in seen_titles and (
+            recipe_filter is None or recipe_filter.matches(recipe)
+        ):
+            seen_titles.add(recipe.get("title"))
+            candidates.append({**recipe, "source": recipe.get("source", "generated")})
+            if candidates[-1]["source"] == "generated":
+                speculated.append(candidates[-1])
+    score_recipes(candidates, available_ingredients)
+
+    def adopt_speculated(recipes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # 최종 결과에 채택된 추측 실행 레시피만 인덱스에 저장
+        adopted = [r for r in recipes if any(r is s for s in speculated)]
+        if adopted and write_back:
+            write_back_recipes(adopted)
+        return recipes
+
+    qualified = [r for r in candidates if r["match_rate"] >= RECIPE_MIN_MATCH_RATE]
+    if len(qualified) >= min(RECIPE_MIN_INDEX_HITS, count):
+        RECIPE_ENGINE_STATS["index_only"] += 1
+        logger.info(f"레시피 인덱스에서 {len(qualified)}개 추천 (LLM 호출 없음)")
+        return adopt_speculated(qualified[:count])
+
+    shortfall = count - len(qualified)
+    logger.info(f"인덱스 후보 {len(qualified)}개 - gpt-4o-mini로 {shortfall}개 생성")
+    generated = generate_recipes_with_gpt(
+        available_ingredients,
+        urgent_items,
+        diet_type,
+        count=shortfall,
+        exclude_titles=[r.get("title", "") for r in qualified],
+    )
+    RECIPE_ENGINE_STATS["llm_calls"] += 1
+    score_recipes(generated, available_ingredients)
+    for recipe in generated:
+        recipe["source"] = "generated"
+    if generated and write_back:
+        write_back_recipes(generated)
+
+    # 생성 레시피는 식단 조건을 지키지 않을 수 있어 인덱스와 같은 조건으로 확인
+    recipes = [
+        r for r in qualified + generated
+        if recipe_filter is None or recipe_filter.matches(r)
+    ]
+    if not recipes:
+        # 생성에 실패하면 기준에 못 미치는 인덱스 후보라도 반환
+        recipes = [r for r in candidates if recipe_filter is None or recipe_filter.matches(r)]
+    return adopt_speculated(recipes[:count])
+
+
+def start_speculative_recipes(
+    seed_ingredients: Sequence[str], diet_type: str | None = None
+) -> Optional[Future]:
+    """확실한 재료 일부로 레시피 추천을 백그라운드에서 미리 시작 (조건 미달이면 None)
+
+    추측으로 생성한 레시피는 인덱스에 저장하지 않고, 최종 추천에 채택될 때 저장됩니다.
+    """
+    seed = list(dict.fromkeys(name for name in seed_ingredients if name))
+    if not RECIPE_SPECULATION or len(seed) < SPECULATION_MIN_SEED:
+        return None
+    RECIPE_ENGINE_STATS["speculations"] += 1
+    logger.info(f"레시피 추측 실행 시작: {seed[:10]}")
+    return _speculation_executor.submit(suggest_recipes, seed, [], diet_type, write_back=False)
+
+
+def collect_speculative_recipes(
+    future: Optional[Future], timeout: float = SPECULATION_TIMEOUT
+) -> List[Dict[str, Any]]:
+    """추측 실행 결과 (없거나 실패/시간 초과면 빈 목록)"""
+    if future is None:
+        return []
+    try:
+        return future.result(timeout=timeout)
+    except Exception as e:
+        # 아직 시작 전이면 실행하지 않음 (실행 중이면 결과만 버림 - 저장하지 않으므로 부작용 없음)
+        future.cancel()
+        logger.warning(f"레시피 추측 실행 결과를 사용하지 않습니다: {e!r}")
+        return []
+
+
 def recipe_agent_node(state: FridgeState) -> FridgeState:
-    """Recipe Agent 노드 - GPT-4o 기반 동적 레시피 추천"""
+    """Recipe Agent 노드 - 레시피 인덱스 우선, 부족분만 GPT-4o-mini로 생성"""
     try:
         logger.info("Recipe Agent 시작")
 
@@ -117,6 +320,10 @@ def recipe_agent_node(state: FridgeState) -> FridgeState:
 
         all_items = detected_items + user_confirmed_items
 
+        # 비전 단계에서 시작한 추측 실행 (Future는 상태에 남기지 않음)
+        speculative = state.get("speculative_recipes")
+        state["speculative_recipes"] = None
+
         if not all_items:
             logger.warning("인식된 식재료가 없습니다")
             state["recipe_suggestions"] = []
@@ -133,39 +340,44 @@ def recipe_agent_node(state: FridgeState) -> FridgeState:
             if item.get("urgency") in ["즉시소비", "3일이내"]
         ]
 
-        # GPT-4o-mini로 보유 재료 기반 레시피 동적 생성
-        logger.info(f"GPT-4o-mini 레시피 생성 중... 재료: {available_ingredients[:10]}")
+        logger.info(f"레시피 추천 중... 재료: {available_ingredients[:10]}")
         diet_type = state.get("diet_type", "general")
-        raw_recipes = generate_recipes_with_gpt(
-            available_ingredients, urgent_items, diet_type
+        prefetched = collect_speculative_recipes(speculative)
+        raw_recipes = suggest_recipes(
+            available_ingredients, urgent_items, diet_type, prefetched=prefetched
         )
 
+        # 매칭률/임박 재료 포함/부족 재료를 후보 전체에 대해 비트 연산으로 계산
+        bitsets = score_recipes(raw_recipes, available_ingredients)
+        uses_urgent_flags = bitsets.uses_any(urgent_items)
+        missing_lists = bitsets.missing(available_ingredients)
+
         recipe_suggestions = []
-        for recipe in raw_recipes:
+        for recipe, uses_urgent, missing in zip(raw_recipes, uses_urgent_flags, missing_lists):
             recipe_ingredients = recipe.get("ingredients", [])
-            match_rate = calculate_match_rate(recipe_ingredients, available_ingredients)
-            uses_urgent = recipe.get("uses_urgent", False) or any(
-                u in recipe_ingredients for u in urgent_items
-            )
+            match_rate = recipe["match_rate"]
+            uses_urgent = bool(recipe.get("uses_urgent", False) or uses_urgent)
             priority_score = match_rate * 100 + (30 if uses_urgent else 0)
+            missing_ingredients = recipe.get("missing_ingredients") or missing
 
             recipe_suggestions.append(
                 {
                     "title": recipe.get("title", ""),
                     "match_rate": round(match_rate, 2),
                     "ingredients_needed": recipe_ingredients,
-                    "missing_ingredients": recipe.get("missing_ingredients", []),
+                    "missing_ingredients": missing_ingredients,
                     "cooking_time": recipe.get("cooking_time", ""),
                     "difficulty": recipe.get("difficulty", "중"),
                     "calories": recipe.get("calories", 0),
                     "description": recipe.get("description", ""),
                     "priority_score": priority_score,
                     "priority_reason": "유통기한 임박 재료 포함" if uses_urgent else "",
+                    "source": recipe.get("source", "generated"),
                 }
             )
 
         recipe_suggestions.sort(key=lambda x: x["priority_score"], reverse=True)
-        recipe_suggestions = recipe_suggestions[:20]
+        recipe_suggestions = recipe_suggestions[:RECIPE_SUGGESTION_COUNT]
 
         state["recipe_suggestions"] = recipe_suggestions
         state["current_step"] = "recipe_completed"
@@ -189,50 +401,25 @@ async def get_recipes_by_diet_type(
         detected_items = detected_items or []
         available_ingredients = [item.get("name", "") for item in detected_items]
 
-        # 식단 타입별 필터링 로직
-        diet_filters = {
-            "diet": {
-                "max_calories": 300,
-                "keywords": ["샐러드", "구운", "저칼로리", "단백질"],
-                "avoid": ["튀김", "기름", "당분"],
-            },
-            "health": {
-                "max_calories": 500,
-                "keywords": ["영양", "균형", "건강", "신선"],
-                "prefer": ["생선", "채소", "잡곡"],
-            },
-            "patient": {
-                "max_calories": 250,
-                "keywords": ["부드러운", "소화", "영양", "죽", "스프"],
-                "avoid": ["매운", "짜다", "기름진"],
-            },
-        }
-
-        filter_config = diet_filters.get(diet_type, {})
+        filter_config = DIET_PROFILES.get(diet_type, {})
+        recipe_filter = diet_filter(diet_type)
 
-        # 벡터 저장소에서 레시피 검색
+        # 벡터 저장소에서 식단 조건을 만족하는 레시피만 검색
         vector_store = get_vector_store()
-        recipes = vector_store.search_recipes(available_ingredients, top_k=20)
+        recipes = vector_store.search_recipes(
+            available_ingredients, top_k=DIET_RERANK_CANDIDATES, recipe_filter=recipe_filter
+        )
+
+        # 검색 결과의 match_rate는 반올림값이라 비트셋으로 한 번에 다시 계산
+        score_recipes(recipes, available_ingredients)
 
-        # 식단 타입별 필터링
+        # 식단 키워드 점수 계산
         filtered_recipes = []
         for recipe in recipes:
-            # 칼로리 체크
             calories = recipe.get("calories", 0)
-            if calories > filter_config.get("max_calories", 1000):
-                continue
-
-            # 키워드 매칭
             title = recipe.get("title", "").lower()
             description = recipe.get("description", "").lower()
 
-            # 회피 키워드 체크
-            avoid_keywords = filter_config.get("avoid", [])
-            if any(
-                keyword in title or keyword in description for keyword in avoid_keywords
-            ):
-                continue
-
             # 선호 키워드 또는 일반 키워드 매칭
             prefer_keywords = filter_config.get("prefer", [])
             keywords = filter_config.get("keywords", [])
@@ -247,13 +434,12 @@ async def get_recipes_by_diet_type(
             if any(keyword in title or keyword in description for keyword in keywords):
                 score += 30
 
-            # 매칭률 계산
             recipe_ingredients = recipe.get("ingredients", [])
-            match_rate = calculate_match_rate(recipe_ingredients, available_ingredients)
+            match_rate = recipe["match_rate"]
 
             filtered_recipes.append(
                 {
-                    "id": recipe.get("id", ""),
+                    "id": recipe.get("id") or recipe_id(recipe),
                     "title": recipe.get("title", ""),
                     "description": recipe.get("description", ""),
                     "cooking_time": recipe.get("cooking_time", ""),
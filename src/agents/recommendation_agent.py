@@ -3,6 +3,7 @@ from typing import Dict, Any, List
 from datetime import datetime, timedelta
 import logging
 from ..core.state import FridgeState
+from ..rag.ingredient_index import RecipeBitsets
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +31,13 @@ def recommendation_agent_node(state: FridgeState) -> FridgeState:
             "안전 재고": safe_count
         }
         
-        # 우선 소비 순서 결정
+        # 우선 소비 순서 결정 (재료별 첫 번째 사용 레시피를 비트셋 AND로 조회)
+        bitsets = RecipeBitsets([r.get("ingredients_needed", []) for r in recipe_suggestions])
+
+        def first_recipe_using(item_name: str) -> Dict[str, Any] | None:
+            rows = bitsets.uses_any([item_name]).nonzero()[0]
+            return recipe_suggestions[rows[0]] if len(rows) else None
+
         priority_actions = []
         for item in expiry_data:
             urgency = item.get("urgency", "")
@@ -38,11 +45,7 @@ def recommendation_agent_node(state: FridgeState) -> FridgeState:
             
             if urgency == "즉시소비":
                 # 해당 재료를 사용하는 레시피 찾기
-                matching_recipe = None
-                for recipe in recipe_suggestions:
-                    if item_name in recipe.get("ingredients_needed", []):
-                        matching_recipe = recipe
-                        break
+                matching_recipe = first_recipe_using(item_name)
                 
                 if matching_recipe:
                     priority_actions.append(
@@ -52,11 +55,7 @@ def recommendation_agent_node(state: FridgeState) -> FridgeState:
                     priority_actions.append(f"🚨 오늘 꼭 소비: {item_name}")
             
             elif urgency == "3일이내":
-                matching_recipe = None
-                for recipe in recipe_suggestions:
-                    if item_name in recipe.get("ingredients_needed", []):
-                        matching_recipe = recipe
-                        break
+                matching_recipe = first_recipe_using(item_name)
                 
                 if matching_recipe:
                     priority_actions.append(
@@ -1,18 +1,109 @@
 """Vision Agent - YOLO v8 + GPT-4o 하이브리드 식재료 인식"""
 
 import os
+import io
+import math
 import base64
-import json
-import re
 import logging
+from collections import Counter
 from typing import List, Dict, Any, Optional, Tuple
 
+import numpy as np
 from openai import OpenAI
-from PIL import Image
+from PIL import Image, ImageDraw, ImageOps
 from ..core.state import FridgeState
+from ..core.crop_cache import CropSignature, get_crop_cache, residual_cells
+from ..core.inventory_engine import get_inventory_engine
+from ..core.structured_output import strict_object, structured_completion
+from ..rag.ingredient_normalizer import annotate_ingredient_ids, get_resolver
+from .recipe_agent import start_speculative_recipes
 
 logger = logging.getLogger(__name__)
 
+# GPT-4o 식재료 응답 스키마 (출력 토큰을 줄이기 위해 한 글자 키, 파싱 후 원래 필드명으로)
+VISION_ITEM_FIELDS = {
+    "n": "name",
+    "c": "category",
+    "q": "quantity",
+    "u": "unit",
+    "f": "freshness",
+    "p": "packaging",
+    "s": "confidence",
+    "b": "bbox_2d",
+    "e": "expiry_date_text",
+}
+VISION_FIELDS = {"i": ("items", VISION_ITEM_FIELDS)}
+VISION_SCHEMA = strict_object({
+    "i": {
+        "type": "array",
+        "items": strict_object({
+            "n": {"type": "string"},
+            "c": {"type": "string", "enum": ["채소", "육류", "유제품", "과일", "기타"]},
+            "q": {"type": "number"},
+            "u": {"type": "string"},
+            "f": {"type": "string", "enum": ["좋음", "보통", "나쁨"]},
+            "p": {"type": "string"},
+            "s": {"type": "number"},
+            "b": {"type": "array", "items": {"type": "integer"}},
+            "e": {"type": ["string", "null"]},
+        }),
+    },
+})
+
+# 레시피 추측 실행 시드로 쓰는 YOLO(COCO) 식품 클래스와 최소 신뢰도
+YOLO_FOOD_CLASSES = {
+    "banana": "바나나",
+    "apple": "사과",
+    "orange": "오렌지",
+    "broccoli": "브로콜리",
+    "carrot": "당근",
+    "hot dog": "소시지",
+}
+SPECULATION_MIN_YOLO_CONF = 0.5
+
+# 2단계 비전: YOLO 박스를 로컬(YOLO 클래스)/저가 모델로 먼저 분류하고, GPT-4o에는
+# 신뢰도가 낮은 박스와 박스가 덮지 못한 나머지 영역만 한 번에 보냄
+VISION_TIERED = os.getenv("VISION_TIERED", "true").lower() in ("1", "true", "yes")
+VISION_TIER1_MODEL = os.getenv("VISION_TIER1_MODEL", "gpt-4o-mini")  # 빈 값이면 로컬 분류만
+VISION_CROP_CONFIDENCE = float(os.getenv("VISION_CROP_CONFIDENCE", 0.7))
+VISION_RESIDUAL_MIN_AREA = float(os.getenv("VISION_RESIDUAL_MIN_AREA", 0.2))
+VISION_CROP_PADDING = 0.1
+VISION_CROP_MAX_SIDE = 512
+VISION_RESIDUAL_MAX_SIDE = 512
+VISION_RESIDUAL_MASK_MARGIN = 0.01  # 긴 변 대비
+
+# 재료 분류 → 비전 응답 카테고리
+VISION_CATEGORIES = {"채소": "채소", "과일": "과일", "육류": "육류", "유제품": "유제품"}
+
+# 단계별 누적 지표 (로컬/저가 모델/GPT-4o로 분류한 박스 수, GPT-4o 이미지 토큰과 절감량)
+VISION_TIER_STATS: Counter = Counter()
+
+# 박스 단위 응답 스키마 (k: 박스 번호, 나머지 영역에서 찾은 항목은 -1)
+CROP_ITEM_FIELDS = {"k": "crop", **VISION_ITEM_FIELDS}
+CROP_FIELDS = {"i": ("items", CROP_ITEM_FIELDS)}
+CROP_SCHEMA = strict_object({
+    "i": {
+        "type": "array",
+        "items": strict_object({
+            "k": {"type": "integer"},
+            **VISION_SCHEMA["properties"]["i"]["items"]["properties"],
+        }),
+    },
+})
+
+# 타일 탐지: 고해상도 사진은 겹치는 타일로 나눠 한 번의 배치 호출로 탐지한 뒤
+# 타일 경계에서 잘리거나 중복된 박스를 0-1000 좌표에서 합침 (auto: 긴 변 기준으로 자동)
+YOLO_TILING = os.getenv("YOLO_TILING", "auto").lower()
+YOLO_TILE_SIZE = int(os.getenv("YOLO_TILE_SIZE", 640))  # yolov8 입력 크기
+YOLO_TILE_OVERLAP = float(os.getenv("YOLO_TILE_OVERLAP", 0.2))
+YOLO_MAX_TILES = int(os.getenv("YOLO_MAX_TILES", 12))
+YOLO_TILING_MIN_SIDE = 2 * YOLO_TILE_SIZE  # auto 모드에서 타일을 쓰기 시작하는 긴 변
+TILE_MERGE_IOU = 0.5
+TILE_MERGE_IOS = 0.6  # 타일 경계에 걸린 박스는 작은 박스 기준 겹침 비율로 합침
+
+# YOLO가 이만큼 찾으면 GPT-4o에 추가 탐색 개수를 강요하지 않음
+VISION_MIN_ITEMS = 15
+
 # YOLO 모델 싱글톤 (최초 1회만 로드)
 _yolo_model = None
 
@@ -33,6 +124,12 @@ def _get_yolo_model():
     return _yolo_model
 
 
+def load_image(image_path: str) -> Image.Image:
+    """EXIF 회전을 적용한 RGB 이미지 (YOLO bbox와 같은 방향 - 모든 자르기/마스크는 이 이미지 기준)"""
+    with Image.open(image_path) as image:
+        return ImageOps.exif_transpose(image).convert("RGB")
+
+
 def encode_image(image_path: str) -> str:
     """이미지를 base64로 인코딩"""
     with open(image_path, "rb") as image_file:
@@ -78,47 +175,148 @@ def find_best_yolo_match(
     return best_idx
 
 
-def detect_with_yolo(image_path: str) -> List[Dict[str, Any]]:
-    """YOLO v8으로 객체 탐지 - 정확한 픽셀 bbox 반환"""
-    model = _get_yolo_model()
-    if model is None:
-        logger.warning("YOLO 모델 없음 - GPT-4o만 사용")
-        return []
+def overlap_ratio(bbox1: List[float], bbox2: List[float]) -> float:
+    """교집합 / 작은 박스 면적 (0-1000 스케일, [ymin, xmin, ymax, xmax])"""
+    y_min, x_min = max(bbox1[0], bbox2[0]), max(bbox1[1], bbox2[1])
+    y_max, x_max = min(bbox1[2], bbox2[2]), min(bbox1[3], bbox2[3])
+    intersection = max(0, y_max - y_min) * max(0, x_max - x_min)
+    smaller = min(
+        (bbox1[2] - bbox1[0]) * (bbox1[3] - bbox1[1]),
+        (bbox2[2] - bbox2[0]) * (bbox2[3] - bbox2[1]),
+    )
+    return intersection / smaller if smaller > 0 else 0.0
+
+
+def _tile_starts(length: int, tile: int, n: int) -> List[int]:
+    if n == 1:
+        return [0]
+    step = (length - tile) / (n - 1)
+    return [round(i * step) for i in range(n)]
+
+
+def tile_grid(
+    width: int,
+    height: int,
+    tile_size: int = YOLO_TILE_SIZE,
+    overlap: float = YOLO_TILE_OVERLAP,
+    max_tiles: int = YOLO_MAX_TILES,
+) -> List[Tuple[int, int, int, int]]:
+    """겹치는 타일 (left, top, right, bottom) 목록
+
+    타일 수는 해상도에 따라 정해지며, max_tiles를 넘으면 타일을 키워 개수를 줄입니다.
+    타일이 하나뿐이면 전체 이미지 하나를 반환합니다.
+    """
+    tile = tile_size
+    while True:
+        side_w, side_h = min(tile, width), min(tile, height)
+        n_x = max(1, math.ceil((width - overlap * side_w) / ((1 - overlap) * side_w)))
+        n_y = max(1, math.ceil((height - overlap * side_h) / ((1 - overlap) * side_h)))
+        if n_x * n_y <= max_tiles:
+            break
+        tile = int(tile * 1.25)
+    return [
+        (left, top, left + side_w, top + side_h)
+        for top in _tile_starts(height, side_h, n_y)
+        for left in _tile_starts(width, side_w, n_x)
+    ]
 
-    try:
-        results = model(image_path, conf=0.1, iou=0.45, verbose=False)
-        detections = []
 
-        for result in results:
-            h, w = result.orig_shape[0], result.orig_shape[1]
+def use_tiling(width: int, height: int, mode: str = YOLO_TILING) -> bool:
+    if mode in ("1", "true", "yes", "on"):
+        return True
+    if mode == "auto":
+        return max(width, height) >= YOLO_TILING_MIN_SIDE
+    return False
 
-            for box in result.boxes:
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
 
+def merge_tile_detections(detections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """타일/전체 이미지 탐지 통합 (같은 클래스끼리, 신뢰도 높은 박스 우선)
+
+    IoU가 높은 중복은 하나만 남기고, 타일 경계에서 잘린 박스는 작은 박스 기준 겹침
+    비율로 이어 붙여 두 박스를 감싸는 박스로 만듭니다.
+    """
+    kept: List[Dict[str, Any]] = []
+    for detection in sorted(detections, key=lambda d: -d["yolo_conf"]):
+        for other in kept:
+            if other["yolo_class"] != detection["yolo_class"]:
+                continue
+            a, b = other["bbox_2d"], detection["bbox_2d"]
+            cut = other["tile_edge"] or detection["tile_edge"]
+            if calculate_iou(a, b) >= TILE_MERGE_IOU or (cut and overlap_ratio(a, b) >= TILE_MERGE_IOS):
+                if cut:
+                    other["bbox_2d"] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    other["tile_edge"] = other["tile_edge"] and detection["tile_edge"]
+                break
+        else:
+            kept.append(dict(detection))
+    for detection in kept:
+        del detection["tile_edge"]
+    return kept
+
+
+def _tile_detections(result, tile: Tuple[int, int, int, int], width: int, height: int) -> List[Dict[str, Any]]:
+    """타일 결과 → 전체 이미지 0-1000 좌표 탐지 (타일 안쪽 경계에 닿은 박스는 tile_edge)"""
+    left, top, right, bottom = tile
+    edge = 2  # 픽셀
+    detections = []
+    for box in result.boxes:
+        x1, y1, x2, y2 = box.xyxy[0].tolist()
+        x1, y1, x2, y2 = x1 + left, y1 + top, x2 + left, y2 + top
+        tile_edge = (
+            (left > 0 and x1 <= left + edge)
+            or (top > 0 and y1 <= top + edge)
+            or (right < width and x2 >= right - edge)
+            or (bottom < height and y2 >= bottom - edge)
+        )
+        detections.append(
+            {
                 # 픽셀 좌표 → 0-1000 스케일 변환
-                bbox_2d = [
-                    round(y1 / h * 1000),  # ymin
-                    round(x1 / w * 1000),  # xmin
-                    round(y2 / h * 1000),  # ymax
-                    round(x2 / w * 1000),  # xmax
-                ]
-
-                class_name = result.names[int(box.cls[0])]
-                confidence = float(box.conf[0])
-
-                detections.append(
-                    {
-                        "bbox_2d": bbox_2d,
-                        "yolo_class": class_name,
-                        "yolo_conf": confidence,
-                    }
-                )
+                "bbox_2d": [
+                    round(y1 / height * 1000),  # ymin
+                    round(x1 / width * 1000),  # xmin
+                    round(y2 / height * 1000),  # ymax
+                    round(x2 / width * 1000),  # xmax
+                ],
+                "yolo_class": result.names[int(box.cls[0])],
+                "yolo_conf": float(box.conf[0]),
+                "tile_edge": tile_edge,
+            }
+        )
+    return detections
 
-                logger.info(
-                    f"  🎯 YOLO 탐지: {class_name} (conf={confidence:.2f}) → bbox{bbox_2d}"
-                )
 
-        logger.info(f"✅ YOLO 탐지 완료: {len(detections)}개 객체")
+def detect_with_yolo(image_path: str, tiling: str = YOLO_TILING) -> List[Dict[str, Any]]:
+    """YOLO v8으로 객체 탐지 - 정확한 픽셀 bbox 반환
+
+    고해상도 사진은 전체 이미지와 겹치는 타일을 한 번의 배치 호출로 탐지해 작은 물체를
+    놓치지 않도록 하고, 타일 사이 중복/잘린 박스는 merge_tile_detections로 합칩니다.
+    """
+    model = _get_yolo_model()
+    if model is None:
+        logger.warning("YOLO 모델 없음 - GPT-4o만 사용")
+        return []
+
+    try:
+        image = load_image(image_path)
+        width, height = image.size
+        tiles = [(0, 0, width, height)]
+        if use_tiling(width, height, tiling):
+            tiles += [t for t in tile_grid(width, height) if t != tiles[0]]
+
+        results = model([image.crop(t) for t in tiles], conf=0.1, iou=0.45, verbose=False)
+        detections = []
+        for tile, result in zip(tiles, results):
+            detections.extend(_tile_detections(result, tile, width, height))
+        raw_count = len(detections)
+        detections = merge_tile_detections(detections)
+
+        for detection in detections:
+            logger.info(
+                f"  🎯 YOLO 탐지: {detection['yolo_class']} (conf={detection['yolo_conf']:.2f}) → bbox{detection['bbox_2d']}"
+            )
+        logger.info(
+            f"✅ YOLO 탐지 완료: {len(detections)}개 객체 (타일 {len(tiles)}개, 통합 전 {raw_count}개)"
+        )
         return detections
 
     except Exception as e:
@@ -168,23 +366,29 @@ YOLO가 탐지하지 못한 추가 식재료도 찾아서 bbox_2d와 함께 포
 - 예: 이미지 오른쪽 하단에 있는 우유팩 → [650, 700, 950, 900]
 - 여러 식재료가 각자 다른 위치에 있으면 bbox도 모두 달라야 함
 
-**각 식재료 정보:**
-- name: 식재료 이름 (한국어)
-- category: 채소/육류/유제품/과일/기타
-- quantity: 수량 (숫자)
-- unit: 개/g/ml/봉지/병/팩 등
-- freshness: 좋음/보통/나쁨
-- packaging: 포장 상태
-- confidence: 0.0~1.0 (확실할수록 1.0에 가깝게, 불확실하면 0.5이상)
-- bbox_2d: [ymin, xmin, ymax, xmax] (해당 식재료 객체를 감싸는 박스, 0-1000 스케일)
-- expiry_date_text: 유통기한 텍스트 (없으면 null)
+**각 식재료 정보 (응답 키):**
+- n: 식재료 이름 (한국어)
+- c: 채소/육류/유제품/과일/기타
+- q: 수량 (숫자)
+- u: 개/g/ml/봉지/병/팩 등
+- f: 신선도 좋음/보통/나쁨
+- p: 포장 상태
+- s: confidence 0.0~1.0 (확실할수록 1.0에 가깝게, 불확실하면 0.5이상)
+- b: bbox_2d [ymin, xmin, ymax, xmax] (해당 식재료 객체를 감싸는 박스, 0-1000 스케일)
+- e: 유통기한 텍스트 (없으면 null)
 
 **중요: confidence는 반드시 0.3 이상으로 설정하세요. 확실하지 않은 항목도 0.3으로 설정하고 포함시키세요.**
 **확실한 식재료는 0.8~1.0, 덜 확실한 것도 0.3~0.7로 설정하여 모두 포함시키세요.**
 
-JSON만 반환하세요: {{"items": [...]}}"""
+JSON만 반환하세요: {{"i": [...]}}"""
+
+    if len(yolo_detections) >= VISION_MIN_ITEMS:
+        # 타일 탐지로 위치가 충분히 잡혔으면 개수 목표 대신 YOLO 위치 분류에 집중
+        detection_goal = "YOLO 탐지 위치를 모두 분류하고, 그 밖에 실제로 보이는 식재료만 추가"
+    else:
+        detection_goal = f"반드시 {VISION_MIN_ITEMS}개 이상 (냉장고에 있는 모든食品)"
 
-    user_prompt = """이미지의 모든 식재료를 분석하여 JSON으로 반환하세요.
+    user_prompt = f"""이미지의 모든 식재료를 분석하여 JSON으로 반환하세요.
 
 **매우 중요 - 모든 식재료를 빠짐없이 감지:**
 - 냉장고/냉동고에 있는 모든 식재료를 하나도 빠뜨리지 마세요
@@ -200,11 +404,15 @@ JSON만 반환하세요: {{"items": [...]}}"""
 - 각 식재료마다 bbox가 실제 위치에 따라 모두 달라야 함
 
 **감지 목표:**
-- 반드시 15개 이상 (냉장고에 있는 모든食品)
+- {detection_goal}
 - confidence: 확실한 것은 0.8~1.0, 덜 확실해도 0.3~0.7로 설정하고 포함"""
 
     try:
-        response = client.chat.completions.create(
+        result, complete = structured_completion(
+            client,
+            "vision_classify",
+            VISION_SCHEMA,
+            VISION_FIELDS,
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -225,19 +433,14 @@ JSON만 반환하세요: {{"items": [...]}}"""
             temperature=0.1,
         )
 
-        content = response.choices[0].message.content
-        logger.info(f"GPT-4o 응답 (앞 300자): {content[:300]}...")
-
-        # JSON 추출
-        json_match = re.search(r"\{.*\}", content, re.DOTALL)
-        if json_match:
-            result = json.loads(json_match.group())
-            items = result.get("items", [])
-            logger.info(f"✅ GPT-4o 분류 완료: {len(items)}개 항목")
-            return items
-        else:
-            logger.warning("GPT-4o 응답에서 JSON을 찾지 못했습니다")
+        if not isinstance(result, dict):
+            logger.warning("GPT-4o 응답을 JSON으로 파싱하지 못했습니다")
             return []
+        items = [item for item in result.get("items", []) if isinstance(item, dict)]
+        if not complete:
+            logger.warning(f"GPT-4o 응답이 잘려 완성된 {len(items)}개 항목만 사용합니다")
+        logger.info(f"✅ GPT-4o 분류 완료: {len(items)}개 항목")
+        return items
 
     except Exception as e:
         logger.error(f"GPT-4o 분류 오류: {e}")
@@ -323,6 +526,332 @@ def validate_bbox(bbox) -> bool:
         return False
 
 
+def gpt4o_image_tokens(width: int, height: int, detail: str = "high") -> int:
+    """GPT-4o 이미지 입력 토큰 (2048 안으로 축소 → 짧은 변 768 → 512 타일당 170 + 85)"""
+    if detail == "low":
+        return 85
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def _to_pixels(bbox_2d: List[float], width: int, height: int, padding: float = 0.0) -> Tuple[int, int, int, int]:
+    """0-1000 [ymin, xmin, ymax, xmax] → 픽셀 (left, top, right, bottom), 여백 포함"""
+    ymin, xmin, ymax, xmax = bbox_2d
+    pad_y, pad_x = (ymax - ymin) * padding, (xmax - xmin) * padding
+    return (
+        max(0, int((xmin - pad_x) / 1000 * width)),
+        max(0, int((ymin - pad_y) / 1000 * height)),
+        min(width, math.ceil((xmax + pad_x) / 1000 * width)),
+        min(height, math.ceil((ymax + pad_y) / 1000 * height)),
+    )
+
+
+def _shrink(image: Image.Image, max_side: int) -> Image.Image:
+    image = image.convert("RGB")
+    image.thumbnail((max_side, max_side))
+    return image
+
+
+def encode_pil_image(image: Image.Image) -> str:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+def coverage_fraction(bboxes: List[List[float]], grid: int = 100) -> float:
+    """0-1000 박스들이 덮는 이미지 면적 비율 (격자 근사)"""
+    covered = np.zeros((grid, grid), dtype=bool)
+    for ymin, xmin, ymax, xmax in bboxes:
+        covered[
+            int(ymin * grid / 1000):math.ceil(ymax * grid / 1000),
+            int(xmin * grid / 1000):math.ceil(xmax * grid / 1000),
+        ] = True
+    return float(covered.mean())
+
+
+def residual_image(image: Image.Image, bboxes: List[List[float]], max_side: int = VISION_RESIDUAL_MAX_SIDE) -> Image.Image:
+    """이미 분류한 박스를 회색으로 가린 축소 이미지 (좌표 비율은 원본과 동일)"""
+    masked = image.convert("RGB")
+    draw = ImageDraw.Draw(masked)
+    # 박스 경계의 그림자/JPEG 번짐이 나머지 영역 캐시 비교에 섞이지 않도록 조금 넓게 가림
+    margin = round(max(masked.size) * VISION_RESIDUAL_MASK_MARGIN)
+    for bbox in bboxes:
+        left, top, right, bottom = _to_pixels(bbox, *masked.size)
+        draw.rectangle((left - margin, top - margin, right + margin, bottom + margin), fill=(128, 128, 128))
+    return _shrink(masked, max_side)
+
+
+def local_label(detection: Dict[str, Any]) -> Optional[str]:
+    """YOLO 클래스만으로 이름을 정할 수 있는 식재료 (COCO 식품 클래스 또는 표준 재료명)"""
+    yolo_class = detection["yolo_class"]
+    if yolo_class in YOLO_FOOD_CLASSES:
+        return YOLO_FOOD_CLASSES[yolo_class]
+    match = get_resolver().match(yolo_class)
+    return match.name if match and match.kind == "exact" else None
+
+
+def _crop_item(detection: Dict[str, Any], tier: str, **fields: Any) -> Dict[str, Any]:
+    return {
+        "name": fields.get("name") or detection["yolo_class"],
+        "category": fields.get("category", "기타"),
+        "quantity": fields.get("quantity", 1),
+        "unit": fields.get("unit", "개"),
+        "freshness": fields.get("freshness", "보통"),
+        "packaging": fields.get("packaging", "없음"),
+        "confidence": fields.get("confidence", detection["yolo_conf"]),
+        "bbox_2d": detection["bbox_2d"],
+        "expiry_date_text": fields.get("expiry_date_text"),
+        "vision_tier": tier,
+    }
+
+
+def _crop_messages(crops: List[Image.Image], detail: str) -> List[Dict[str, Any]]:
+    content: List[Dict[str, Any]] = []
+    for k, crop in enumerate(crops):
+        content.append({"type": "text", "text": f"박스 {k}"})
+        content.append({
+            "type": "image_url",
+            "image_url": {"url": f"data:image/jpeg;base64,{encode_pil_image(crop)}", "detail": detail},
+        })
+    return content
+
+
+CROP_FIELD_GUIDE = """각 항목 키: k 박스 번호, n 식재료 이름(한국어, 구체적으로), c 채소/육류/유제품/과일/기타,
+q 수량, u 단위, f 신선도 좋음/보통/나쁨, p 포장 상태, s 확신도 0.0~1.0, b bbox_2d, e 유통기한 텍스트(없으면 null).
+식재료가 아닌 물건(냉장고, 선반, 용기, 그릇, 비닐 등)은 제외하세요."""
+
+
+def classify_crops_cheap(crops: List[Image.Image]) -> Tuple[List[Optional[Dict[str, Any]]], bool]:
+    """저가 모델로 박스 이미지 일괄 분류 → (박스별 항목, 완전한 응답 여부)
+
+    완전한 응답에서 빠진 박스(None)는 모델이 식재료가 아니라고 판단한 것이고,
+    호출 실패/잘린 응답이면 False를 반환해 빠진 박스를 모두 불확실로 다룹니다.
+    """
+    labels: List[Optional[Dict[str, Any]]] = [None] * len(crops)
+    if not crops or not VISION_TIER1_MODEL:
+        return labels, False
+    try:
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        result, complete = structured_completion(
+            client,
+            "vision_tier1",
+            CROP_SCHEMA,
+            CROP_FIELDS,
+            model=VISION_TIER1_MODEL,
+            messages=[
+                {
+                    "role": "system",
+                    "content": f"냉장고 사진에서 잘라낸 박스 이미지마다 식재료 하나를 분류하세요.\n{CROP_FIELD_GUIDE}\nb는 [0, 0, 1000, 1000]으로 두세요.",
+                },
+                {"role": "user", "content": _crop_messages(crops, "low")},
+            ],
+            max_tokens=80 * len(crops) + 50,
+            temperature=0.1,
+        )
+    except Exception as e:
+        logger.error(f"저가 모델 분류 오류 - 모든 박스를 GPT-4o로 넘깁니다: {e}")
+        return labels, False
+    for item in (result or {}).get("items", []):
+        k = item.get("crop")
+        if isinstance(k, int) and 0 <= k < len(crops) and item.get("name"):
+            labels[k] = item
+    return labels, result is not None and complete
+
+
+def classify_residual_gpt4o(
+    crops: List[Image.Image], residual: Optional[Image.Image], yolo_detections: List[Dict]
+) -> Optional[List[Dict[str, Any]]]:
+    """GPT-4o 한 번 호출로 불확실한 박스와 나머지 영역을 분류 (항목의 crop: 박스 번호 또는 -1)
+
+    호출에 실패하면 None을 반환합니다.
+    """
+    content = _crop_messages(crops, "high")
+    if residual is not None:
+        content.append({"type": "text", "text": "나머지 영역 (회색은 이미 분류한 부분)"})
+        content.append({
+            "type": "image_url",
+            "image_url": {"url": f"data:image/jpeg;base64,{encode_pil_image(residual)}", "detail": "high"},
+        })
+    hints = "\n".join(f"  - 박스 {k}: YOLO 클래스 {d['yolo_class']}" for k, d in enumerate(yolo_detections))
+    try:
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        result, complete = structured_completion(
+            client,
+            "vision_tier2",
+            CROP_SCHEMA,
+            CROP_FIELDS,
+            model="gpt-4o",
+            messages=[
+                {
+                    "role": "system",
+                    "content": f"""당신은 최고 수준의 식재료 인식 전문가입니다.
+박스 이미지마다 식재료 하나를 분류하고(k = 박스 번호, b는 [0, 0, 1000, 1000]),
+나머지 영역 이미지에서는 회색이 아닌 곳의 식재료를 모두 찾아 k = -1과
+나머지 영역 이미지 기준 bbox_2d [ymin, xmin, ymax, xmax] (0-1000)로 반환하세요.
+{hints}
+{CROP_FIELD_GUIDE}""",
+                },
+                {"role": "user", "content": content},
+            ],
+            max_tokens=2500,
+            temperature=0.1,
+        )
+    except Exception as e:
+        logger.error(f"GPT-4o 2단계 분류 오류: {e}")
+        return None
+    if not complete:
+        logger.warning("GPT-4o 2단계 응답이 잘려 완성된 항목만 사용합니다")
+    return [item for item in (result or {}).get("items", []) if isinstance(item, dict)]
+
+
+def classify_tiered(
+    image_path: str, yolo_detections: List[Dict], fridge_id: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """2단계 분류 → (merge_results에 넘길 항목, 요청 지표)
+
+    0단계: fridge_id가 있으면 이전 스캔과 같은 박스 이미지(지각 해시)의 분류를 재사용합니다.
+    1단계: YOLO 클래스로 이름이 정해지는 박스는 로컬에서, 나머지는 저가 모델이 박스
+           이미지를 저해상도로 일괄 분류합니다.
+    2단계: 확신도가 VISION_CROP_CONFIDENCE 미만인 박스와, 분류된 박스가 덮지 못한 면적이
+           VISION_RESIDUAL_MIN_AREA 이상이면 그 나머지 영역을 GPT-4o 한 번으로 보냅니다.
+    예상 GPT-4o 이미지 토큰이 전체 이미지 한 장보다 많으면 기존 전체 이미지 분류를 씁니다.
+    """
+    image = load_image(image_path)
+    width, height = image.size
+    baseline = gpt4o_image_tokens(width, height)
+    stats = Counter(dict.fromkeys(
+        ("cached", "local", "cheap", "non_food", "gpt4o_crops", "residual", "residual_cached", "tier2_failed",
+         "gpt4o_calls", "gpt4o_image_tokens"), 0
+    ))
+    stats["baseline_image_tokens"] = baseline
+
+    items: List[Dict[str, Any]] = []
+    pending: List[int] = []
+    for idx, detection in enumerate(yolo_detections):
+        name = local_label(detection)
+        if name and detection["yolo_conf"] >= VISION_CROP_CONFIDENCE:
+            category = VISION_CATEGORIES.get(get_resolver().category(get_resolver().resolve(name)), "기타")
+            items.append(_crop_item(detection, "local", name=name, category=category))
+            stats["local"] += 1
+        else:
+            pending.append(idx)
+
+    crops = {
+        idx: _shrink(image.crop(_to_pixels(yolo_detections[idx]["bbox_2d"], width, height, VISION_CROP_PADDING)), VISION_CROP_MAX_SIDE)
+        for idx in pending
+    }
+
+    cache = get_crop_cache() if fridge_id else None
+    signatures = {idx: CropSignature.of(crop) for idx, crop in crops.items()} if cache is not None else {}
+
+    def remember(idx: int, item: Dict[str, Any]) -> None:
+        if cache is not None:
+            cache.store(fridge_id, signatures[idx], yolo_detections[idx]["yolo_class"], item)
+
+    if cache is not None:
+        misses = []
+        for idx in pending:
+            cached = cache.lookup(fridge_id, signatures[idx], yolo_detections[idx]["yolo_class"])
+            if cached:
+                items.append(_crop_item(yolo_detections[idx], "cache", **cached))
+                stats["cached"] += 1
+            else:
+                misses.append(idx)
+        pending = misses
+
+    uncertain: List[int] = []
+    non_food: List[List[float]] = []
+    cheap_labels, cheap_complete = classify_crops_cheap([crops[idx] for idx in pending]) if pending else ([], False)
+    for idx, label in zip(pending, cheap_labels):
+        if label and float(label.get("confidence") or 0) >= VISION_CROP_CONFIDENCE:
+            item = _crop_item(yolo_detections[idx], "cheap", **{k: v for k, v in label.items() if k != "bbox_2d"})
+            items.append(item)
+            remember(idx, item)
+            stats["cheap"] += 1
+        elif label is None and cheap_complete:
+            # 완전한 응답에서 빠진 박스는 식재료가 아닌 것으로 확정 (GPT-4o로 보내지 않음)
+            non_food.append(yolo_detections[idx]["bbox_2d"])
+            stats["non_food"] += 1
+        else:
+            uncertain.append(idx)
+
+    # 식재료가 아닌 것으로 확정된 박스도 이미 본 영역으로 취급
+    classified = [item["bbox_2d"] for item in items] + non_food
+    residual = residual_grid = None
+    if 1.0 - coverage_fraction(classified) >= VISION_RESIDUAL_MIN_AREA:
+        residual = residual_image(image, classified)
+        if cache is not None:
+            # 박스 밖 영역이 이전 스캔과 같으면 그때 찾은 항목을 그대로 사용
+            residual_grid = residual_cells(residual)
+            cached_residual = cache.lookup_residual(fridge_id, residual_grid)
+            if cached_residual is not None:
+                items.extend({**item, "vision_tier": "cache"} for item in cached_residual)
+                stats["residual_cached"] = 1
+                residual = residual_grid = None
+
+    tier2_tokens = sum(gpt4o_image_tokens(*crops[idx].size) for idx in uncertain)
+    if residual is not None:
+        tier2_tokens += gpt4o_image_tokens(*residual.size)
+
+    if tier2_tokens >= baseline:
+        # 나눠 보내는 편이 더 비싸면 전체 이미지 한 장으로 분류
+        stats.update(fallback_full=1, gpt4o_calls=1, gpt4o_image_tokens=baseline)
+        full_items = classify_with_gpt(encode_image(image_path), yolo_detections)
+        if not full_items:
+            # 전체 분류가 실패하면(빈 결과) 이미 분류한 항목을 유지
+            stats["tier2_failed"] = 1
+        else:
+            items = full_items
+            if cache is not None:
+                # 다음 스캔을 위해 YOLO 박스에 매칭된 분류만 캐시
+                unmatched = [idx for idx in range(len(yolo_detections)) if idx in signatures]
+                for item in items:
+                    best = find_best_yolo_match(item.get("bbox_2d"), [yolo_detections[idx] for idx in unmatched])
+                    if best is not None:
+                        remember(unmatched.pop(best), item)
+    elif uncertain or residual is not None:
+        stats.update(gpt4o_calls=1, gpt4o_image_tokens=tier2_tokens, gpt4o_crops=len(uncertain), residual=residual is not None)
+        residual_items = []
+        tier2_items = classify_residual_gpt4o([crops[idx] for idx in uncertain], residual, [yolo_detections[idx] for idx in uncertain])
+        if tier2_items is None:
+            # 이미 분류한 항목은 유지 (남은 박스는 merge_results에서 YOLO 클래스로 추가됨)
+            stats["tier2_failed"] = 1
+            tier2_items = []
+        for item in tier2_items:
+            k = item.pop("crop", -1)
+            if isinstance(k, int) and 0 <= k < len(uncertain):
+                crop_item = _crop_item(yolo_detections[uncertain[k]], "gpt-4o", **{f: v for f, v in item.items() if f != "bbox_2d"})
+                items.append(crop_item)
+                remember(uncertain[k], crop_item)
+            elif validate_bbox(item.get("bbox_2d")):
+                item["vision_tier"] = "gpt-4o"
+                items.append(item)
+                residual_items.append(item)
+        if residual_grid is not None and not stats["tier2_failed"]:
+            cache.store_residual(fridge_id, residual_grid, residual_items)
+
+    stats["image_tokens_saved"] = baseline - stats["gpt4o_image_tokens"]
+    VISION_TIER_STATS.update(stats, requests=1)
+    return items, dict(stats)
+
+
+def speculative_seed(fridge_id: Optional[str], yolo_detections: List[Dict]) -> List[str]:
+    """GPT-4o 분류 전에 확실한 재료: 이전 스캔 재고 + 신뢰도 높은 YOLO 식품 클래스"""
+    seed = [
+        record.get("name", "")
+        for record in get_inventory_engine().fridge(fridge_id).snapshot().items.values()
+    ]
+    seed += [
+        YOLO_FOOD_CLASSES[d["yolo_class"]]
+        for d in yolo_detections
+        if d["yolo_class"] in YOLO_FOOD_CLASSES and d["yolo_conf"] >= SPECULATION_MIN_YOLO_CONF
+    ]
+    return list(dict.fromkeys(name for name in seed if name))
+
+
 def vision_agent_node(state: FridgeState) -> FridgeState:
     """Vision Agent 노드 - YOLO v8 + GPT-4o 하이브리드 식재료 인식"""
     try:
@@ -337,11 +866,24 @@ def vision_agent_node(state: FridgeState) -> FridgeState:
         yolo_detections = detect_with_yolo(image_path)
         logger.info(f"  YOLO 탐지 결과: {len(yolo_detections)}개")
 
-        # ── 2단계: GPT-4o 식재료 분류 ─────────────────────────────────
-        logger.info("2단계: GPT-4o 분류 시작...")
-        base64_image = encode_image(image_path)
-        gpt_items = classify_with_gpt(base64_image, yolo_detections)
-        logger.info(f"  GPT-4o 분류 결과: {len(gpt_items)}개")
+        # ── 추측 실행: GPT-4o 분류와 겹치도록 레시피 추천을 미리 시작 ──
+        state["speculative_recipes"] = start_speculative_recipes(
+            speculative_seed(state.get("fridge_id"), yolo_detections),
+            state.get("diet_type", "general"),
+        )
+
+        # ── 2단계: 식재료 분류 (박스별 로컬/저가 모델 → 불확실한 부분만 GPT-4o) ──
+        if VISION_TIERED and yolo_detections:
+            logger.info("2단계: 박스별 단계 분류 시작...")
+            gpt_items, vision_stats = classify_tiered(image_path, yolo_detections, state.get("fridge_id"))
+            logger.info(f"  단계 분류 결과: {len(gpt_items)}개 {vision_stats}")
+        else:
+            logger.info("2단계: GPT-4o 분류 시작...")
+            base64_image = encode_image(image_path)
+            gpt_items = classify_with_gpt(base64_image, yolo_detections)
+            vision_stats = {"gpt4o_calls": 1, "image_tokens_saved": 0}
+            logger.info(f"  GPT-4o 분류 결과: {len(gpt_items)}개")
+        state["vision_stats"] = vision_stats
 
         # ── 3단계: 결과 통합 (YOLO bbox 우선 적용) ────────────────────
         logger.info("3단계: YOLO bbox + GPT-4o 분류 통합...")
@@ -411,8 +953,9 @@ def vision_agent_node(state: FridgeState) -> FridgeState:
             f"(신뢰도 기준: {CONFIDENCE_THRESHOLD})"
         )
 
-        state["detected_items"] = confirmed_items
-        state["unidentified_items"] = unidentified_items
+        # 표준 재료 ID는 여기서 한 번만 구하고 이후 에이전트는 ID로 비교
+        state["detected_items"] = annotate_ingredient_ids(confirmed_items)
+        state["unidentified_items"] = annotate_ingredient_ids(unidentified_items)
         state["current_step"] = "vision_completed"
 
         return state
@@ -1,9 +1,13 @@
 """FastAPI 메인 애플리케이션"""
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
 from .routes import router
+from ..core.supabase_client import SupabaseManager
+from ..core.write_behind import get_persistence_queue
+from ..database.session import init_db, dispose_engine
 
 # 로깅 설정
 logging.basicConfig(
@@ -11,10 +15,30 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """앱 수명주기 - 공유 리소스 초기화/정리"""
+    try:
+        await init_db()
+    except Exception as e:
+        logger.error(f"로컬 재고 DB 초기화 실패: {e}")
+    if not SupabaseManager().disabled:
+        # 이전 실행에서 반영되지 못한 스풀 변경분 재전송
+        await get_persistence_queue().start()
+    yield
+    await get_persistence_queue().stop()
+    await SupabaseManager().aclose()
+    await dispose_engine()
+
+
 app = FastAPI(
     title="FridgeAI API",
     description="냉장고 관리 AI 에이전트 시스템",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS 설정
@@ -1,8 +1,10 @@
 """API 라우트"""
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Body, Form
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Body, Form, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 import os
+import json
+import asyncio
 import tempfile
 import logging
 from typing import Optional, List, Dict, Any
@@ -19,8 +21,10 @@ async def analyze_fridge_image(
     file: UploadFile = File(...),
     servings: int = Form(2),
     diet_type: str = Form("general"),
+    fridge_id: str = Form("default"),
+    discussion_narrative: bool = Form(False),
 ):
-    """냉장고 이미지 분석 (인분, 식단 타입 포함)"""
+    """냉장고 이미지 분석 (인분, 식단 타입 포함, discussion_narrative=true면 에이전트 토론 내용 생성)"""
     try:
         # 파일 검증
         if not file.content_type.startswith("image/"):
@@ -39,7 +43,11 @@ async def analyze_fridge_image(
         try:
             # 오케스트레이터 실행
             result = await run_orchestrator(
-                image_path=tmp_file_path, servings=servings, diet_type=diet_type
+                image_path=tmp_file_path,
+                servings=servings,
+                diet_type=diet_type,
+                fridge_id=fridge_id,
+                discussion_narrative=discussion_narrative,
             )
 
             return JSONResponse(content=result)
@@ -155,6 +163,13 @@ async def generate_report_endpoint(request_data: Dict[str, Any] = Body(...)):
 
         report = await generate_recipe_report(recipe_title, ingredients)
 
+        # 챗봇이 과거 리포트를 참고할 수 있도록 검색 인덱스에 추가
+        if report.get("title"):
+            from ..rag.qa_retriever import get_qa_retriever
+
+            # 임베딩(최초 호출 시 기본 레시피 포함)이 이벤트 루프를 막지 않도록 스레드에서 실행
+            await asyncio.to_thread(lambda: get_qa_retriever().add_report(report))
+
         return JSONResponse(content=report)
 
     except Exception as e:
@@ -164,6 +179,39 @@ async def generate_report_endpoint(request_data: Dict[str, Any] = Body(...)):
         )
 
 
+@router.post("/recipes/ingest")
+async def ingest_recipe_corpus(
+    file: UploadFile = File(...),
+    chunk_size: int = Form(1000),
+):
+    """레시피 코퍼스(JSONL/CSV) 일괄 적재 - 처리 통계(recipes/sec 포함) 반환"""
+    import shutil
+    from ..rag.ingest import detect_format, ingest_recipes
+
+    try:
+        fmt = detect_format(file.filename or "")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # 업로드 파일을 메모리에 모두 올리지 않고 임시 파일로 복사
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{fmt}") as tmp_file:
+        shutil.copyfileobj(file.file, tmp_file)
+        tmp_file_path = tmp_file.name
+
+    try:
+        stats = await asyncio.to_thread(
+            ingest_recipes, tmp_file_path, fmt=fmt, chunk_size=chunk_size, resume=False
+        )
+        stats["source"] = file.filename
+        return JSONResponse(content=stats)
+    except Exception as e:
+        logger.error(f"레시피 적재 오류: {e}")
+        raise HTTPException(status_code=500, detail=f"레시피 적재 중 오류가 발생했습니다: {str(e)}")
+    finally:
+        if os.path.exists(tmp_file_path):
+            os.unlink(tmp_file_path)
+
+
 @router.post("/chat")
 async def chat_with_fridge(request_data: Dict[str, Any] = Body(...)):
     """냉장고 데이터 기반 챗봇 질의응답"""
@@ -173,16 +221,104 @@ async def chat_with_fridge(request_data: Dict[str, Any] = Body(...)):
             raise HTTPException(status_code=400, detail="질문 내용이 필요합니다")
 
         from ..agents.qa_agent import answer_user_question
+        from ..core.chat_session import get_chat_session_store
+        from ..core.inventory_engine import DEFAULT_FRIDGE_ID
 
-        reply = await answer_user_question(user_message)
+        # session_id가 없으면 새 세션을 만들고 응답으로 돌려줌
+        session = get_chat_session_store().get_or_create(
+            request_data.get("session_id"),
+            request_data.get("fridge_id") or DEFAULT_FRIDGE_ID,
+        )
+        reply = await answer_user_question(user_message, session=session)
 
-        return JSONResponse(content={"reply": reply})
+        return JSONResponse(content={"reply": reply, "session_id": session.session_id})
 
     except Exception as e:
         logger.error(f"채팅 오류: {e}")
         raise HTTPException(status_code=500, detail=f"챗봇 오류: {str(e)}")
 
 
+@router.post("/chat/stream")
+async def chat_with_fridge_stream(request: Request, request_data: Dict[str, Any] = Body(...)):
+    """
+    챗봇 질의응답 스트리밍 (Server-Sent Events)
+
+    이벤트 순서: session → delta(토큰 조각)* → done | error
+    클라이언트 연결이 끊기면 LLM 스트림을 닫아 토큰 생성을 중단합니다.
+    """
+    user_message = request_data.get("message")
+    if not user_message:
+        raise HTTPException(status_code=400, detail="질문 내용이 필요합니다")
+
+    from ..agents.qa_agent import stream_user_answer
+    from ..core.chat_session import get_chat_session_store
+    from ..core.inventory_engine import DEFAULT_FRIDGE_ID
+
+    session = get_chat_session_store().get_or_create(
+        request_data.get("session_id"),
+        request_data.get("fridge_id") or DEFAULT_FRIDGE_ID,
+    )
+
+    def sse(event: str, data: Dict[str, Any]) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    async def event_stream():
+        yield sse("session", {"session_id": session.session_id})
+        answer = stream_user_answer(user_message, session=session)
+        try:
+            async for chunk in answer:
+                if await request.is_disconnected():
+                    logger.info(f"채팅 스트림 클라이언트 연결 종료: {session.session_id}")
+                    break
+                yield sse("delta", {"content": chunk})
+            else:
+                yield sse("done", {"session_id": session.session_id})
+        except Exception as e:
+            logger.error(f"채팅 스트림 오류: {e}")
+            yield sse("error", {"detail": "답변을 생성하는 중에 오류가 발생했습니다."})
+        finally:
+            # 중단 시 LLM 스트림까지 닫아 토큰 소비 중지
+            await answer.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.delete("/chat/{session_id}")
+async def end_chat_session(session_id: str):
+    """챗봇 세션 종료 (대화 기록/요약 삭제)"""
+    from ..core.chat_session import get_chat_session_store
+
+    return {"deleted": get_chat_session_store().delete(session_id)}
+
+
+@router.get("/persistence/stats")
+async def get_persistence_stats():
+    """Supabase write-behind 큐 상태 (대기 깊이, 플러시 지연)"""
+    from ..core.write_behind import get_persistence_queue
+
+    return get_persistence_queue().stats()
+
+
+@router.get("/llm/stats")
+async def get_llm_stats():
+    """LLM 단계별 출력 토큰과 파싱 실패율"""
+    from ..core.structured_output import llm_stage_stats
+
+    return llm_stage_stats()
+
+
+@router.get("/vision/stats")
+async def get_vision_stats():
+    """2단계 비전 분류 누적 지표 (단계별 박스 수, GPT-4o 이미지 토큰 절감량)"""
+    from ..agents.vision_agent import VISION_TIER_STATS
+
+    return dict(VISION_TIER_STATS)
+
+
 @router.post("/recipes/ai-recommend")
 async def ai_recommend_with_user_choice(request_data: Dict[str, Any] = Body(...)):
     """
@@ -228,10 +364,7 @@ async def ai_recommend_with_user_choice(request_data: Dict[str, Any] = Body(...)
 
         logger.info(f"AI가 판단한 diet_type: {diet_type} (사용자 답변: {user_answer})")
 
-        from ..agents.recipe_agent import (
-            generate_recipes_with_gpt,
-            calculate_match_rate,
-        )
+        from ..agents.recipe_agent import suggest_recipes
         from ..agents.youtube_agent import search_youtube_videos
 
         available_ingredients = [
@@ -248,14 +381,14 @@ async def ai_recommend_with_user_choice(request_data: Dict[str, Any] = Body(...)
                 }
             )
 
-        # GPT로 레시피 생성
-        recipes = generate_recipes_with_gpt(available_ingredients, [], diet_type)
+        # 레시피 인덱스 우선 검색, 부족분만 GPT로 생성
+        recipes = await asyncio.to_thread(
+            suggest_recipes, available_ingredients, [], diet_type
+        )
 
-        # 각 레시피에 매칭률 계산
+        # 매칭률을 백분위로 변환
         for recipe in recipes:
-            recipe_ingredients = recipe.get("ingredients", [])
-            match_rate = calculate_match_rate(recipe_ingredients, available_ingredients)
-            recipe["match_rate"] = round(match_rate * 100)  # 백분위로 변환
+            recipe["match_rate"] = round(recipe["match_rate"] * 100)
 
         # 매칭률순 정렬
         recipes.sort(key=lambda x: x.get("match_rate", 0), reverse=True)
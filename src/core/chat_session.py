@@ -0,0 +1,96 @@
+"""챗봇 세션 상태
+
+세션마다 최근 대화 턴, 오래된 턴의 누적 요약, 대화 중 언급된 재고 컨텍스트를
+보관합니다. 재고 컨텍스트는 재고 인덱스 버전이 바뀌면(스캔 반영) 무효화됩니다.
+"""
+import os
+import time
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+SESSION_TTL_SECONDS = int(os.getenv("CHAT_SESSION_TTL_SECONDS", 3600))
+MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", 1000))
+
+
+@dataclass
+class ChatSession:
+    """대화 세션"""
+    session_id: str
+    fridge_id: str
+    # 요약되지 않은 최근 턴 (role, content) - role은 "human" 또는 "ai"
+    turns: List[Tuple[str, str]] = field(default_factory=list)
+    # 요약에 반영된 오래된 턴의 누적 요약
+    summary: str = ""
+    summarized_turns: int = 0
+    # 대화 중 참조된 재고 라인 (inventory_version이 바뀌면 폐기)
+    inventory_lines: List[str] = field(default_factory=list)
+    inventory_version: int = -1
+    last_active: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def sync_inventory(self, version: int) -> None:
+        """재고 인덱스 버전이 바뀌었으면 캐시된 재고 컨텍스트 폐기"""
+        if version != self.inventory_version:
+            self.inventory_lines = []
+            self.inventory_version = version
+
+    def add_turn(self, question: str, answer: str) -> None:
+        self.turns.append(("human", question))
+        self.turns.append(("ai", answer))
+        self.last_active = time.monotonic()
+
+
+class ChatSessionStore:
+    """TTL/LRU 기반 인메모리 세션 저장소"""
+
+    def __init__(self, ttl_seconds: int = SESSION_TTL_SECONDS, max_sessions: int = MAX_SESSIONS):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get_or_create(self, session_id: Optional[str], fridge_id: str) -> ChatSession:
+        """세션 조회 (없거나 만료/다른 냉장고면 새로 생성)"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None or session.fridge_id != fridge_id:
+                session = ChatSession(session_id=session_id or uuid.uuid4().hex, fridge_id=fridge_id)
+                self._sessions[session.session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session.session_id)
+            session.last_active = now
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _evict_expired(self, now: float) -> None:
+        # 가장 오래 사용되지 않은 세션부터 확인
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_active < self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+
+
+# 전역 인스턴스
+_session_store: Optional[ChatSessionStore] = None
+
+
+def get_chat_session_store() -> ChatSessionStore:
+    """챗봇 세션 저장소 인스턴스 반환"""
+    global _session_store
+    if _session_store is None:
+        _session_store = ChatSessionStore()
+    return _session_store
@@ -0,0 +1,206 @@
+"""냉장고별 박스 이미지 분류 캐시
+
+같은 냉장고를 다시 찍으면 대부분의 YOLO 박스는 그대로입니다. 박스 이미지의
+지각 해시(dHash)와 평균 색이 이전 스캔과 거의 같으면 그때의 분류 결과를 재사용해,
+새로 생기거나 바뀐 부분만 비전 LLM으로 보냅니다.
+
+박스가 덮지 못한 나머지 영역은 여러 물체가 함께 찍혀 있어 64비트 해시로는 물건
+하나가 빠진 것을 구분하지 못하므로, 8px 칸별 평균 색을 저장해 어느 한 칸이라도
+바뀌면 다시 분류합니다.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+CROP_CACHE_TTL_SECONDS = int(os.getenv("CROP_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+CROP_CACHE_MAX_FRIDGES = int(os.getenv("CROP_CACHE_MAX_FRIDGES", 1000))
+CROP_CACHE_MAX_ENTRIES = 200  # 냉장고당 박스 수
+CROP_HASH_MAX_DISTANCE = int(os.getenv("CROP_HASH_MAX_DISTANCE", 6))  # 64비트 중 허용 차이
+CROP_COLOR_TOLERANCE = 24  # 평균 RGB 채널별 허용 차이 (단색 물체의 해시 충돌 방지)
+RESIDUAL_CELL = 8  # 나머지 영역 비교 칸 크기 (px, 축소된 나머지 영역 이미지 기준)
+RESIDUAL_CELL_TOLERANCE = 8  # 칸 평균 RGB 채널별 허용 차이
+
+# 재사용하는 분류 필드 (위치/단계 정보는 이번 스캔 기준으로 다시 붙임)
+CACHED_FIELDS = (
+    "name", "category", "quantity", "unit", "freshness", "packaging", "confidence", "expiry_date_text",
+)
+
+
+def dhash(image: Image.Image, size: int = 8) -> int:
+    """차이 해시 (가로로 이웃한 밝기 비교, size*size 비트)"""
+    pixels = np.asarray(image.convert("L").resize((size + 1, size), Image.BILINEAR), dtype=np.int16)
+    value = 0
+    for bit in (pixels[:, :-1] > pixels[:, 1:]).ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def mean_color(image: Image.Image) -> Tuple[int, int, int]:
+    r, g, b = image.convert("RGB").resize((1, 1), Image.BOX).getpixel((0, 0))
+    return r, g, b
+
+
+def residual_cells(image: Image.Image, cell: int = RESIDUAL_CELL) -> np.ndarray:
+    """나머지 영역 이미지의 칸별 평균 색 (h/cell, w/cell, 3) uint8"""
+    return np.asarray(image.convert("RGB").reduce(cell), dtype=np.uint8)
+
+
+def residual_unchanged(a: np.ndarray, b: np.ndarray, tolerance: int = RESIDUAL_CELL_TOLERANCE) -> bool:
+    """모든 칸의 평균 색 차이가 허용 범위 안인지"""
+    if a.shape != b.shape:
+        return False
+    return int(np.abs(a.astype(np.int16) - b.astype(np.int16)).max(initial=0)) <= tolerance
+
+
+@dataclass
+class CropSignature:
+    """박스 이미지 지문"""
+    hash: int
+    color: Tuple[int, int, int]
+
+    @classmethod
+    def of(cls, image: Image.Image) -> "CropSignature":
+        return cls(dhash(image), mean_color(image))
+
+    def distance(self, other: "CropSignature") -> Optional[int]:
+        """해시 해밍 거리 (평균 색이 다르면 None)"""
+        if max(abs(a - b) for a, b in zip(self.color, other.color)) > CROP_COLOR_TOLERANCE:
+            return None
+        return bin(self.hash ^ other.hash).count("1")
+
+
+@dataclass
+class _CropEntry:
+    signature: CropSignature
+    yolo_class: str
+    item: Dict[str, Any]
+
+
+@dataclass
+class FridgeCropCache:
+    """냉장고 하나의 박스 분류 결과"""
+    entries: List[_CropEntry] = field(default_factory=list)
+    residual: Optional[Tuple[np.ndarray, List[Dict[str, Any]]]] = None  # (칸별 평균 색, 항목)
+    last_active: float = field(default_factory=time.monotonic)
+
+
+def _classification(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: item.get(key) for key in CACHED_FIELDS}
+
+
+class CropCache:
+    """TTL/LRU 기반 인메모리 박스 분류 캐시"""
+
+    def __init__(
+        self,
+        ttl_seconds: int = CROP_CACHE_TTL_SECONDS,
+        max_fridges: int = CROP_CACHE_MAX_FRIDGES,
+        max_distance: int = CROP_HASH_MAX_DISTANCE,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_fridges = max_fridges
+        self.max_distance = max_distance
+        self._fridges: "OrderedDict[str, FridgeCropCache]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._fridges)
+
+    def lookup(self, fridge_id: str, signature: CropSignature, yolo_class: str) -> Optional[Dict[str, Any]]:
+        """같은 YOLO 클래스 중 가장 가까운 박스의 분류 결과 (없으면 None)"""
+        with self._lock:
+            fridge = self._get(fridge_id)
+            if fridge is None:
+                return None
+            best, best_distance = None, self.max_distance + 1
+            for entry in fridge.entries:
+                if entry.yolo_class != yolo_class:
+                    continue
+                distance = signature.distance(entry.signature)
+                if distance is not None and distance < best_distance:
+                    best, best_distance = entry, distance
+            return dict(best.item) if best else None
+
+    def store(self, fridge_id: str, signature: CropSignature, yolo_class: str, item: Dict[str, Any]) -> None:
+        with self._lock:
+            fridge = self._get_or_create(fridge_id)
+            # 같은 박스의 이전 결과는 교체
+            fridge.entries = [
+                e for e in fridge.entries
+                if e.yolo_class != yolo_class or not self._same(signature, e.signature)
+            ]
+            fridge.entries.append(_CropEntry(signature, yolo_class, _classification(item)))
+            del fridge.entries[:-CROP_CACHE_MAX_ENTRIES]
+
+    def lookup_residual(self, fridge_id: str, cells: np.ndarray) -> Optional[List[Dict[str, Any]]]:
+        """나머지 영역의 모든 칸이 이전 스캔과 같으면 그때 찾은 항목 (residual_cells 기준)"""
+        with self._lock:
+            fridge = self._get(fridge_id)
+            if fridge is None or fridge.residual is None:
+                return None
+            cached, items = fridge.residual
+            if not residual_unchanged(cells, cached):
+                return None
+            return [dict(item) for item in items]
+
+    def store_residual(self, fridge_id: str, cells: np.ndarray, items: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            fridge = self._get_or_create(fridge_id)
+            fridge.residual = (
+                cells,
+                [{**_classification(item), "bbox_2d": item.get("bbox_2d")} for item in items],
+            )
+
+    def clear(self, fridge_id: Optional[str] = None) -> None:
+        with self._lock:
+            if fridge_id is None:
+                self._fridges.clear()
+            else:
+                self._fridges.pop(fridge_id, None)
+
+    def _same(self, a: CropSignature, b: CropSignature) -> bool:
+        distance = a.distance(b)
+        return distance is not None and distance <= self.max_distance
+
+    def _get(self, fridge_id: str) -> Optional[FridgeCropCache]:
+        now = time.monotonic()
+        self._evict_expired(now)
+        fridge = self._fridges.get(fridge_id)
+        if fridge is not None:
+            self._fridges.move_to_end(fridge_id)
+            fridge.last_active = now
+        return fridge
+
+    def _get_or_create(self, fridge_id: str) -> FridgeCropCache:
+        fridge = self._get(fridge_id)
+        if fridge is None:
+            fridge = self._fridges[fridge_id] = FridgeCropCache()
+            while len(self._fridges) > self.max_fridges:
+                self._fridges.popitem(last=False)
+        return fridge
+
+    def _evict_expired(self, now: float) -> None:
+        # 가장 오래 사용되지 않은 냉장고부터 확인
+        while self._fridges:
+            oldest = next(iter(self._fridges.values()))
+            if now - oldest.last_active < self.ttl_seconds:
+                break
+            self._fridges.popitem(last=False)
+
+
+# 전역 인스턴스
+_crop_cache: Optional[CropCache] = None
+
+
+def get_crop_cache() -> CropCache:
+    """박스 분류 캐시 인스턴스 반환"""
+    global _crop_cache
+    if _crop_cache is None:
+        _crop_cache = CropCache()
+    return _crop_cache
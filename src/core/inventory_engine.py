@@ -0,0 +1,250 @@
+"""Inventory Engine - 냉장고(사용자)별 동시성 안전 재고 저장소
+
+각 냉장고는 독립된 락을 가지며, 쓰기는 해당 냉장고 안에서만 직렬화됩니다.
+읽기는 copy-on-write 스냅샷을 락 없이 참조합니다. 보관 위치별 집계와
+과다 재고 경고는 전체 스캔 없이 변경된 레코드에 대해서만 증분 갱신됩니다.
+재고 레코드는 item_id("{이름+카테고리 해시}-{번호}")로 식별합니다.
+"""
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Mapping, NamedTuple, Optional
+
+from .inventory_reconciler import item_key, reconcile_scan
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FRIDGE_ID = "default"
+STORAGE_LOCATIONS = ("냉장", "냉동", "실온")
+
+# 과다 재고 기준
+EXCESS_QUANTITY_THRESHOLD = 10
+RECOMMENDED_QUANTITY = 3
+
+
+def format_excess_warning(item_name: str, quantity: Any) -> str:
+    """과다 재고 경고 문구"""
+    return f"🟡 과다: {item_name} ({quantity}개, 권장 {RECOMMENDED_QUANTITY}개)"
+
+
+class InventorySnapshot(NamedTuple):
+    """게시된 재고 상태 (불변) - 참조 하나로 일관된 읽기 보장"""
+
+    items: Mapping[str, Dict[str, Any]]
+    location_counts: Mapping[str, int]
+    excess: Mapping[str, Any]
+    version: int
+
+
+class FridgeInventory:
+    """단일 냉장고 재고 - 쓰기는 락으로 직렬화, 읽기는 불변 스냅샷"""
+
+    def __init__(
+        self, fridge_id: str, excess_threshold: float = EXCESS_QUANTITY_THRESHOLD
+    ):
+        self.fridge_id = fridge_id
+        self.excess_threshold = excess_threshold
+        self._lock = threading.Lock()
+        # 게시된 스냅샷은 절대 수정하지 않고 통째로 교체합니다
+        self._snapshot = InventorySnapshot(
+            items={},
+            location_counts={loc: 0 for loc in STORAGE_LOCATIONS},
+            excess={},
+            version=0,
+        )
+        self.hydrated = False
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def snapshot(self) -> InventorySnapshot:
+        """현재 재고 스냅샷 (읽기 전용, 락 불필요)"""
+        return self._snapshot
+
+    def status(self, snapshot: Optional[InventorySnapshot] = None) -> Dict[str, Any]:
+        """보관 위치별 집계 (증분 유지된 값 사용)"""
+        snapshot = snapshot or self._snapshot
+        status = {"총 품목 수": len(snapshot.items)}
+        for location in STORAGE_LOCATIONS:
+            status[location] = snapshot.location_counts.get(location, 0)
+        return status
+
+    def warnings(self, snapshot: Optional[InventorySnapshot] = None) -> List[str]:
+        """현재 과다 재고 경고 목록"""
+        snapshot = snapshot or self._snapshot
+        return [format_excess_warning(name, qty) for name, qty in snapshot.excess.values()]
+
+    def hydrate(self, records: List[Dict[str, Any]]) -> bool:
+        """영속 저장소에서 읽은 레코드로 최초 1회 초기화
+
+        이미 스캔이 반영된 경우(메모리가 더 최신)에는 건너뜁니다.
+        """
+        with self._lock:
+            if self.hydrated:
+                return False
+            self.hydrated = True
+            current = self._snapshot
+            if current.version > 0 or not records:
+                return False
+
+            items: Dict[str, Dict[str, Any]] = {}
+            counts = dict(current.location_counts)
+            excess: Dict[str, Any] = {}
+            for stored in records:
+                record = dict(stored)
+                record["key"] = item_key(record.get("name", ""), record.get("category", "기타"))
+                record["location"] = record.get("location") or "냉장"
+                items[record["item_id"]] = record
+                counts[record["location"]] = counts.get(record["location"], 0) + 1
+                self._update_threshold(excess, record)
+
+            self._snapshot = InventorySnapshot(items, counts, excess, current.version + 1)
+            logger.info(f"[{self.fridge_id}] 저장소에서 재고 {len(items)}개 로드")
+            return True
+
+    def apply_scan(self, detections: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """스캔 결과를 이전 스냅샷과 비교(reconcile)하여 차이만 반영
+
+        detections 항목: name, category, quantity, unit, location, bbox_2d
+            (purchase_date, expiry_date 는 새로 추가되는 항목에만 사용)
+        반환값의 added/consumed/moved/quantity_changed 는 변경된 재고 레코드 목록
+        """
+        with self._lock:
+            current = self._snapshot
+            delta = reconcile_scan(current.items, detections)
+
+            items = dict(current.items)
+            counts = dict(current.location_counts)
+            excess = dict(current.excess)
+            now = datetime.now().isoformat()
+            changes: Dict[str, List[Dict[str, Any]]] = {
+                "added": [],
+                "consumed": [],
+                "moved": [],
+                "quantity_changed": [],
+            }
+
+            for record in delta["consumed"]:
+                del items[record["item_id"]]
+                counts[record["location"]] = counts.get(record["location"], 0) - 1
+                excess.pop(record["item_id"], None)
+                changes["consumed"].append(record)
+
+            for detection in delta["added"]:
+                key = item_key(detection.get("name", ""), detection.get("category", "기타"))
+                record = {
+                    "item_id": self._next_item_id(items, key),
+                    "key": key,
+                    "name": detection["name"],
+                    "category": detection.get("category", "기타"),
+                    "quantity": detection.get("quantity", 1),
+                    "unit": detection.get("unit", "개"),
+                    "added_date": now,
+                    "last_updated": now,
+                    "location": detection.get("location", "냉장"),
+                    "bbox_2d": detection.get("bbox_2d"),
+                    # 구매일/유통기한은 처음 추가될 때만 정하고 이동/수량 변경 시 유지
+                    "purchase_date": detection.get("purchase_date"),
+                    "expiry_date": detection.get("expiry_date"),
+                }
+                items[record["item_id"]] = record
+                counts[record["location"]] = counts.get(record["location"], 0) + 1
+                self._update_threshold(excess, record)
+                changes["added"].append(record)
+
+            # 이동/수량 변경은 같은 쌍이 양쪽에 모두 있을 수 있으므로 한 번만 갱신
+            updated: Dict[str, Dict[str, Any]] = {}
+            for kind in ("moved", "quantity_changed", "unchanged"):
+                for change in delta[kind]:
+                    previous, detection = change["previous"], change["current"]
+                    item_id = previous["item_id"]
+                    record = updated.get(item_id)
+                    if record is None:
+                        record = dict(previous)
+                        record["quantity"] = detection.get("quantity", previous["quantity"])
+                        record["bbox_2d"] = detection.get("bbox_2d") or previous.get("bbox_2d")
+                        location = detection.get("location", previous["location"])
+                        if location != previous["location"]:
+                            counts[previous["location"]] = counts.get(previous["location"], 0) - 1
+                            counts[location] = counts.get(location, 0) + 1
+                            record["location"] = location
+                        updated[item_id] = record
+                        items[item_id] = record
+                    if kind != "unchanged":
+                        record["last_updated"] = now
+                        changes[kind].append(record)
+                        self._update_threshold(excess, record)
+
+            # 게시: 참조 교체만으로 독자는 항상 일관된 스냅샷을 봅니다
+            published = InventorySnapshot(items, counts, excess, current.version + 1)
+            self._snapshot = published
+
+        changes["status"] = self.status(published)
+        changes["warnings"] = self.warnings(published)
+        return changes
+
+    @staticmethod
+    def _next_item_id(items: Mapping[str, Dict[str, Any]], key: str) -> str:
+        """키별 가장 작은 빈 번호로 레코드 ID 생성 (재시작 후에도 같은 ID 재사용)"""
+        index = 0
+        while f"{key}-{index}" in items:
+            index += 1
+        return f"{key}-{index}"
+
+    def _update_threshold(self, excess: Dict[str, Any], record: Dict[str, Any]) -> None:
+        """업데이트된 항목에 대해서만 과다 기준 검사"""
+        quantity = record.get("quantity")
+        try:
+            is_excess = float(quantity) > self.excess_threshold
+        except (TypeError, ValueError):
+            is_excess = False
+
+        item_id = record["item_id"]
+        if is_excess:
+            if item_id not in excess:
+                logger.info(f"[{self.fridge_id}] 과다 재고 발생: {record['name']} ({quantity})")
+            excess[item_id] = (record["name"], quantity)
+        else:
+            excess.pop(item_id, None)
+
+
+class InventoryEngine:
+    """냉장고별 재고 파티션 관리자"""
+
+    def __init__(self, excess_threshold: float = EXCESS_QUANTITY_THRESHOLD):
+        self.excess_threshold = excess_threshold
+        self._fridges: Dict[str, FridgeInventory] = {}
+        self._lock = threading.Lock()
+
+    def fridge(self, fridge_id: Optional[str] = None) -> FridgeInventory:
+        """냉장고 재고 반환 (없으면 생성)"""
+        fridge_id = fridge_id or DEFAULT_FRIDGE_ID
+        inventory = self._fridges.get(fridge_id)
+        if inventory is None:
+            # 생성 시에만 엔진 락 사용 (기존 냉장고 접근은 락 없음)
+            with self._lock:
+                inventory = self._fridges.get(fridge_id)
+                if inventory is None:
+                    inventory = FridgeInventory(fridge_id, self.excess_threshold)
+                    self._fridges[fridge_id] = inventory
+        return inventory
+
+    def fridge_ids(self) -> List[str]:
+        """등록된 냉장고 ID 목록"""
+        return list(self._fridges)
+
+
+# 전역 인스턴스
+_inventory_engine: Optional[InventoryEngine] = None
+_inventory_engine_lock = threading.Lock()
+
+
+def get_inventory_engine() -> InventoryEngine:
+    """재고 엔진 인스턴스 반환"""
+    global _inventory_engine
+    if _inventory_engine is None:
+        with _inventory_engine_lock:
+            if _inventory_engine is None:
+                _inventory_engine = InventoryEngine()
+    return _inventory_engine
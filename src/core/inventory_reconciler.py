@@ -0,0 +1,128 @@
+"""Inventory Reconciler - 연속된 냉장고 스캔 간 재고 차이 계산
+
+이전 스냅샷과 새 탐지 결과를 (이름, 카테고리) 해시 키로 묶고, 같은 키
+안에서는 bbox_2d 중심점 거리로 짝을 지어 추가/소진/이동/수량 변경을
+산출합니다. 키 그룹은 보통 1~2개 항목이므로 전체 비용은 O(n)입니다.
+"""
+import hashlib
+import math
+from typing import Dict, Any, List, Optional, Tuple, Mapping
+
+# 0-1000 스케일에서 이 거리 이상 중심점이 움직이면 "이동"으로 판단
+MOVE_DISTANCE_THRESHOLD = 150.0
+
+
+def item_key(name: str, category: str) -> str:
+    """이름+카테고리 해시 키"""
+    raw = f"{(name or '').strip().lower()}\x1f{(category or '').strip().lower()}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def bbox_center(bbox: Optional[List[float]]) -> Optional[Tuple[float, float]]:
+    """bbox_2d [ymin, xmin, ymax, xmax] 중심점"""
+    if not bbox or len(bbox) != 4:
+        return None
+    try:
+        return ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+    except TypeError:
+        return None
+
+
+def _distance(a: Optional[List[float]], b: Optional[List[float]]) -> float:
+    """두 bbox 중심점 거리 (bbox가 없으면 0 - 위치 비교 불가)"""
+    ca, cb = bbox_center(a), bbox_center(b)
+    if ca is None or cb is None:
+        return 0.0
+    return math.hypot(ca[0] - cb[0], ca[1] - cb[1])
+
+
+def _match_group(
+    previous: List[Dict[str, Any]], detected: List[Dict[str, Any]]
+) -> Tuple[List[Tuple[Dict[str, Any], Dict[str, Any], float]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """같은 키 그룹 내 근접도 기반 탐욕 매칭 -> (짝, 남은 이전 항목, 남은 새 항목)"""
+    if len(previous) == 1 and len(detected) == 1:
+        return [(previous[0], detected[0], _distance(previous[0].get("bbox_2d"), detected[0].get("bbox_2d")))], [], []
+
+    candidates = sorted(
+        (
+            (_distance(p.get("bbox_2d"), d.get("bbox_2d")), pi, di)
+            for pi, p in enumerate(previous)
+            for di, d in enumerate(detected)
+        ),
+        key=lambda c: c[0],
+    )
+    used_prev, used_new = set(), set()
+    pairs = []
+    for dist, pi, di in candidates:
+        if pi in used_prev or di in used_new:
+            continue
+        used_prev.add(pi)
+        used_new.add(di)
+        pairs.append((previous[pi], detected[di], dist))
+
+    remaining_prev = [p for i, p in enumerate(previous) if i not in used_prev]
+    remaining_new = [d for i, d in enumerate(detected) if i not in used_new]
+    return pairs, remaining_prev, remaining_new
+
+
+def reconcile_scan(
+    previous_items: Mapping[str, Dict[str, Any]],
+    detections: List[Dict[str, Any]],
+    move_threshold: float = MOVE_DISTANCE_THRESHOLD,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """이전 재고 스냅샷과 새 탐지 결과의 차이 계산
+
+    previous_items: item_id -> 재고 레코드 (key, bbox_2d, quantity 포함)
+    detections: name, category, quantity, bbox_2d 등을 가진 탐지 항목
+
+    반환값:
+        added: 새로 나타난 탐지 항목
+        consumed: 사라진 이전 레코드
+        moved: {"previous": 레코드, "current": 탐지 항목} - 위치 이동
+        quantity_changed: {"previous": 레코드, "current": 탐지 항목} - 수량 변화
+        unchanged: {"previous": 레코드, "current": 탐지 항목}
+    """
+    previous_by_key: Dict[str, List[Dict[str, Any]]] = {}
+    for record in previous_items.values():
+        previous_by_key.setdefault(record["key"], []).append(record)
+
+    detected_by_key: Dict[str, List[Dict[str, Any]]] = {}
+    for detection in detections:
+        key = item_key(detection.get("name", ""), detection.get("category", "기타"))
+        detected_by_key.setdefault(key, []).append(detection)
+
+    delta: Dict[str, List[Dict[str, Any]]] = {
+        "added": [],
+        "consumed": [],
+        "moved": [],
+        "quantity_changed": [],
+        "unchanged": [],
+    }
+
+    for key, detected in detected_by_key.items():
+        previous = previous_by_key.pop(key, [])
+        if not previous:
+            delta["added"].extend(detected)
+            continue
+
+        pairs, remaining_prev, remaining_new = _match_group(previous, detected)
+        delta["consumed"].extend(remaining_prev)
+        delta["added"].extend(remaining_new)
+
+        for prev, current, dist in pairs:
+            change = {"previous": prev, "current": current}
+            changed = False
+            if dist > move_threshold:
+                delta["moved"].append(change)
+                changed = True
+            if current.get("quantity", prev.get("quantity")) != prev.get("quantity"):
+                delta["quantity_changed"].append(change)
+                changed = True
+            if not changed:
+                delta["unchanged"].append(change)
+
+    # 이번 스캔에 키 자체가 없는 이전 레코드는 모두 소진
+    for previous in previous_by_key.values():
+        delta["consumed"].extend(previous)
+
+    return delta
@@ -11,11 +11,15 @@ class FridgeState(TypedDict):
     image_data: Optional[bytes]
     servings: int  # 인분 수
     diet_type: str  # 식단 타입 (general, diet, health, patient)
+    fridge_id: str  # 냉장고(사용자) 식별자 - 재고 파티션 키
+    discussion_narrative: bool  # True면 순위가 확실해도 LLM 토론 내용 생성
     
     # Vision Agent 결과
     detected_items: List[Dict[str, Any]]
     unidentified_items: List[Dict[str, Any]]  # 파악 안된 재료들 (confidence < 0.7)
     user_confirmed_items: List[Dict[str, Any]]  # 사용자가 확인/추가한 재료들
+    vision_stats: Dict[str, Any]  # 단계별 분류 지표 (로컬/저가 모델/GPT-4o 박스 수, 이미지 토큰 절감량)
+    speculative_recipes: Optional[Any]  # 비전 분류 중 미리 시작한 레시피 추천 (Future, Recipe Agent가 회수)
     
     # Expiry Agent 결과
     expiry_data: List[Dict[str, Any]]
@@ -24,6 +28,7 @@ class FridgeState(TypedDict):
     # Inventory Agent 결과
     inventory_status: Dict[str, Any]
     inventory_changes: Dict[str, List[str]]
+    inventory_delta: Dict[str, List[Dict[str, Any]]]  # 이전 스캔 대비 변경 레코드 (영속화용)
     inventory_warnings: List[str]
     
     # Recipe Agent 결과
@@ -0,0 +1,191 @@
+"""LLM 구조화 출력 (JSON 스키마 강제 + 잘림 복구 파서 + 단계별 지표)
+
+응답은 `response_format={"type": "json_schema", "strict": true}`로 스키마를 강제하고,
+출력 토큰을 줄이기 위해 한 글자 키를 쓴 뒤 파싱 후 원래 필드명으로 펼칩니다.
+max_tokens에 걸려 응답이 잘려도 `IncrementalJSONParser`가 마지막으로 완성된
+항목까지 복구하므로 부분 목록이 살아남습니다.
+"""
+import json
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# 단계별 호출 지표 (호출 수, 입력/출력 토큰, 잘림, 부분 복구, 파싱 실패)
+_stage_stats: Dict[str, Counter] = {}
+_stats_lock = threading.Lock()
+
+
+class IncrementalJSONParser:
+    """조각 단위로 받아 잘린 JSON도 복구하는 파서
+
+    문자열/이스케이프/괄호 깊이를 추적하면서 배열 항목이나 최상위 필드 값인 객체/배열이
+    닫힐 때마다 그 위치와 아직 열려 있는 괄호를 기록합니다. 끝까지 닫히지 않으면 마지막
+    기록 위치에서 자르고 남은 괄호를 닫아 파싱하므로, 작성 중이던 항목만 버리고 앞의
+    항목은 유지됩니다.
+    첫 번째 `{` 또는 `[` 앞의 설명 문장이나 코드 펜스는 무시합니다.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._stack: List[str] = []  # 닫아야 할 괄호
+        self._in_string = False
+        self._escape = False
+        self._safe: Optional[Tuple[int, str]] = None  # (자를 위치, 덧붙일 닫는 괄호)
+        self._end: Optional[int] = None
+        self._broken = False
+
+    def feed(self, chunk: str) -> "IncrementalJSONParser":
+        self._text += chunk
+        text = self._text
+        for i in range(self._pos, len(text)):
+            if self._end is not None or self._broken:
+                break
+            ch = text[i]
+            if self._start is None:
+                if ch in "{[":
+                    self._start = i
+                    self._stack.append("}" if ch == "{" else "]")
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._stack.append("}" if ch == "{" else "]")
+            elif ch in "}]":
+                if not self._stack or self._stack[-1] != ch:
+                    self._broken = True
+                    break
+                self._stack.pop()
+                if not self._stack:
+                    self._end = i + 1
+                elif len(self._stack) == 1 or self._stack[-1] == "]":
+                    # 배열 항목 또는 최상위 필드가 완성된 위치만 기록 (필드가 빠진 항목 방지)
+                    self._safe = (i + 1, "".join(reversed(self._stack)))
+        self._pos = len(text)
+        return self
+
+    def result(self) -> Tuple[Optional[Any], bool]:
+        """(파싱 결과, 완전한 JSON 여부) - 복구할 수 없으면 (None, False)"""
+        if self._start is None:
+            return None, False
+        if self._end is not None:
+            try:
+                return json.loads(self._text[self._start:self._end]), True
+            except json.JSONDecodeError:
+                return None, False
+        if self._safe is not None:
+            cut, closers = self._safe
+            try:
+                return json.loads(self._text[self._start:cut] + closers), False
+            except json.JSONDecodeError:
+                pass
+        return None, False
+
+
+def parse_partial_json(text: str) -> Tuple[Optional[Any], bool]:
+    """문자열 전체를 한 번에 파싱 (잘린 경우 복구)"""
+    return IncrementalJSONParser().feed(text or "").result()
+
+
+def json_schema_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """OpenAI strict JSON 스키마 응답 형식"""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": schema},
+    }
+
+
+def strict_object(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """strict 모드 객체 스키마 (모든 필드 필수, 추가 필드 금지)"""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def expand_fields(value: Any, fields: Dict[str, Any]) -> Any:
+    """짧은 키 → 원래 필드명 (fields 값이 (이름, 하위 필드)면 목록 항목에도 적용)"""
+    if not isinstance(value, dict):
+        return value
+    expanded = {}
+    for key, item in value.items():
+        spec = fields.get(key, key)
+        if isinstance(spec, tuple):
+            name, sub_fields = spec
+            if isinstance(item, list):
+                item = [expand_fields(v, sub_fields) for v in item]
+            else:
+                item = expand_fields(item, sub_fields)
+        else:
+            name = spec
+        expanded[name] = item
+    return expanded
+
+
+def _int(value: Any) -> int:
+    return int(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+def record_llm_call(stage: str, response: Any, parsed: bool, complete: bool) -> None:
+    """단계별 지표 기록 (응답 usage가 없으면 토큰은 0으로)"""
+    usage = getattr(response, "usage", None)
+    finish_reason = getattr(response.choices[0], "finish_reason", None)
+    with _stats_lock:
+        stats = _stage_stats.setdefault(stage, Counter())
+        stats["calls"] += 1
+        stats["prompt_tokens"] += _int(getattr(usage, "prompt_tokens", 0))
+        stats["output_tokens"] += _int(getattr(usage, "completion_tokens", 0))
+        stats["truncated"] += finish_reason == "length"
+        stats["partial_recoveries"] += parsed and not complete
+        stats["parse_failures"] += not parsed
+
+
+def llm_stage_stats() -> Dict[str, Dict[str, Any]]:
+    """단계별 호출 수, 평균 출력 토큰, 파싱 실패율"""
+    with _stats_lock:
+        snapshot = {stage: dict(stats) for stage, stats in _stage_stats.items()}
+    for stats in snapshot.values():
+        calls = stats.get("calls", 0) or 1
+        stats["avg_output_tokens"] = round(stats.get("output_tokens", 0) / calls, 1)
+        stats["parse_failure_rate"] = round(stats.get("parse_failures", 0) / calls, 4)
+    return snapshot
+
+
+def reset_llm_stage_stats() -> None:
+    with _stats_lock:
+        _stage_stats.clear()
+
+
+def structured_completion(
+    client: Any,
+    stage: str,
+    schema: Dict[str, Any],
+    fields: Optional[Dict[str, Any]] = None,
+    **create_kwargs: Any,
+) -> Tuple[Optional[Any], bool]:
+    """스키마를 강제한 chat completion → (필드명을 펼친 결과, 완전한 응답 여부)
+
+    응답이 잘리면 복구된 부분 결과와 False를, 파싱할 수 없으면 (None, False)를 반환합니다.
+    """
+    response = client.chat.completions.create(
+        response_format=json_schema_format(stage, schema), **create_kwargs
+    )
+    message = response.choices[0].message
+    content = message.content if isinstance(message.content, str) else ""
+    value, complete = parse_partial_json(content)
+    if complete and getattr(response.choices[0], "finish_reason", None) == "length":
+        complete = False
+    record_llm_call(stage, response, value is not None, complete)
+    if value is not None and fields:
+        value = expand_fields(value, fields)
+    return value, complete
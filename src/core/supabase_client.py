@@ -1,13 +1,36 @@
 import os
+import asyncio
 import httpx
 import logging
-from typing import List, Dict, Any, Optional
+from datetime import date
+from typing import AsyncIterator, Dict, Any, List, Optional, Sequence
 
 logger = logging.getLogger(__name__)
 
+# HTTP/2 requires the optional `h2` package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Connection pool / timeout / retry settings
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY = 30.0
+REQUEST_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+CONNECT_RETRIES = 2
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.2
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+# Keyset pagination settings for inventory reads
+INVENTORY_PAGE_SIZE = 500
+
+
 class SupabaseManager:
     _instance = None
-    
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(SupabaseManager, cls).__new__(cls)
@@ -23,7 +46,9 @@ class SupabaseManager:
             "Content-Type": "application/json",
             "Prefer": "return=minimal"
         }
-        
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
         if not self.url or not self.key:
             logger.warning("Supabase credentials not found. DB features disabled.")
             self.disabled = True
@@ -33,6 +58,60 @@ class SupabaseManager:
             self.rest_url = f"{self.url}/rest/v1"
             logger.info("Supabase client initialized (REST mode).")
 
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Long-lived pooled client (keep-alive, HTTP/2 when available).
+        Re-created if the event loop changed, e.g. between test runs.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            limits = httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            )
+            transport = httpx.AsyncHTTPTransport(
+                http2=HTTP2_AVAILABLE,
+                limits=limits,
+                retries=CONNECT_RETRIES,
+            )
+            self._client = httpx.AsyncClient(
+                base_url=self.rest_url,
+                headers=self.headers,
+                timeout=REQUEST_TIMEOUT,
+                transport=transport,
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the pooled client (called from the app lifespan)."""
+        if self._client is not None and not self._client.is_closed:
+            try:
+                await self._client.aclose()
+            except RuntimeError:
+                # Event loop of the client is already closed
+                pass
+        self._client = None
+        self._client_loop = None
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send a request with retries on transient errors (429/5xx, timeouts)."""
+        attempt = 0
+        while True:
+            try:
+                resp = await self.client.request(method, path, **kwargs)
+                if resp.status_code not in RETRY_STATUS_CODES or attempt >= MAX_RETRIES:
+                    return resp
+                logger.warning(f"Supabase {resp.status_code}, retrying {method} {path}")
+            except (httpx.TimeoutException, httpx.RemoteProtocolError) as e:
+                if attempt >= MAX_RETRIES:
+                    raise
+                logger.warning(f"Supabase request error ({e}), retrying {method} {path}")
+            attempt += 1
+            await asyncio.sleep(RETRY_BACKOFF * (2 ** (attempt - 1)))
+
     async def save_inventory_items(self, items: List[Dict[str, Any]]) -> bool:
         """
         Save inventory items using PostgREST API.
@@ -45,51 +124,270 @@ class SupabaseManager:
             return True
 
         # Prepare payload
-        payload = []
-        for item in items:
-            payload.append({
-                "name": item.get("name"),
-                "quantity": item.get("quantity", 1),
-                "unit": item.get("unit", "개"),
-                "category": item.get("category", "기타"),
-                "purchase_date": item.get("purchase_date"),
-                "expiry_date": item.get("expiry_date"),
-                "confidence": item.get("confidence", 0.0)
-            })
+        payload = [self._to_row(item) for item in items]
+
+        try:
+            resp = await self._request("POST", "/inventory", json=payload)
+            if resp.status_code in (200, 201):
+                logger.info(f"Successfully saved {len(payload)} items to Supabase.")
+                return True
+            else:
+                logger.error(f"Supabase Error {resp.status_code}: {resp.text}")
+                return False
+        except Exception as e:
+            logger.error(f"Failed to save to Supabase: {e}")
+            return False
+
+    async def apply_inventory_delta(
+        self,
+        fridge_id: str,
+        upserts: List[Dict[str, Any]],
+        deleted_item_ids: List[str],
+    ) -> bool:
+        """
+        Persist only the changes between two scans of a fridge.
+        Rows are keyed by (fridge_id, item_id): changed rows are upserted,
+        consumed rows are deleted.
+        """
+        if self.disabled:
+            logger.warning("Supabase disabled, skipping delta save.")
+            return False
+
+        if not upserts and not deleted_item_ids:
+            return True
+
+        ok = True
+        try:
+            if upserts:
+                payload = []
+                for item in upserts:
+                    row = self._to_row(item)
+                    row["fridge_id"] = fridge_id
+                    row["item_id"] = item.get("item_id")
+                    row["location"] = item.get("location")
+                    payload.append(row)
+                resp = await self._request(
+                    "POST",
+                    "/inventory",
+                    params={"on_conflict": "fridge_id,item_id"},
+                    headers={"Prefer": "resolution=merge-duplicates,return=minimal"},
+                    json=payload
+                )
+                if resp.status_code not in (200, 201, 204):
+                    logger.error(f"Supabase Upsert Error {resp.status_code}: {resp.text}")
+                    ok = False
+
+            if deleted_item_ids:
+                ids = ",".join(f'"{item_id}"' for item_id in deleted_item_ids)
+                resp = await self._request(
+                    "DELETE",
+                    "/inventory",
+                    params={"fridge_id": f"eq.{fridge_id}", "item_id": f"in.({ids})"}
+                )
+                if resp.status_code not in (200, 204):
+                    logger.error(f"Supabase Delete Error {resp.status_code}: {resp.text}")
+                    ok = False
+
+            if ok:
+                logger.info(
+                    f"Saved inventory delta for {fridge_id}: "
+                    f"{len(upserts)} upserted, {len(deleted_item_ids)} deleted."
+                )
+            return ok
+        except Exception as e:
+            logger.error(f"Failed to save delta to Supabase: {e}")
+            return False
+
+    async def apply_inventory_batch(self, ops: List[Dict[str, Any]]) -> bool:
+        """
+        Apply several queued deltas (possibly from different fridges) at once.
+        Later ops win per (fridge_id, item_id), so the batch becomes one
+        upsert request plus one delete request per fridge.
+        """
+        if self.disabled:
+            logger.warning("Supabase disabled, dropping queued writes.")
+            return True
+
+        upserts: Dict[tuple, Dict[str, Any]] = {}
+        deletes: Dict[tuple, None] = {}
+        for op in ops:
+            fridge_id = op["fridge_id"]
+            for item in op.get("upserts", []):
+                key = (fridge_id, item.get("item_id"))
+                deletes.pop(key, None)
+                upserts[key] = item
+            for item_id in op.get("deleted_item_ids", []):
+                key = (fridge_id, item_id)
+                upserts.pop(key, None)
+                deletes[key] = None
 
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.post(
-                    f"{self.rest_url}/inventory",
-                    headers=self.headers,
+            if upserts:
+                payload = []
+                for (fridge_id, item_id), item in upserts.items():
+                    row = self._to_row(item)
+                    row["fridge_id"] = fridge_id
+                    row["item_id"] = item_id
+                    row["location"] = item.get("location")
+                    payload.append(row)
+                resp = await self._request(
+                    "POST",
+                    "/inventory",
+                    params={"on_conflict": "fridge_id,item_id"},
+                    headers={"Prefer": "resolution=merge-duplicates,return=minimal"},
                     json=payload
                 )
-                if resp.status_code in (200, 201):
-                    logger.info(f"Successfully saved {len(payload)} items to Supabase.")
-                    return True
-                else:
-                    logger.error(f"Supabase Error {resp.status_code}: {resp.text}")
+                if resp.status_code not in (200, 201, 204):
+                    logger.error(f"Supabase Upsert Error {resp.status_code}: {resp.text}")
+                    return False
+
+            deleted_by_fridge: Dict[str, List[str]] = {}
+            for fridge_id, item_id in deletes:
+                deleted_by_fridge.setdefault(fridge_id, []).append(item_id)
+            for fridge_id, item_ids in deleted_by_fridge.items():
+                ids = ",".join(f'"{item_id}"' for item_id in item_ids)
+                resp = await self._request(
+                    "DELETE",
+                    "/inventory",
+                    params={"fridge_id": f"eq.{fridge_id}", "item_id": f"in.({ids})"}
+                )
+                if resp.status_code not in (200, 204):
+                    logger.error(f"Supabase Delete Error {resp.status_code}: {resp.text}")
                     return False
+
+            logger.info(
+                f"Flushed {len(ops)} queued deltas to Supabase: "
+                f"{len(upserts)} upserted, {len(deletes)} deleted."
+            )
+            return True
         except Exception as e:
-            logger.error(f"Failed to save to Supabase: {e}")
+            logger.error(f"Failed to flush batch to Supabase: {e}")
             return False
 
+    @staticmethod
+    def _to_row(item: Dict[str, Any]) -> Dict[str, Any]:
+        """Map an inventory/expiry item to an `inventory` table row."""
+        return {
+            "name": item.get("name"),
+            "quantity": item.get("quantity", 1),
+            "unit": item.get("unit", "개"),
+            "category": item.get("category", "기타"),
+            "purchase_date": item.get("purchase_date"),
+            "expiry_date": item.get("expiry_date"),
+            "confidence": item.get("confidence", 0.0)
+        }
+
+    @staticmethod
+    def _inventory_filters(
+        fridge_id: Optional[str] = None,
+        categories: Optional[Sequence[str]] = None,
+        exclude_expired: bool = False,
+        expiring_before: Optional[date] = None,
+        today: Optional[date] = None,
+    ) -> Dict[str, str]:
+        """Build PostgREST filter params for the inventory table."""
+        params: Dict[str, str] = {}
+        if fridge_id:
+            params["fridge_id"] = f"eq.{fridge_id}"
+        if categories:
+            quoted = ",".join(f'"{c}"' for c in categories)
+            params["category"] = f"in.({quoted})"
+        if exclude_expired:
+            # Items without an expiry date are never considered expired
+            today = today or date.today()
+            params["or"] = f"(expiry_date.gte.{today.isoformat()},expiry_date.is.null)"
+        if expiring_before:
+            params["expiry_date"] = f"lte.{expiring_before.isoformat()}"
+        return params
+
+    async def iter_inventory(
+        self,
+        columns: Sequence[str] = ("*",),
+        fridge_id: Optional[str] = None,
+        categories: Optional[Sequence[str]] = None,
+        exclude_expired: bool = False,
+        expiring_before: Optional[date] = None,
+        limit: Optional[int] = None,
+        page_size: int = INVENTORY_PAGE_SIZE,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream inventory rows page by page.
+        Uses keyset pagination on `id` (id > last seen id), so each page is an
+        index range scan regardless of how deep the iteration goes. Only the
+        requested columns are transferred and filters are applied server-side.
+        """
+        if self.disabled:
+            return
+
+        select = list(columns)
+        if "*" not in select and "id" not in select:
+            select.append("id")  # keyset cursor
+        params = self._inventory_filters(fridge_id, categories, exclude_expired, expiring_before)
+        params["select"] = ",".join(select)
+        params["order"] = "id.asc"
+
+        last_id = None
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page_limit = page_size if remaining is None else min(page_size, remaining)
+            page_params = dict(params, limit=str(page_limit))
+            if last_id is not None:
+                page_params["id"] = f"gt.{last_id}"
+
+            resp = await self._request("GET", "/inventory", params=page_params)
+            if resp.status_code != 200:
+                logger.error(f"Supabase Fetch Error {resp.status_code}: {resp.text}")
+                return
+            rows = resp.json()
+            for row in rows:
+                yield row
+            if remaining is not None:
+                remaining -= len(rows)
+            if len(rows) < page_limit:
+                return
+            last_id = rows[-1].get("id")
+            if last_id is None:
+                return
+
+    async def query_inventory(
+        self,
+        columns: Sequence[str] = ("*",),
+        fridge_id: Optional[str] = None,
+        categories: Optional[Sequence[str]] = None,
+        exclude_expired: bool = False,
+        expiring_before: Optional[date] = None,
+        limit: Optional[int] = None,
+        page_size: int = INVENTORY_PAGE_SIZE,
+    ) -> List[Dict[str, Any]]:
+        """Collect `iter_inventory` results into a list (errors yield an empty/partial list)."""
+        rows: List[Dict[str, Any]] = []
+        try:
+            async for row in self.iter_inventory(
+                columns=columns,
+                fridge_id=fridge_id,
+                categories=categories,
+                exclude_expired=exclude_expired,
+                expiring_before=expiring_before,
+                limit=limit,
+                page_size=page_size,
+            ):
+                rows.append(row)
+        except Exception as e:
+            logger.error(f"Failed to query Supabase inventory: {e}")
+        return rows
+
     async def get_all_inventory(self) -> List[Dict[str, Any]]:
-        """Fetch all inventory."""
+        """Fetch all inventory (unbounded; prefer `query_inventory` for reads)."""
         if self.disabled:
              return []
-             
+
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(
-                    f"{self.rest_url}/inventory?select=*",
-                    headers=self.headers
-                )
-                if resp.status_code == 200:
-                    return resp.json()
-                else:
-                    logger.error(f"Supabase Fetch Error: {resp.text}")
-                    return []
+            resp = await self._request("GET", "/inventory", params={"select": "*"})
+            if resp.status_code == 200:
+                return resp.json()
+            else:
+                logger.error(f"Supabase Fetch Error: {resp.text}")
+                return []
         except Exception as e:
              logger.error(f"Failed to fetch from Supabase: {e}")
              return []
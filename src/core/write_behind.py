@@ -0,0 +1,274 @@
+"""Write-behind 영속화 큐
+
+요청 경로에서는 변경분을 로컬 스풀 파일(JSONL, fsync)에 기록한 뒤 바로 반환하고,
+백그라운드 태스크가 여러 요청의 변경분을 모아 N행 또는 T밀리초 단위로
+Supabase에 일괄 반영합니다. 반영에 실패하거나 프로세스가 재시작되어도
+스풀 파일에 남은 변경분은 다음 기동 시 재전송됩니다 (at-least-once).
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_PATH = "./data/spool/supabase_writes.jsonl"
+DEFAULT_MAX_BATCH_ROWS = int(os.getenv("WRITE_BEHIND_MAX_ROWS", 500))
+DEFAULT_MAX_DELAY_MS = int(os.getenv("WRITE_BEHIND_MAX_DELAY_MS", 200))
+MAX_RETRY_BACKOFF = 30.0
+
+# 하나의 op: {"fridge_id": str, "upserts": [행...], "deleted_item_ids": [id...]}
+BatchSink = Callable[[List[Dict[str, Any]]], Awaitable[bool]]
+
+
+def op_row_count(op: Dict[str, Any]) -> int:
+    return len(op.get("upserts", [])) + len(op.get("deleted_item_ids", []))
+
+
+class WriteBehindQueue:
+    """스풀 파일 기반 write-behind 배치 큐"""
+
+    def __init__(
+        self,
+        sink: BatchSink,
+        spool_path: str = DEFAULT_SPOOL_PATH,
+        max_batch_rows: int = DEFAULT_MAX_BATCH_ROWS,
+        max_delay_ms: int = DEFAULT_MAX_DELAY_MS,
+    ):
+        self.sink = sink
+        self.spool_path = Path(spool_path)
+        self.max_batch_rows = max_batch_rows
+        self.max_delay = max_delay_ms / 1000
+
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_rows = 0
+        self._oldest_at: Optional[float] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._spool_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._stats = {
+            "enqueued_ops": 0,
+            "flushed_ops": 0,
+            "flushed_rows": 0,
+            "flush_count": 0,
+            "flush_failures": 0,
+            "replayed_ops": 0,
+            "last_flush_ms": 0.0,
+            "avg_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "last_batch_rows": 0,
+            "last_queue_lag_ms": 0.0,
+        }
+
+    # ── 수명주기 ──────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        """스풀 재생 후 백그라운드 플러시 태스크 시작"""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._spool_lock = asyncio.Lock()
+        self._pending, self._pending_rows, self._oldest_at = [], 0, None
+
+        replayed = await asyncio.to_thread(self._read_spool)
+        if replayed:
+            logger.info(f"스풀에서 미반영 변경분 {len(replayed)}건 재전송 예정")
+            self._stats["replayed_ops"] += len(replayed)
+            for op in replayed:
+                self._push(op)
+
+        self._task = loop.create_task(self._run())
+
+    async def stop(self, flush: bool = True) -> None:
+        """플러시 태스크 종료 (남은 변경분은 가능하면 반영, 실패 시 스풀에 유지)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if flush and self._pending:
+            await self._flush_once()
+
+    # ── 요청 경로 ─────────────────────────────────────────────────────
+
+    async def enqueue(self, op: Dict[str, Any]) -> None:
+        """변경분을 스풀에 기록하고 즉시 반환"""
+        if op_row_count(op) == 0:
+            return
+        await self.start()
+        # 스풀 재작성과 경합하지 않도록 기록과 대기열 추가를 같은 락 안에서 수행
+        async with self._spool_lock:
+            await asyncio.to_thread(self._append_spool, op)
+            self._push(op)
+        self._stats["enqueued_ops"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """큐 깊이 및 플러시 지연 지표"""
+        oldest_age_ms = (
+            (time.monotonic() - self._oldest_at) * 1000 if self._oldest_at else 0.0
+        )
+        return {
+            **self._stats,
+            "queue_depth_ops": len(self._pending),
+            "queue_depth_rows": self._pending_rows,
+            "oldest_pending_ms": round(oldest_age_ms, 1),
+            "max_batch_rows": self.max_batch_rows,
+            "max_delay_ms": self.max_delay * 1000,
+        }
+
+    # ── 내부 구현 ─────────────────────────────────────────────────────
+
+    def _push(self, op: Dict[str, Any]) -> None:
+        if not self._pending:
+            self._oldest_at = time.monotonic()
+        self._pending.append(op)
+        self._pending_rows += op_row_count(op)
+        self._wake.set()
+
+    async def _run(self) -> None:
+        backoff = self.max_delay or 0.1
+        while True:
+            if not self._pending:
+                self._wake.clear()
+                await self._wake.wait()
+
+            # N행이 모이거나 가장 오래된 변경분이 T밀리초를 넘을 때까지 대기
+            deadline = (self._oldest_at or time.monotonic()) + self.max_delay
+            while self._pending_rows < self.max_batch_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+            if await self._flush_once():
+                backoff = self.max_delay or 0.1
+            else:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, MAX_RETRY_BACKOFF)
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        """최대 N행까지 op 단위로 꺼냄 (op는 쪼개지 않음)"""
+        batch, rows = [], 0
+        while self._pending and (not batch or rows + op_row_count(self._pending[0]) <= self.max_batch_rows):
+            op = self._pending.pop(0)
+            rows += op_row_count(op)
+            batch.append(op)
+        self._pending_rows -= rows
+        return batch
+
+    async def _flush_once(self) -> bool:
+        if not self._pending:
+            return True
+
+        oldest_at = self._oldest_at
+        batch = self._take_batch()
+        rows = sum(op_row_count(op) for op in batch)
+        self._oldest_at = time.monotonic() if self._pending else None
+
+        start = time.perf_counter()
+        try:
+            ok = await self.sink(batch)
+        except Exception as e:
+            logger.error(f"Write-behind 반영 오류: {e}")
+            ok = False
+        except BaseException:
+            # 반영 도중 취소(stop)되어도 배치를 잃지 않도록 되돌린 뒤 전파
+            self._restore(batch, rows, oldest_at)
+            raise
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if not ok:
+            self._restore(batch, rows, oldest_at)
+            self._stats["flush_failures"] += 1
+            return False
+
+        stats = self._stats
+        stats["flush_count"] += 1
+        stats["flushed_ops"] += len(batch)
+        stats["flushed_rows"] += rows
+        stats["last_batch_rows"] = rows
+        stats["last_flush_ms"] = round(elapsed_ms, 2)
+        stats["max_flush_ms"] = round(max(stats["max_flush_ms"], elapsed_ms), 2)
+        stats["avg_flush_ms"] = round(
+            stats["avg_flush_ms"] + (elapsed_ms - stats["avg_flush_ms"]) / stats["flush_count"], 2
+        )
+        if oldest_at:
+            stats["last_queue_lag_ms"] = round((time.monotonic() - oldest_at) * 1000, 1)
+
+        # 반영된 변경분을 스풀에서 제거 (남은 대기분으로 재작성)
+        async with self._spool_lock:
+            await asyncio.to_thread(self._rewrite_spool, list(self._pending))
+        return True
+
+    def _restore(self, batch: List[Dict[str, Any]], rows: int, oldest_at: Optional[float]) -> None:
+        """꺼낸 배치를 순서를 유지하며 대기열 앞에 되돌림 (스풀에는 그대로 남아 있음)"""
+        self._pending[:0] = batch
+        self._pending_rows += rows
+        self._oldest_at = oldest_at
+
+    def _append_spool(self, op: Dict[str, Any]) -> None:
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spool_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(op, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rewrite_spool(self, pending: List[Dict[str, Any]]) -> None:
+        if not pending:
+            if self.spool_path.exists():
+                open(self.spool_path, "w").close()
+            return
+        tmp_path = self.spool_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for op in pending:
+                f.write(json.dumps(op, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.spool_path)
+
+    def _read_spool(self) -> List[Dict[str, Any]]:
+        if not self.spool_path.exists():
+            return []
+        ops = []
+        with open(self.spool_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    ops.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # 기록 도중 중단된 마지막 줄
+                    logger.warning("손상된 스풀 레코드를 건너뜁니다")
+        return ops
+
+
+# 전역 인스턴스
+_persistence_queue: Optional[WriteBehindQueue] = None
+
+
+def get_persistence_queue() -> WriteBehindQueue:
+    """Supabase write-behind 큐 인스턴스 반환"""
+    global _persistence_queue
+    if _persistence_queue is None:
+        from .supabase_client import SupabaseManager
+
+        _persistence_queue = WriteBehindQueue(
+            sink=SupabaseManager().apply_inventory_batch,
+            spool_path=os.getenv("WRITE_BEHIND_SPOOL_PATH", DEFAULT_SPOOL_PATH),
+        )
+    return _persistence_queue
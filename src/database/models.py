@@ -1,31 +1,77 @@
-"""Database models (SQLAlchemy) - 향후 확장용"""
-# 현재는 인메모리 저장소 사용
-# PostgreSQL 연동 시 SQLAlchemy 모델로 확장 가능
-
-from datetime import datetime
-from typing import Optional
-# from sqlalchemy import Column, String, Integer, Float, DateTime, Text
-# from sqlalchemy.ext.declarative import declarative_base
-# 
-# Base = declarative_base()
-# 
-# class Inventory(Base):
-#     __tablename__ = "inventory"
-#     
-#     id = Column(String, primary_key=True)
-#     item_name = Column(String(100), nullable=False)
-#     category = Column(String(50))
-#     quantity = Column(Float)
-#     unit = Column(String(20))
-#     added_date = Column(DateTime, default=datetime.now)
-#     last_updated = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-#     location = Column(String(50))  # 냉장/냉동/실온
-# 
-# class ExpiryInfo(Base):
-#     __tablename__ = "expiry_info"
-#     
-#     id = Column(String, primary_key=True)
-#     item_name = Column(String(100), nullable=False)
-#     base_days = Column(Integer)
-#     storage = Column(String(50))
-#     notes = Column(Text)
+"""Database models (SQLAlchemy)
+
+로컬은 SQLite(WAL), 운영은 PostgreSQL을 사용합니다 (session.py 참고).
+user_id는 냉장고(사용자) 식별자로, 재고 엔진의 fridge_id와 같은 값입니다.
+"""
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import (
+    JSON,
+    Date,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Inventory(Base):
+    __tablename__ = "inventory"
+    __table_args__ = (
+        # (user_id, item_id) 기준 bulk upsert
+        UniqueConstraint("user_id", "item_id", name="uq_inventory_user_item"),
+        Index("idx_inventory_user_id", "user_id"),
+        Index("idx_inventory_expiry_date", "expiry_date"),
+        Index("idx_inventory_location", "location"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    item_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    item_name: Mapped[str] = mapped_column(String(100), nullable=False)
+    category: Mapped[Optional[str]] = mapped_column(String(50))
+    quantity: Mapped[Optional[float]] = mapped_column(Float)
+    unit: Mapped[Optional[str]] = mapped_column(String(20))
+    location: Mapped[Optional[str]] = mapped_column(String(50))  # 냉장/냉동/실온
+    bbox_2d: Mapped[Optional[List[float]]] = mapped_column(JSON)
+    purchase_date: Mapped[Optional[date]] = mapped_column(Date)
+    expiry_date: Mapped[Optional[date]] = mapped_column(Date)
+    added_date: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    last_updated: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, onupdate=datetime.now
+    )
+
+    def to_record(self) -> Dict[str, Any]:
+        """재고 엔진 레코드 형식으로 변환"""
+        return {
+            "item_id": self.item_id,
+            "name": self.item_name,
+            "category": self.category,
+            "quantity": self.quantity,
+            "unit": self.unit,
+            "location": self.location,
+            "bbox_2d": self.bbox_2d,
+            "purchase_date": self.purchase_date.isoformat() if self.purchase_date else None,
+            "expiry_date": self.expiry_date.isoformat() if self.expiry_date else None,
+            "added_date": self.added_date.isoformat() if self.added_date else None,
+            "last_updated": self.last_updated.isoformat() if self.last_updated else None,
+        }
+
+
+class ExpiryInfo(Base):
+    __tablename__ = "expiry_info"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    item_name: Mapped[str] = mapped_column(String(100), nullable=False, unique=True)
+    base_days: Mapped[Optional[int]] = mapped_column(Integer)
+    storage: Mapped[Optional[str]] = mapped_column(String(50))
+    notes: Mapped[Optional[str]] = mapped_column(Text)
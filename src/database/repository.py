@@ -0,0 +1,185 @@
+"""Inventory Repository - 재고 영속화 (bulk upsert / 차이 반영)"""
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from .session import DATABASE_AVAILABLE, get_engine, get_sessionmaker, init_db
+
+logger = logging.getLogger(__name__)
+
+if DATABASE_AVAILABLE:
+    from sqlalchemy import delete, select
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+    from .models import Inventory
+
+# upsert 시 갱신할 컬럼 (added_date 는 최초 값 유지)
+_UPSERT_UPDATE_COLUMNS = (
+    "item_name",
+    "category",
+    "quantity",
+    "unit",
+    "location",
+    "bbox_2d",
+    "purchase_date",
+    "expiry_date",
+    "last_updated",
+)
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    if value is None or isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _parse_datetime(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return datetime.now()
+
+
+def record_to_row(user_id: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """재고 엔진 레코드 -> inventory 테이블 행"""
+    return {
+        "user_id": user_id,
+        "item_id": record["item_id"],
+        "item_name": record.get("name") or "알 수 없음",
+        "category": record.get("category"),
+        "quantity": record.get("quantity"),
+        "unit": record.get("unit"),
+        "location": record.get("location"),
+        "bbox_2d": record.get("bbox_2d"),
+        "purchase_date": _parse_date(record.get("purchase_date")),
+        "expiry_date": _parse_date(record.get("expiry_date")),
+        "added_date": _parse_datetime(record.get("added_date")),
+        "last_updated": _parse_datetime(record.get("last_updated")),
+    }
+
+
+class InventoryRepository:
+    """냉장고별 재고 테이블 접근 계층"""
+
+    UPSERT_CHUNK_SIZE = 1000
+
+    def __init__(self):
+        self._schema_ready = False
+
+    @property
+    def available(self) -> bool:
+        return get_engine() is not None
+
+    async def _ensure_schema(self) -> bool:
+        if not self._schema_ready:
+            self._schema_ready = await init_db()
+        return self._schema_ready
+
+    def _insert(self):
+        """현재 DB 방언에 맞는 INSERT 생성자"""
+        if get_engine().dialect.name == "postgresql":
+            return pg_insert(Inventory)
+        return sqlite_insert(Inventory)
+
+    async def bulk_upsert(self, user_id: str, records: Iterable[Dict[str, Any]]) -> int:
+        """(user_id, item_id) 기준 bulk upsert, 반영된 행 수 반환"""
+        if not await self._ensure_schema():
+            return 0
+
+        rows = [record_to_row(user_id, r) for r in records]
+        if not rows:
+            return 0
+
+        async with get_sessionmaker()() as session:
+            async with session.begin():
+                await self._upsert_rows(session, rows)
+        return len(rows)
+
+    async def bulk_upsert_rows(self, rows: List[Dict[str, Any]]) -> int:
+        """이미 변환된 여러 사용자의 행을 한 번에 upsert (대량 적재용)"""
+        if not await self._ensure_schema():
+            return 0
+        async with get_sessionmaker()() as session:
+            async with session.begin():
+                await self._upsert_rows(session, rows)
+        return len(rows)
+
+    async def _upsert_rows(self, session, rows: List[Dict[str, Any]]) -> None:
+        stmt = self._insert()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "item_id"],
+            set_={col: stmt.excluded[col] for col in _UPSERT_UPDATE_COLUMNS},
+        )
+        for start in range(0, len(rows), self.UPSERT_CHUNK_SIZE):
+            await session.execute(stmt, rows[start:start + self.UPSERT_CHUNK_SIZE])
+
+    async def apply_delta(
+        self,
+        user_id: str,
+        upserts: List[Dict[str, Any]],
+        deleted_item_ids: List[str],
+    ) -> bool:
+        """스캔 차이를 하나의 트랜잭션으로 반영"""
+        if not upserts and not deleted_item_ids:
+            return True
+        if not await self._ensure_schema():
+            return False
+
+        async with get_sessionmaker()() as session:
+            async with session.begin():
+                if upserts:
+                    await self._upsert_rows(
+                        session, [record_to_row(user_id, r) for r in upserts]
+                    )
+                if deleted_item_ids:
+                    await session.execute(
+                        delete(Inventory).where(
+                            Inventory.user_id == user_id,
+                            Inventory.item_id.in_(deleted_item_ids),
+                        )
+                    )
+        return True
+
+    async def load_inventory(self, user_id: str) -> List[Dict[str, Any]]:
+        """냉장고 전체 재고를 엔진 레코드 형식으로 로드"""
+        if not await self._ensure_schema():
+            return []
+
+        async with get_sessionmaker()() as session:
+            result = await session.execute(
+                select(Inventory).where(Inventory.user_id == user_id)
+            )
+            return [row.to_record() for row in result.scalars()]
+
+    async def find_expiring(
+        self, user_id: str, until: date, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """유통기한이 until 이전인 재고 (expiry_date 인덱스 사용)"""
+        if not await self._ensure_schema():
+            return []
+
+        async with get_sessionmaker()() as session:
+            result = await session.execute(
+                select(Inventory)
+                .where(Inventory.user_id == user_id, Inventory.expiry_date <= until)
+                .order_by(Inventory.expiry_date)
+                .limit(limit)
+            )
+            return [row.to_record() for row in result.scalars()]
+
+
+# 전역 인스턴스
+_inventory_repository: Optional[InventoryRepository] = None
+
+
+def get_inventory_repository() -> InventoryRepository:
+    """재고 저장소 인스턴스 반환"""
+    global _inventory_repository
+    if _inventory_repository is None:
+        _inventory_repository = InventoryRepository()
+    return _inventory_repository
@@ -1,14 +1,20 @@
--- 향후 PostgreSQL 연동 시 사용할 스키마
+-- PostgreSQL 스키마 (src/database/models.py 와 동일, 앱 시작 시 자동 생성됨)
 
 CREATE TABLE IF NOT EXISTS inventory (
-    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    id SERIAL PRIMARY KEY,
+    user_id VARCHAR(64) NOT NULL, -- 냉장고(사용자) 식별자
+    item_id VARCHAR(64) NOT NULL, -- 재고 엔진 레코드 ID
     item_name VARCHAR(100) NOT NULL,
     category VARCHAR(50),
-    quantity DECIMAL,
+    quantity DOUBLE PRECISION,
     unit VARCHAR(20),
+    location VARCHAR(50), -- 냉장/냉동/실온
+    bbox_2d JSON,
+    purchase_date DATE,
+    expiry_date DATE,
     added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    location VARCHAR(50) -- 냉장/냉동/실온
+    CONSTRAINT uq_inventory_user_item UNIQUE (user_id, item_id)
 );
 
 CREATE TABLE IF NOT EXISTS expiry_info (
@@ -31,5 +37,8 @@ CREATE TABLE IF NOT EXISTS recipes (
 );
 
 CREATE INDEX IF NOT EXISTS idx_inventory_item_name ON inventory(item_name);
+CREATE INDEX IF NOT EXISTS idx_inventory_user_id ON inventory(user_id);
+CREATE INDEX IF NOT EXISTS idx_inventory_expiry_date ON inventory(expiry_date);
+CREATE INDEX IF NOT EXISTS idx_inventory_location ON inventory(location);
 CREATE INDEX IF NOT EXISTS idx_expiry_item_name ON expiry_info(item_name);
 CREATE INDEX IF NOT EXISTS idx_recipes_title ON recipes(title);
@@ -0,0 +1,119 @@
+"""비동기 DB 엔진/세션 설정
+
+DATABASE_URL 이 없으면 로컬 SQLite(WAL 모드)를 사용합니다.
+postgres:// 형식의 URL은 asyncpg 드라이버로 변환합니다.
+"""
+import os
+import logging
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATABASE_URL = "sqlite+aiosqlite:///./data/fridge.db"
+
+# 비동기 드라이버 선택적 임포트
+try:
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import (
+        AsyncEngine,
+        AsyncSession,
+        async_sessionmaker,
+        create_async_engine,
+    )
+    DATABASE_AVAILABLE = True
+except ImportError:
+    DATABASE_AVAILABLE = False
+    AsyncEngine = None
+    AsyncSession = None
+
+_engine: Optional["AsyncEngine"] = None
+_sessionmaker = None
+
+
+def get_database_url() -> str:
+    """환경 변수에서 비동기 드라이버용 DB URL 반환"""
+    url = os.getenv("DATABASE_URL") or DEFAULT_DATABASE_URL
+    if url.startswith("postgres://"):
+        url = "postgresql+asyncpg://" + url[len("postgres://"):]
+    elif url.startswith("postgresql://"):
+        url = "postgresql+asyncpg://" + url[len("postgresql://"):]
+    elif url.startswith("sqlite:///"):
+        url = "sqlite+aiosqlite:///" + url[len("sqlite:///"):]
+    return url
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """SQLite 연결마다 WAL 모드 및 동기화 수준 설정"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def create_engine_for_url(url: str) -> "AsyncEngine":
+    """URL에 맞는 커넥션 풀 설정으로 엔진 생성"""
+    if url.startswith("sqlite"):
+        db_path = url.split("///", 1)[-1]
+        if db_path and db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        engine = create_async_engine(url, pool_size=5, max_overflow=5)
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+        return engine
+
+    return create_async_engine(
+        url,
+        pool_size=int(os.getenv("DATABASE_POOL_SIZE", 10)),
+        max_overflow=int(os.getenv("DATABASE_MAX_OVERFLOW", 20)),
+        pool_pre_ping=True,
+        pool_recycle=1800,
+    )
+
+
+def get_engine() -> Optional["AsyncEngine"]:
+    """전역 비동기 엔진 반환 (드라이버가 없으면 None)"""
+    global _engine
+    if not DATABASE_AVAILABLE:
+        return None
+    if _engine is None:
+        try:
+            _engine = create_engine_for_url(get_database_url())
+        except Exception as e:
+            logger.error(f"DB 엔진 생성 실패: {e}")
+            return None
+    return _engine
+
+
+def get_sessionmaker():
+    """풀링된 AsyncSession 팩토리 반환 (DB 사용 불가 시 None)"""
+    global _sessionmaker
+    if _sessionmaker is None:
+        engine = get_engine()
+        if engine is None:
+            return None
+        _sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    return _sessionmaker
+
+
+async def init_db() -> bool:
+    """테이블 생성 (없을 때만)"""
+    engine = get_engine()
+    if engine is None:
+        logger.warning("비동기 DB 드라이버가 없어 로컬 재고 DB를 사용하지 않습니다.")
+        return False
+
+    from .models import Base
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return True
+
+
+async def dispose_engine() -> None:
+    """커넥션 풀 정리"""
+    global _engine, _sessionmaker
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = None
+    _sessionmaker = None
@@ -11,6 +11,16 @@ create table if not exists inventory (
   created_at timestamp with time zone default timezone('utc'::text, now())
 );
 
+-- Per-fridge delta persistence: rows are keyed by (fridge_id, item_id)
+alter table inventory add column if not exists fridge_id text default 'default';
+alter table inventory add column if not exists item_id text;
+alter table inventory add column if not exists location text;
+create unique index if not exists inventory_fridge_item_idx on inventory (fridge_id, item_id);
+
+-- Keyset pagination (id > cursor) and server-side filters for inventory reads
+create index if not exists inventory_fridge_id_idx on inventory (fridge_id, id);
+create index if not exists inventory_expiry_date_idx on inventory (expiry_date);
+
 -- Enable Row Level Security (RLS)
 alter table inventory enable row level security;
 
@@ -0,0 +1,436 @@
+"""인프로세스 벡터 인덱스 (chromadb 없을 때 RecipeVectorStore가 사용)
+
+정규화한 float32 벡터를 연속된 memmap 행렬에 두고 내적(코사인)으로 검색합니다.
+작은 코퍼스는 행렬곱 한 번으로 전수 검색하고, 행 수가 `ANN_BRUTE_FORCE_MAX`를
+넘으면 IVF(구면 k-means 군집 → 질의와 가까운 `nprobe`개 군집만 탐색)로 전환합니다.
+
+디스크 구성 (`persist_directory/<name>.*`):
+- `.f32`        벡터 행렬 (행 번호 = 문서 순서, 용량은 두 배씩 확장)
+- `.ids`        행 번호 순 문서 ID (이 파일에 기록된 행만 유효)
+- `.docs.jsonl` 문서 본문/메타데이터 추가 로그 (같은 ID는 마지막 기록이 유효, 덮어쓴
+                기록이 쌓이면 ID당 한 줄로 압축)
+- `.json`       차원과 인덱스 속성 (스키마 버전 등)
+- `.ivf.npz`    IVF 중심점과 학습 시점 행 수
+
+검색 필터는 ChromaDB와 같은 형식의 `where`(메타데이터)와 `where_document`(본문)를
+받습니다. 메타데이터 조건은 필드별 열 배열로 한 번에 마스킹하고, 본문 조건은 점수 순으로
+후보를 보면서 확인하므로 필터를 통과한 결과로 top_k를 채웁니다.
+"""
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ANN_BRUTE_FORCE_MAX = int(os.getenv("ANN_BRUTE_FORCE_MAX", 20_000))
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", 16))
+MIN_CAPACITY = 1024
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+ASSIGN_BLOCK_ROWS = 16_384
+COMPACT_MIN_RECORDS = 1024  # 로그가 이만큼 + 문서 수의 두 배를 넘으면 압축
+
+SearchResult = Tuple[str, float, Dict[str, Any]]
+Where = Dict[str, Any]
+
+_COMPARATORS = {
+    "$eq": np.equal,
+    "$ne": np.not_equal,
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal,
+}
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """점수 상위 k개 위치 (내림차순)"""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def document_matches(document: str, where_document: Optional[Where]) -> bool:
+    """본문 조건 ($contains / $not_contains / $and / $or)"""
+    if not where_document:
+        return True
+    (op, value), = where_document.items()
+    if op == "$and":
+        return all(document_matches(document, c) for c in value)
+    if op == "$or":
+        return any(document_matches(document, c) for c in value)
+    if op == "$contains":
+        return value in document
+    if op == "$not_contains":
+        return value not in document
+    raise ValueError(f"지원하지 않는 본문 조건입니다: {op}")
+
+
+class NumpyVectorIndex:
+    """memmap 기반 벡터 인덱스 (전수 검색 / IVF)"""
+
+    def __init__(
+        self,
+        persist_directory: str,
+        name: str,
+        brute_force_max: int = ANN_BRUTE_FORCE_MAX,
+        nprobe: int = ANN_NPROBE,
+    ):
+        self.directory = Path(persist_directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.name = name
+        self.brute_force_max = brute_force_max
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+
+        self.dim: Optional[int] = None
+        self.attributes: Dict[str, Any] = {}
+        self._matrix: Optional[np.memmap] = None
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._docs: Dict[str, str] = {}
+        self._metas: Dict[str, Dict[str, Any]] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+        self._log_records = 0  # .docs.jsonl 줄 수
+
+        # IVF 상태
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_rows = 0
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._list_order: Optional[np.ndarray] = None
+        self._list_offsets: Optional[np.ndarray] = None
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def uses_ivf(self) -> bool:
+        return self._centroids is not None
+
+    # ── 쓰기 ──────────────────────────────────────────────────────────
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        vectors,
+        documents: Sequence[str],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> None:
+        """ID 기준 추가/갱신 (기존 ID는 같은 행을 덮어씀)"""
+        if not ids:
+            return
+        vectors = _normalize(vectors)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._write_meta()
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"벡터 차원이 인덱스와 다릅니다: {vectors.shape[1]} != {self.dim}")
+
+            # 배치 안의 중복 ID는 마지막 것만 사용
+            latest = {doc_id: i for i, doc_id in enumerate(ids)}
+            new_ids = [doc_id for doc_id in latest if doc_id not in self._rows]
+            start = len(self._ids)
+            self._ensure_capacity(start + len(new_ids))
+
+            new_rows = {doc_id: start + offset for offset, doc_id in enumerate(new_ids)}
+            rows = np.array(
+                [self._rows.get(doc_id, new_rows.get(doc_id)) for doc_id in latest], dtype=np.int64
+            )
+            source = np.fromiter(latest.values(), dtype=np.int64, count=len(latest))
+            self._matrix[rows] = vectors[source]
+            self._matrix.flush()
+
+            # 본문 → ID 순서로 기록 (ID 파일에 오른 행만 유효하므로 중단되어도 일관됨)
+            with open(self._path(".docs.jsonl"), "a", encoding="utf-8") as f:
+                for doc_id, i in latest.items():
+                    meta = dict(metadatas[i]) if metadatas else {}
+                    f.write(json.dumps(
+                        {"id": doc_id, "doc": documents[i], "meta": meta}, ensure_ascii=False
+                    ) + "\n")
+                    self._docs[doc_id] = documents[i]
+                    self._metas[doc_id] = meta
+            self._log_records += len(latest)
+            if new_ids:
+                with open(self._path(".ids"), "a", encoding="utf-8") as f:
+                    f.write("".join(f"{doc_id}\n" for doc_id in new_ids))
+                for offset, doc_id in enumerate(new_ids):
+                    self._rows[doc_id] = start + offset
+                self._ids.extend(new_ids)
+
+            self._columns.clear()
+            if self._centroids is not None:
+                self._assign_rows(rows)
+            self._maybe_compact()
+
+    def update_metadata(self, ids: Sequence[str], metadatas: Sequence[Dict[str, Any]]) -> None:
+        """기존 문서의 메타데이터 병합 갱신 (벡터/본문은 그대로)"""
+        with self._lock:
+            with open(self._path(".docs.jsonl"), "a", encoding="utf-8") as f:
+                for doc_id, meta in zip(ids, metadatas):
+                    if doc_id not in self._rows:
+                        continue
+                    merged = {**self._metas.get(doc_id, {}), **meta}
+                    f.write(json.dumps(
+                        {"id": doc_id, "doc": self._docs.get(doc_id, ""), "meta": merged}, ensure_ascii=False
+                    ) + "\n")
+                    self._metas[doc_id] = merged
+                    self._log_records += 1
+            self._columns.clear()
+            self._maybe_compact()
+
+    def compact(self) -> None:
+        """본문 로그를 ID당 최신 기록 한 줄로 다시 씀 (임시 파일 → 교체)"""
+        with self._lock:
+            path = self._path(".docs.jsonl")
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for doc_id in self._ids:
+                    f.write(json.dumps(
+                        {"id": doc_id, "doc": self._docs.get(doc_id, ""), "meta": self._metas.get(doc_id, {})},
+                        ensure_ascii=False,
+                    ) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            self._log_records = len(self._ids)
+
+    def _maybe_compact(self) -> None:
+        if self._log_records > 2 * len(self._ids) + COMPACT_MIN_RECORDS:
+            self.compact()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        with self._lock:
+            self.attributes[key] = value
+            self._write_meta()
+
+    def records(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """저장된 (ID, 문서, 메타데이터) 목록"""
+        with self._lock:
+            items = [(doc_id, self._docs.get(doc_id, ""), self._metas.get(doc_id, {})) for doc_id in self._ids]
+        return iter(items)
+
+    # ── 검색 ──────────────────────────────────────────────────────────
+
+    def search(
+        self,
+        query,
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        where: Optional[Where] = None,
+        where_document: Optional[Where] = None,
+    ) -> List[SearchResult]:
+        """질의 벡터 → 필터를 통과한 [(ID, 코사인 유사도, 메타데이터)]"""
+        with self._lock:
+            n = len(self._ids)
+            if n == 0 or top_k <= 0:
+                return []
+            query = _normalize(query).reshape(-1)
+            matrix = self._matrix[:n]
+
+            if n <= self.brute_force_max:
+                rows = np.arange(n)
+                scores = matrix @ query
+            else:
+                self._maybe_train(n)
+                rows = self._probe(query, nprobe or self.nprobe)
+                scores = matrix[rows] @ query
+            if where:
+                scores = np.where(self._where_mask(where)[rows], scores, -np.inf)
+
+            return [
+                (self._ids[rows[i]], float(scores[i]), self._metas.get(self._ids[rows[i]], {}))
+                for i in self._select(scores, rows, top_k, where_document)
+            ]
+
+    def _select(self, scores: np.ndarray, rows: np.ndarray, top_k: int, where_document) -> List[int]:
+        """점수 순으로 필터를 통과한 위치 top_k개 (본문 조건은 후보 창을 넓혀 가며 확인)"""
+        if len(scores) == 0:
+            return []
+        window = top_k
+        while True:
+            top = _top_k(scores, min(window, len(scores)))
+            picked = [
+                i for i in top
+                if np.isfinite(scores[i])
+                and document_matches(self._docs.get(self._ids[rows[i]], ""), where_document)
+            ]
+            if len(picked) >= top_k or window >= len(scores) or not np.isfinite(scores[top[-1]]):
+                return picked[:top_k]
+            window *= 4
+
+    def _where_mask(self, where: Where) -> np.ndarray:
+        """메타데이터 조건 → 행 마스크"""
+        if "$and" in where:
+            return np.logical_and.reduce([self._where_mask(c) for c in where["$and"]])
+        if "$or" in where:
+            return np.logical_or.reduce([self._where_mask(c) for c in where["$or"]])
+        masks = []
+        for field, condition in where.items():
+            column = self._column(field)
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for op, value in condition.items():
+                if op == "$contains":
+                    # 목록 필드의 원소 포함 ("ingredients": {"$contains": "김치"})
+                    masks.append(np.array(
+                        [isinstance(v, (list, tuple)) and value in v for v in column], dtype=bool
+                    ))
+                elif op in ("$in", "$nin"):
+                    mask = np.isin(column, list(value))
+                    masks.append(mask if op == "$in" else ~mask)
+                elif op in _COMPARATORS:
+                    with np.errstate(invalid="ignore"):
+                        masks.append(_COMPARATORS[op](column, value).astype(bool))
+                else:
+                    raise ValueError(f"지원하지 않는 메타데이터 조건입니다: {op}")
+        return np.logical_and.reduce(masks) if masks else np.ones(len(self._ids), dtype=bool)
+
+    def _column(self, field: str) -> np.ndarray:
+        """필드 값 열 (숫자 필드는 float64, 없으면 NaN → 어떤 비교도 통과하지 않음)"""
+        column = self._columns.get(field)
+        if column is None:
+            values = [self._metas.get(doc_id, {}).get(field) for doc_id in self._ids]
+            if all(v is None or isinstance(v, (int, float)) for v in values):
+                column = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            else:
+                # 원소 단위로 채워야 길이가 같은 목록 값이 2차원 배열로 바뀌지 않음
+                column = np.empty(len(values), dtype=object)
+                for row, value in enumerate(values):
+                    column[row] = value
+            self._columns[field] = column
+        return column
+
+    def _probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """질의와 가까운 군집들의 행 번호"""
+        if self._list_order is None:
+            self._build_lists()
+        nearest = _top_k(self._centroids @ query, min(nprobe, len(self._centroids)))
+        return np.concatenate([
+            self._list_order[self._list_offsets[c]:self._list_offsets[c + 1]] for c in nearest
+        ])
+
+    # ── IVF ───────────────────────────────────────────────────────────
+
+    def _maybe_train(self, n: int) -> None:
+        """처음이거나 학습 이후 두 배 이상 커졌으면 군집을 다시 학습"""
+        if self._centroids is not None and n < 2 * self._trained_rows:
+            return
+        nlist = int(np.clip(np.sqrt(n), 16, 4096))
+        rng = np.random.default_rng(0)
+        sample_size = min(n, nlist * KMEANS_SAMPLE_PER_LIST)
+        sample = np.asarray(self._matrix[np.sort(rng.choice(n, sample_size, replace=False))])
+
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=nlist) == 0
+            # 빈 군집은 임의의 표본으로 다시 시작
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = _normalize(sums)
+
+        self._centroids = centroids
+        self._trained_rows = n
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._assign_rows(np.arange(n))
+        np.savez(self._path(".ivf.npz"), centroids=centroids, trained_rows=n)
+        # 재구성 시점에 덮어쓴 본문 기록도 정리
+        if self._log_records > len(self._ids):
+            self.compact()
+        logger.info(f"IVF 인덱스 학습: {n}행, {nlist}개 군집")
+
+    def _assign_rows(self, rows: np.ndarray) -> None:
+        if len(self._assignments) < len(self._ids):
+            grown = np.zeros(max(len(self._ids), MIN_CAPACITY), dtype=np.int32)
+            grown[:len(self._assignments)] = self._assignments
+            self._assignments = grown
+        for start in range(0, len(rows), ASSIGN_BLOCK_ROWS):
+            block = rows[start:start + ASSIGN_BLOCK_ROWS]
+            self._assignments[block] = np.argmax(self._matrix[block] @ self._centroids.T, axis=1)
+        self._list_order = None
+
+    def _build_lists(self) -> None:
+        assignments = self._assignments[:len(self._ids)]
+        self._list_order = np.argsort(assignments, kind="stable")
+        self._list_offsets = np.searchsorted(
+            assignments[self._list_order], np.arange(len(self._centroids) + 1)
+        )
+
+    # ── 저장 ──────────────────────────────────────────────────────────
+
+    def _path(self, suffix: str) -> Path:
+        return self.directory / f"{self.name}{suffix}"
+
+    def _write_meta(self) -> None:
+        self._path(".json").write_text(json.dumps({"dim": self.dim, "attributes": self.attributes}))
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if self._matrix is not None and rows <= self._matrix.shape[0]:
+            return
+        capacity = max(MIN_CAPACITY, 2 * rows)
+        path = self._path(".f32")
+        needed = capacity * self.dim * 4
+        if not path.exists() or path.stat().st_size < needed:
+            if self._matrix is not None:
+                self._matrix.flush()
+            with open(path, "ab") as f:
+                f.truncate(needed)
+        self._matrix = np.memmap(
+            path, dtype=np.float32, mode="r+", shape=(path.stat().st_size // (self.dim * 4), self.dim)
+        )
+
+    def _load(self) -> None:
+        meta_path = self._path(".json")
+        if not meta_path.exists():
+            return
+        try:
+            meta = json.loads(meta_path.read_text())
+            self.attributes = meta.get("attributes", {})
+            self.dim = meta.get("dim")
+            if self.dim is None:
+                return
+            ids_path = self._path(".ids")
+            self._ids = ids_path.read_text(encoding="utf-8").split() if ids_path.exists() else []
+            self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            docs_path = self._path(".docs.jsonl")
+            if docs_path.exists():
+                with open(docs_path, encoding="utf-8") as f:
+                    for line in f:
+                        self._log_records += 1
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # 중단으로 잘린 마지막 행
+                        if record["id"] in self._rows:
+                            self._docs[record["id"]] = record["doc"]
+                            self._metas[record["id"]] = record.get("meta") or {}
+            self._ensure_capacity(len(self._ids))
+            self._maybe_compact()
+
+            ivf_path = self._path(".ivf.npz")
+            if ivf_path.exists() and len(self._ids) > self.brute_force_max:
+                with np.load(ivf_path) as data:
+                    self._centroids = data["centroids"]
+                    self._trained_rows = int(data["trained_rows"])
+                self._assign_rows(np.arange(len(self._ids)))
+        except Exception as e:
+            logger.error(f"벡터 인덱스 로드 실패, 새로 시작합니다: {e}")
+            self.dim, self._matrix, self._ids, self._rows, self._docs = None, None, [], {}, {}
+            self._metas, self._log_records = {}, 0
+            self._centroids = None
@@ -0,0 +1,138 @@
+"""임베딩 백엔드
+
+`EMBEDDING_BACKEND` 환경변수로 선택합니다.
+- openai : OpenAI text-embedding-3-small (네트워크 필요)
+- hashed : 글자 n-gram 해싱 임베딩 (결정적, 의존성 없음, 완전 오프라인)
+- local  : sentence-transformers CPU 모델 (설치되어 있을 때만)
+지정하지 않으면 OPENAI_API_KEY가 있을 때 openai, 없으면 hashed를 사용합니다.
+"""
+import os
+import re
+import zlib
+import logging
+import unicodedata
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from .embeddings import EMBEDDING_MODEL, openai_provider
+
+logger = logging.getLogger(__name__)
+
+# sentence-transformers 선택적 임포트
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SentenceTransformer = None
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+HASHED_EMBEDDING_DIM = int(os.getenv("HASHED_EMBEDDING_DIM", 512))
+LOCAL_EMBEDDING_MODEL = os.getenv(
+    "LOCAL_EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+)
+LOCAL_BATCH_SIZE = 64
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+class OpenAIBackend:
+    """OpenAI 임베딩 API"""
+
+    model = EMBEDDING_MODEL
+    cache_on_disk = True
+    quantize = False
+    max_batch_size = 2048
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        return openai_provider(texts)
+
+
+@lru_cache(maxsize=200_000)
+def _word_features(word: str, dim: int, min_n: int, max_n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """단어 → (버킷 인덱스, 부호) - 단어 자체 + 경계 표시를 붙인 글자 n-gram"""
+    padded = f"<{word}>"
+    grams = [word]
+    for n in range(min_n, max_n + 1):
+        grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    hashes = np.array([zlib.crc32(g.encode("utf-8")) for g in grams], dtype=np.uint32)
+    buckets = (hashes % dim).astype(np.int64)
+    signs = np.where((hashes >> 31) & 1, -1.0, 1.0).astype(np.float32)
+    return buckets, signs
+
+
+class HashedNgramBackend:
+    """글자 n-gram 해싱 임베딩
+
+    한국어 재료명은 띄어쓰기/조사 변형이 많아("김치볶음밥", "김치 볶음밥") 글자
+    n-gram이 단어 단위보다 잘 맞습니다. 부호 해싱으로 충돌 편향을 줄이고 L2 정규화해
+    코사인 유사도로 비교합니다. 계산이 캐시 조회보다 싸므로 디스크 캐시는 쓰지 않습니다.
+    """
+
+    cache_on_disk = False
+    quantize = False
+    max_batch_size = 4096
+
+    def __init__(self, dim: int = HASHED_EMBEDDING_DIM, ngram_range: Tuple[int, int] = (1, 3)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.model = f"hashed-ngram-{ngram_range[0]}{ngram_range[1]}-{dim}"
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        min_n, max_n = self.ngram_range
+        for row, text in enumerate(texts):
+            normalized = unicodedata.normalize("NFC", text.lower())
+            features = [
+                _word_features(word, self.dim, min_n, max_n)
+                for word in _WORD_PATTERN.findall(normalized)
+            ]
+            if not features:
+                continue
+            buckets = np.concatenate([f[0] for f in features])
+            signs = np.concatenate([f[1] for f in features])
+            np.add.at(vectors[row], buckets, signs)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class LocalModelBackend:
+    """sentence-transformers CPU 모델 (배치 추론, 디스크 캐시는 int8 양자화 저장)"""
+
+    cache_on_disk = True
+    quantize = True
+    max_batch_size = 1024
+
+    def __init__(self, model_name: str = LOCAL_EMBEDDING_MODEL):
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            raise ImportError("sentence-transformers가 설치되지 않았습니다 (pip install sentence-transformers)")
+        self.model = model_name
+        self._model = SentenceTransformer(model_name, device="cpu")
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        return self._model.encode(
+            list(texts),
+            batch_size=LOCAL_BATCH_SIZE,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        ).astype(np.float32)
+
+
+def create_backend(name: str = None):
+    """백엔드 이름 → 인스턴스 (local을 쓸 수 없으면 hashed로 대체)"""
+    name = (name or os.getenv("EMBEDDING_BACKEND") or "").lower()
+    if not name:
+        name = "openai" if os.getenv("OPENAI_API_KEY") else "hashed"
+
+    if name == "openai":
+        return OpenAIBackend()
+    if name == "local":
+        try:
+            return LocalModelBackend()
+        except Exception as e:
+            logger.warning(f"로컬 임베딩 모델을 사용할 수 없어 hashed 백엔드로 대체합니다: {e}")
+            return HashedNgramBackend()
+    if name == "hashed":
+        return HashedNgramBackend()
+    raise ValueError(f"알 수 없는 임베딩 백엔드입니다: {name} (openai, hashed, local)")
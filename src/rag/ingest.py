@@ -0,0 +1,199 @@
+"""레시피 코퍼스 일괄 적재
+
+JSONL/CSV 레시피 파일을 청크 단위로 스트리밍하면서 배치 임베딩 후 벡터 저장소에
+upsert합니다. ID는 레시피 내용 기반이라 재실행해도 중복되지 않고, 청크마다
+체크포인트를 기록해 중단된 적재를 이어서 진행할 수 있습니다.
+"""
+import os
+import csv
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHECKPOINT_DIR = "./data/ingest"
+SUPPORTED_FORMATS = ("jsonl", "csv")
+
+
+def detect_format(path: str) -> str:
+    suffix = Path(path).suffix.lower().lstrip(".")
+    if suffix in ("jsonl", "ndjson"):
+        return "jsonl"
+    if suffix == "csv":
+        return "csv"
+    raise ValueError(f"지원하지 않는 레시피 파일 형식입니다: {path} (jsonl 또는 csv)")
+
+
+def _parse_ingredients(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    text = str(value or "").strip()
+    if text.startswith("["):
+        return _parse_ingredients(json.loads(text))
+    separator = "|" if "|" in text else ","
+    return [part.strip() for part in text.split(separator) if part.strip()]
+
+
+def normalize_recipe(raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """원본 행을 레시피 형식으로 정리 (제목/재료가 없으면 None)"""
+    title = str(raw.get("title") or "").strip()
+    ingredients = _parse_ingredients(raw.get("ingredients"))
+    if not title or not ingredients:
+        return None
+    recipe = {
+        "title": title,
+        "ingredients": ingredients,
+        "cooking_time": str(raw.get("cooking_time") or "").strip() or None,
+        "difficulty": str(raw.get("difficulty") or "").strip() or None,
+        "description": str(raw.get("description") or "").strip(),
+    }
+    calories = raw.get("calories")
+    if calories not in (None, ""):
+        try:
+            recipe["calories"] = int(float(calories))
+        except (TypeError, ValueError):
+            pass
+    return {k: v for k, v in recipe.items() if v is not None}
+
+
+def iter_raw_records(path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """파일에서 원본 레코드를 한 건씩 읽음 (전체를 메모리에 올리지 않음)"""
+    fmt = fmt or detect_format(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+            return
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"잘못된 JSON 행을 건너뜁니다: {path}:{line_no}")
+                yield {}
+
+
+def iter_chunks(records: Iterator[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk: List[Dict[str, Any]] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class IngestCheckpoint:
+    """처리한 원본 레코드 수를 파일 단위로 기록"""
+
+    def __init__(self, source: str, checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR):
+        self.source = os.path.abspath(source)
+        name = Path(source).name
+        self.path = Path(checkpoint_dir) / f"{name}.checkpoint.json"
+
+    def load(self) -> int:
+        """이어서 시작할 레코드 위치 (원본 파일이 줄었거나 다른 파일이면 0)"""
+        if not self.path.exists():
+            return 0
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return 0
+        if data.get("source") != self.source or os.path.getsize(self.source) < data.get("size", 0):
+            return 0
+        return int(data.get("records", 0))
+
+    def save(self, records: int) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "source": self.source,
+            "size": os.path.getsize(self.source),
+            "records": records,
+            "updated_at": time.time(),
+        }))
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        if self.path.exists():
+            self.path.unlink()
+
+
+def ingest_recipes(
+    path: str,
+    store=None,
+    fmt: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    resume: bool = True,
+    checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
+) -> Dict[str, Any]:
+    """
+    레시피 파일을 벡터 저장소에 적재하고 처리 통계를 반환합니다.
+    resume=True이면 이전 체크포인트 이후 레코드부터 이어서 처리합니다.
+    """
+    if store is None:
+        from .vector_store import get_vector_store
+        store = get_vector_store()
+
+    checkpoint = IngestCheckpoint(path, checkpoint_dir)
+    start_at = checkpoint.load() if resume else 0
+    if start_at:
+        logger.info(f"레시피 적재 재개: {path} ({start_at}건 이후부터)")
+
+    stats = {"source": path, "resumed_from": start_at, "read": 0, "ingested": 0, "invalid": 0}
+    position = 0
+    started = time.perf_counter()
+
+    records = iter_raw_records(path, fmt)
+    for raw_chunk in iter_chunks(records, chunk_size):
+        chunk_end = position + len(raw_chunk)
+        if chunk_end <= start_at:
+            position = chunk_end
+            continue
+        pending = raw_chunk[max(0, start_at - position):]
+        position = chunk_end
+
+        recipes, invalid = _normalize_chunk(pending)
+        if recipes:
+            store.add_recipes(recipes)
+        checkpoint.save(position)
+
+        stats["read"] += len(pending)
+        stats["ingested"] += len(recipes)
+        stats["invalid"] += invalid
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"레시피 적재 진행: {position}건 처리, {stats['ingested']}건 적재 "
+            f"({stats['ingested'] / max(elapsed, 1e-9):.0f} recipes/sec)"
+        )
+
+    checkpoint.clear()
+    elapsed = time.perf_counter() - started
+    stats["elapsed_seconds"] = round(elapsed, 3)
+    stats["recipes_per_second"] = round(stats["ingested"] / max(elapsed, 1e-9), 1)
+    stats["total_in_store"] = store.count()
+    logger.info(
+        f"레시피 적재 완료: {stats['ingested']}건 / {stats['elapsed_seconds']}초 "
+        f"({stats['recipes_per_second']} recipes/sec)"
+    )
+    return stats
+
+
+def _normalize_chunk(raw_chunk: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    recipes, invalid = [], 0
+    for raw in raw_chunk:
+        try:
+            recipe = normalize_recipe(raw)
+        except (ValueError, TypeError):
+            recipe = None
+        if recipe is None:
+            invalid += 1
+        else:
+            recipes.append(recipe)
+    return recipes, invalid
@@ -0,0 +1,285 @@
+"""재료 역색인 (키워드 레시피 매칭)
+
+재료명은 `ingredient_normalizer`로 정규화(소문자, 공백/괄호/수량 제거, 동의어 통일,
+보유 재료 오타 보정)한 뒤 비교하며 기존 규칙과 같이 한쪽이 다른 쪽의 부분 문자열이면
+일치로 봅니다("대파" ↔ "파"). 재료명이 짧아 부분 문자열을 미리 펼쳐 두면 양방향 포함
+검사가 모두 사전 조회가 됩니다.
+
+- `IngredientMatcher`: 보유 재료 목록 하나에 대해 레시피 재료 일치 여부 (재료당 O(길이²))
+- `IngredientVocabulary`: 레시피 재료 → 정수 ID 사전 (색인된 레시피용은 프로세스 공용 `get_vocabulary()`)
+- `IngredientIndex`  : 재료 → 레시피 포스팅 리스트. 질의 비용은 코퍼스 크기가 아니라
+                       일치한 포스팅 수에 비례하고, 상위 k개는 크기 k의 힙으로 고릅니다.
+- `RecipeBitsets`    : 후보 레시피 묶음의 재료 비트셋. 보유 재료를 비트 마스크로 한 번
+                       펼친 뒤 매칭률/부족 재료/임박 재료 포함 여부를 NumPy AND·popcount로
+                       후보 전체에 대해 한 번에 계산합니다. 묶음마다 자체 사전을 쓰므로
+                       요청마다 들어오는 LLM 재료명이 공용 사전에 쌓이지 않습니다.
+"""
+import heapq
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .ingredient_normalizer import normalize_available, normalize_ingredient
+
+
+def substrings(term: str) -> Set[str]:
+    """비어 있지 않은 모든 부분 문자열"""
+    return {term[i:j] for i in range(len(term)) for j in range(i + 1, len(term) + 1)}
+
+
+class IngredientMatcher:
+    """보유 재료 목록에 대한 재료 일치 판정
+
+    레시피 재료 t가 보유 재료 a와 일치 ⇔ t ⊆ a (t가 a의 부분 문자열) 또는 a ⊆ t.
+    앞쪽은 보유 재료들의 부분 문자열 집합 조회, 뒤쪽은 t의 부분 문자열 중 보유 재료가
+    있는지 조회라 보유 재료 수와 무관합니다.
+    """
+
+    def __init__(self, available: Iterable[str]):
+        self.available = normalize_available(available)
+        self._available_substrings: Set[str] = set()
+        for name in self.available:
+            self._available_substrings |= substrings(name)
+
+    def matches(self, ingredient: str) -> bool:
+        term = normalize_ingredient(ingredient)
+        if not term:
+            return False
+        if term in self._available_substrings:
+            return True
+        return not self.available.isdisjoint(substrings(term))
+
+    def match_rate(self, recipe_ingredients: Sequence[str]) -> float:
+        if not recipe_ingredients:
+            return 0.0
+        return sum(1 for i in recipe_ingredients if self.matches(i)) / len(recipe_ingredients)
+
+
+@lru_cache(maxsize=64)
+def get_matcher(available: Tuple[str, ...]) -> IngredientMatcher:
+    """같은 보유 재료 목록으로 여러 레시피를 비교할 때 재사용"""
+    return IngredientMatcher(available)
+
+
+class IngredientVocabulary:
+    """정규화된 레시피 재료 → 정수 ID
+
+    재료를 등록할 때 부분 문자열 → 재료 ID 목록도 함께 만들어 두어, 보유 재료 목록이
+    일치시키는 재료 ID 집합을 재료 수와 무관하게 사전 조회로 구합니다. ID는 한 번
+    부여되면 바뀌지 않으므로 비트셋의 비트 위치로 그대로 씁니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._term_ids: Dict[str, int] = {}
+        self._substring_terms: Dict[str, List[int]] = {}  # 부분 문자열 → 그 문자열을 포함하는 재료 ID
+
+    def __len__(self) -> int:
+        return len(self._term_ids)
+
+    def term_id(self, term: str) -> int:
+        """정규화된 재료의 ID (없으면 새로 부여)"""
+        term_id = self._term_ids.get(term)
+        if term_id is not None:
+            return term_id
+        with self._lock:
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                term_id = len(self._term_ids)
+                for sub in substrings(term):
+                    self._substring_terms.setdefault(sub, []).append(term_id)
+                self._term_ids[term] = term_id
+            return term_id
+
+    def matched_terms(self, available: Iterable[str]) -> Set[int]:
+        """보유 재료와 일치하는 레시피 재료 ID 집합"""
+        matched: Set[int] = set()
+        with self._lock:
+            for name in normalize_available(available):
+                # 보유 재료를 포함하는 레시피 재료 ("파" → "대파", "쪽파")
+                matched.update(self._substring_terms.get(name, ()))
+                # 보유 재료에 포함되는 레시피 재료 ("돼지고기 앞다리" → "돼지고기")
+                for sub in substrings(name):
+                    term_id = self._term_ids.get(sub)
+                    if term_id is not None:
+                        matched.add(term_id)
+        return matched
+
+
+_vocabulary: Optional[IngredientVocabulary] = None
+_vocabulary_lock = threading.Lock()
+
+
+def get_vocabulary() -> IngredientVocabulary:
+    """프로세스 공용 재료 사전"""
+    global _vocabulary
+    if _vocabulary is None:
+        with _vocabulary_lock:
+            if _vocabulary is None:
+                _vocabulary = IngredientVocabulary()
+    return _vocabulary
+
+
+class IngredientIndex:
+    """재료 → 레시피 역색인
+
+    레시피는 키(recipe_id)로 upsert하며, 갱신된 레시피의 이전 행은 묘비 처리되어
+    검색에서 제외됩니다.
+    """
+
+    def __init__(self, vocabulary: Optional[IngredientVocabulary] = None):
+        self._lock = threading.RLock()
+        self.vocabulary = vocabulary if vocabulary is not None else get_vocabulary()
+        self._postings: Dict[int, List[int]] = {}      # 재료 ID → 레시피 행 (재료 수만큼 중복)
+        self._keys: List[Optional[str]] = []           # 행 → 레시피 키 (None이면 삭제됨)
+        self._sizes: List[int] = []                    # 행 → 레시피 재료 수
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def add(self, key: str, ingredients: Sequence[str]) -> None:
+        with self._lock:
+            old = self._rows.get(key)
+            if old is not None:
+                self._keys[old] = None
+            row = len(self._keys)
+            terms = [normalize_ingredient(i) for i in ingredients]
+            self._keys.append(key)
+            self._sizes.append(len(terms))
+            self._rows[key] = row
+            for term in terms:
+                if term:
+                    self._postings.setdefault(self.vocabulary.term_id(term), []).append(row)
+
+    def add_many(self, items: Iterable[Tuple[str, Sequence[str]]]) -> None:
+        with self._lock:
+            for key, ingredients in items:
+                self.add(key, ingredients)
+
+    def match_counts(self, available: Iterable[str]) -> Dict[int, int]:
+        """행 → 보유 재료와 일치한 레시피 재료 수"""
+        matched_terms = self.vocabulary.matched_terms(available)
+        with self._lock:
+            counts: Counter = Counter()
+            for term_id in matched_terms:
+                counts.update(self._postings.get(term_id, ()))
+            return counts
+
+    def top_k(
+        self,
+        available: Iterable[str],
+        k: int,
+        min_rate: float = 0.0,
+        accept: Optional[Callable[[str], bool]] = None,
+    ) -> List[Tuple[float, str]]:
+        """매칭률 상위 k개 [(매칭률, 레시피 키)] - 동점은 일치 재료가 많은 쪽 우선
+
+        accept가 주어지면 힙에 넣기 전에 레시피 키로 걸러냅니다 (식단 조건 등).
+        """
+        counts = self.match_counts(available)
+        with self._lock:
+            scored = (
+                (count / self._sizes[row], count, -row)
+                for row, count in counts.items()
+                if self._keys[row] is not None
+                and count / self._sizes[row] >= min_rate
+                and (accept is None or accept(self._keys[row]))
+            )
+            best = heapq.nlargest(k, scored)
+            return [(rate, self._keys[-neg_row]) for rate, _, neg_row in best]
+
+
+# 바이트별 켜진 비트 수 (np.bitwise_count가 없는 NumPy 1.x용)
+_POPCOUNT8 = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint16)
+
+
+def _popcount_rows(packed: np.ndarray) -> np.ndarray:
+    """행별 켜진 비트 수 (uint8로 묶인 비트 행렬)"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(packed).sum(axis=1, dtype=np.int64)
+    return _POPCOUNT8[packed].sum(axis=1, dtype=np.int64)
+
+
+class RecipeBitsets:
+    """후보 레시피 묶음의 재료 비트셋
+
+    레시피마다 사전의 재료 ID 위치에 비트를 켠 (레시피 수 × ⌈사전 크기/8⌉) 행렬을
+    만듭니다. 사전을 주지 않으면 이 묶음의 재료만 담은 사전을 새로 만들어, 비트 폭이
+    후보 묶음의 재료 수로 제한됩니다. 보유 재료 목록은 사전에서 일치하는 재료 ID를 한 번 찾아 같은 폭의 마스크로
+    바꾸므로, 매칭률은 popcount(레시피 & 마스크) / 레시피 재료 수가 됩니다.
+
+    정규화 후 같은 재료가 여러 번 나오면 ("달걀", "계란") 한 재료로 셉니다.
+    """
+
+    def __init__(
+        self,
+        recipes_ingredients: Sequence[Sequence[str]],
+        vocabulary: Optional[IngredientVocabulary] = None,
+    ):
+        self.vocabulary = vocabulary if vocabulary is not None else IngredientVocabulary()
+        self._ingredients: List[List[str]] = []   # 행 → 원래 재료명 (부족 재료 반환용)
+        term_lists: List[List[int]] = []           # 행 → 재료명별 재료 ID (정규화 결과가 비면 -1)
+        sizes = []
+        for ingredients in recipes_ingredients:
+            ingredients = [str(i) for i in ingredients or []]
+            terms = [normalize_ingredient(i) for i in ingredients]
+            ids = [self.vocabulary.term_id(t) if t else -1 for t in terms]
+            self._ingredients.append(ingredients)
+            term_lists.append(ids)
+            sizes.append(len({i for i in ids if i >= 0}) + ids.count(-1))
+
+        self.n_bits = max((max(ids, default=-1) for ids in term_lists), default=-1) + 1
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        self._offsets = np.cumsum([0] + [len(ids) for ids in term_lists])
+        self._flat_ids = np.fromiter(
+            (i for ids in term_lists for i in ids), dtype=np.int64, count=int(self._offsets[-1])
+        )
+
+        bits = np.zeros((len(term_lists), self.n_bits), dtype=bool)
+        rows = np.repeat(np.arange(len(term_lists)), [len(ids) for ids in term_lists])
+        valid = self._flat_ids >= 0
+        bits[rows[valid], self._flat_ids[valid]] = True
+        self.bits = np.packbits(bits, axis=1)
+
+    def __len__(self) -> int:
+        return len(self._ingredients)
+
+    def term_mask(self, available: Iterable[str]) -> np.ndarray:
+        """보유 재료와 일치하는 재료 ID의 비트 마스크 (bool, 길이 n_bits)"""
+        mask = np.zeros(self.n_bits, dtype=bool)
+        matched = [i for i in self.vocabulary.matched_terms(available) if i < self.n_bits]
+        mask[matched] = True
+        return mask
+
+    def match_counts(self, available: Iterable[str]) -> np.ndarray:
+        """레시피별 일치 재료 수"""
+        packed = np.packbits(self.term_mask(available))
+        return _popcount_rows(self.bits & packed)
+
+    def match_rates(self, available: Iterable[str]) -> np.ndarray:
+        """레시피별 매칭률 (재료가 없는 레시피는 0)"""
+        counts = self.match_counts(available)
+        return np.divide(
+            counts, self.sizes, out=np.zeros(len(self), dtype=np.float64), where=self.sizes > 0
+        )
+
+    def uses_any(self, items: Iterable[str]) -> np.ndarray:
+        """레시피별로 items 중 하나라도 쓰는지 (유통기한 임박 재료 포함 여부)"""
+        packed = np.packbits(self.term_mask(items))
+        return (self.bits & packed).any(axis=1)
+
+    def missing(self, available: Iterable[str]) -> List[List[str]]:
+        """레시피별 보유하지 않은 재료 (원래 재료명, 레시피 순서 유지)"""
+        mask = np.append(self.term_mask(available), False)  # -1(빈 재료명)은 항상 부족
+        owned = mask[self._flat_ids]
+        return [
+            [name for name, ok in zip(names, owned[start:end]) if not ok]
+            for names, start, end in zip(self._ingredients, self._offsets[:-1], self._offsets[1:])
+        ]
@@ -0,0 +1,262 @@
+"""재료명 정규화 서비스 (모든 에이전트 공용)
+
+GPT-4o가 돌려주는 자유 형식 재료명을 표준 재료 ID(정수)로 바꿉니다.
+
+1. 문자열 정규화: NFC, 소문자, 괄호/수량/공백 제거, 동의어 통일 ("달걀 (2개)" → "계란")
+2. 표준 재료 사전 정확 일치
+3. 자모 단위 편집 거리로 오타 보정 ("브로컬리" → "브로콜리")
+4. 재료명에 포함된 가장 긴 표준 재료 ("다진마늘" → "마늘"), 없으면 재료명을 포함하는
+   가장 짧은 표준 재료 ("참치" → "참치캔")
+
+결과는 LRU로 메모이즈되므로 요청마다 한 번 ID를 구해 두면 이후 단계는 정수 비교만 합니다.
+"""
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+# 별칭 → 대표 이름. 한글 별칭은 재료명 안에서도 치환 ("달걀말이" → "계란말이"),
+# 영문 별칭은 영문 단어열 전체가 같을 때만 치환 ("eggplant", "onion rings"는 그대로)
+INGREDIENT_SYNONYMS = {
+    "달걀": "계란",
+    "egg": "계란",
+    "eggs": "계란",
+    "eggplant": "가지",
+    "쇠고기": "소고기",
+    "우육": "소고기",
+    "beef": "소고기",
+    "돈육": "돼지고기",
+    "pork": "돼지고기",
+    "pork belly": "삼겹살",
+    "계육": "닭고기",
+    "흰밥": "밥",
+    "쌀밥": "밥",
+    "공기밥": "밥",
+    "케찹": "케첩",
+    "milk": "우유",
+    "onion": "양파",
+    "tofu": "두부",
+}
+
+# 분류 → 표준 재료 (ID는 이 순서대로 부여)
+INGREDIENT_CATALOG: Dict[str, Sequence[str]] = {
+    "채소": [
+        "당근", "양파", "감자", "시금치", "상추", "배추", "양배추", "고추", "마늘", "생강",
+        "대파", "파", "쪽파", "부추", "브로콜리", "파프리카", "오이", "호박", "애호박", "버섯",
+        "느타리버섯", "새송이버섯", "표고버섯", "청경채", "콩나물", "숙주", "깻잎", "셀러리",
+        "아스파라거스", "피망", "가지", "무", "연근", "고구마",
+    ],
+    "과일": [
+        "사과", "바나나", "토마토", "딸기", "포도", "귤", "레몬", "수박", "오렌지", "복숭아",
+        "키위", "배", "망고", "블루베리", "체리", "파인애플",
+    ],
+    "육류": [
+        "고기", "닭고기", "돼지고기", "소고기", "양고기", "삼겹살", "닭가슴살", "소시지", "햄",
+        "베이컨",
+    ],
+    "해산물": [
+        "생선", "연어", "고등어", "새우", "오징어", "조개", "참치캔", "멸치", "해물", "게", "낙지",
+    ],
+    "유제품": ["우유", "계란", "요거트", "치즈", "버터", "생크림"],
+    "콩": ["두부", "두유"],
+    "곡류": ["밥", "쌀"],
+    "가공식품": ["김치", "된장", "고추장", "간장", "케첩", "마요네즈", "빵"],
+}
+
+# 오타 보정 기준: 자모 7개(대략 세 음절) 미만은 보정하지 않음 ("고수" ↛ "고추")
+FUZZY_MIN_JAMO = 7
+FUZZY_LONG_JAMO = 12  # 이 길이부터 편집 거리 2까지 허용
+
+_PARENTHESES = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+_QUANTITY = re.compile(r"\d+(?:[./]\d+)?\s*(?:g|kg|ml|l|개|큰술|작은술|컵|장|쪽|줌|모|마리|인분)?\b")
+_NON_WORD = re.compile(r"[^\w]+")
+_ASCII_WORDS = re.compile(r"[a-z]+(?:[\s_-]+[a-z]+)*")
+_SPACES = re.compile(r"[\s_-]+")
+_ASCII_SYNONYMS = {alias: canonical for alias, canonical in INGREDIENT_SYNONYMS.items() if alias.isascii()}
+_SYNONYM_ITEMS = sorted(
+    ((alias, canonical) for alias, canonical in INGREDIENT_SYNONYMS.items() if not alias.isascii()),
+    key=lambda kv: -len(kv[0]),
+)
+
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = " ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+
+
+def _replace_ascii_alias(match: "re.Match[str]") -> str:
+    words = _SPACES.sub(" ", match.group(0))
+    return _ASCII_SYNONYMS.get(words, words)
+
+
+@lru_cache(maxsize=100_000)
+def normalize_ingredient(name: str) -> str:
+    """재료명 정규화 ("달걀 (2개)" → "계란")"""
+    text = unicodedata.normalize("NFC", str(name)).lower()
+    text = _PARENTHESES.sub(" ", text)
+    text = _QUANTITY.sub(" ", text)
+    text = _ASCII_WORDS.sub(_replace_ascii_alias, text)
+    text = _NON_WORD.sub("", text).replace("_", "")
+    for alias, canonical in _SYNONYM_ITEMS:
+        if alias in text:
+            text = text.replace(alias, canonical)
+    return text
+
+
+def to_jamo(text: str) -> str:
+    """한글 음절을 초성/중성/종성 자모로 분해 ("파" → "ㅍㅏ"), 그 외 문자는 그대로"""
+    out = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            out.append(_CHOSEONG[code // 588])
+            out.append(_JUNGSEONG[(code % 588) // 28])
+            if code % 28:
+                out.append(_JONGSEONG[code % 28])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """레벤슈타인 거리 (limit를 넘으면 limit + 1)"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class IngredientMatch(NamedTuple):
+    """재료명 해석 결과 (kind: exact / fuzzy / partial)"""
+
+    id: int
+    name: str
+    category: str
+    kind: str
+
+
+class IngredientResolver:
+    """자유 형식 재료명 → 표준 재료 ID"""
+
+    def __init__(self, catalog: Dict[str, Sequence[str]] = INGREDIENT_CATALOG, cache_size: int = 50_000):
+        self.names: List[str] = []
+        self.categories: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for category, names in catalog.items():
+            for name in names:
+                term = normalize_ingredient(name)
+                if term and term not in self._ids:
+                    self._ids[term] = len(self.names)
+                    self.names.append(term)
+                    self.categories.append(category)
+        self._jamo = [to_jamo(name) for name in self.names]
+        # 긴 이름부터 포함 여부를 확인해야 "양배추"가 "배추"/"배"보다 먼저 잡힘
+        self._by_length = sorted(range(len(self.names)), key=lambda i: (-len(self.names[i]), i))
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def resolve(self, name: str) -> Optional[int]:
+        """재료명 → 표준 재료 ID (해석할 수 없으면 None)"""
+        match = self.match(name)
+        return match.id if match else None
+
+    def canonical_name(self, name: str) -> Optional[str]:
+        match = self.match(name)
+        return match.name if match else None
+
+    def category(self, ingredient_id: Optional[int]) -> Optional[str]:
+        return None if ingredient_id is None else self.categories[ingredient_id]
+
+    def ids(self, names: Iterable[str]) -> FrozenSet[int]:
+        """재료명 목록 → 표준 재료 ID 집합 (해석되지 않은 이름은 제외)"""
+        return frozenset(i for i in (self.resolve(n) for n in names) if i is not None)
+
+    def _match(self, name: str) -> Optional[IngredientMatch]:
+        term = normalize_ingredient(name)
+        if not term:
+            return None
+        ingredient_id = self._ids.get(term)
+        if ingredient_id is not None:
+            return self._result(ingredient_id, "exact")
+        ingredient_id = self._fuzzy(term)
+        if ingredient_id is not None:
+            return self._result(ingredient_id, "fuzzy")
+        for ingredient_id in self._by_length:
+            if self.names[ingredient_id] in term:
+                return self._result(ingredient_id, "partial")
+        for ingredient_id in reversed(self._by_length):
+            if term in self.names[ingredient_id]:
+                return self._result(ingredient_id, "partial")
+        return None
+
+    def _fuzzy(self, term: str) -> Optional[int]:
+        """자모 편집 거리가 기준 이하인 유일한 최근접 표준 재료"""
+        jamo = to_jamo(term)
+        if len(jamo) < FUZZY_MIN_JAMO:
+            return None
+        limit = 1 if len(jamo) < FUZZY_LONG_JAMO else 2
+        best, best_distance, tied = None, limit + 1, False
+        for ingredient_id, candidate in enumerate(self._jamo):
+            distance = edit_distance(jamo, candidate, limit)
+            if distance < best_distance:
+                best, best_distance, tied = ingredient_id, distance, False
+            elif distance == best_distance and distance <= limit:
+                tied = True
+        return None if tied or best_distance > limit else best
+
+    def _result(self, ingredient_id: int, kind: str) -> IngredientMatch:
+        return IngredientMatch(ingredient_id, self.names[ingredient_id], self.categories[ingredient_id], kind)
+
+
+_resolver: Optional[IngredientResolver] = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver() -> IngredientResolver:
+    """프로세스 공용 재료명 해석기"""
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = IngredientResolver()
+    return _resolver
+
+
+def normalize_available(available: Iterable[str]) -> Set[str]:
+    """보유 재료 목록 정규화 (오타로 판단된 이름은 표준 재료명도 함께 포함)"""
+    resolver = get_resolver()
+    names: Set[str] = set()
+    for name in available:
+        term = normalize_ingredient(name)
+        if not term:
+            continue
+        names.add(term)
+        match = resolver.match(name)
+        if match and match.kind == "fuzzy":
+            names.add(match.name)
+    return names
+
+
+def annotate_ingredient_ids(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """식재료 항목에 표준 재료 ID(ingredient_id)를 붙임 (요청당 한 번, 해석 실패는 None)"""
+    resolver = get_resolver()
+    for item in items:
+        if "ingredient_id" not in item:
+            item["ingredient_id"] = resolver.resolve(item.get("name", ""))
+    return items
+
+
+def item_ingredient_id(item: Dict[str, Any]) -> Optional[int]:
+    """식재료 항목의 표준 재료 ID (미리 붙어 있지 않으면 이름으로 해석)"""
+    if "ingredient_id" in item:
+        return item["ingredient_id"]
+    return get_resolver().resolve(item.get("name", "") or item.get("item", ""))
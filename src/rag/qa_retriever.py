@@ -0,0 +1,441 @@
+"""QA 검색 계층
+
+챗봇 질문마다 전체 재고를 프롬프트에 넣는 대신, 재고 행·레시피·리포트를
+인덱싱해 두고 질문과 관련된 상위 문서만 토큰 예산 안에서 선택합니다.
+
+- 키워드 검색: 단어 + 한글 2-gram 토큰의 역색인 BM25 (질문 토큰의 posting만 탐색)
+- 임베딩 검색: 정규화된 float32 행렬과의 내적 (임베딩 함수가 있을 때만)
+- 두 순위는 Reciprocal Rank Fusion으로 결합
+- 재고 인덱스는 최초 1회 DB에서 적재한 뒤 스캔 변경분(delta)만 반영
+"""
+import os
+import re
+import math
+import heapq
+import bisect
+import asyncio
+import logging
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 검색 설정
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+CANDIDATES_PER_RANKER = 50
+DEFAULT_TOP_K = 30
+DEFAULT_TOKEN_BUDGET = int(os.getenv("QA_CONTEXT_TOKEN_BUDGET", 1200))
+# 키워드 일치가 없을 때 보여줄 유통기한 임박 재료 수
+FALLBACK_EXPIRING_ITEMS = 10
+# 문서 절반 이상에 등장하는 토큰은 변별력이 없으므로 posting 탐색 생략
+MAX_POSTING_RATIO = 0.5
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+_TOKEN_PATTERN = re.compile(r"[0-9a-zA-Z가-힣]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """검색 토큰 분리 (단어 + 한글 조사 대응용 2-gram)"""
+    tokens = []
+    for word in _TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(word)
+        if len(word) > 2:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+@lru_cache(maxsize=1)
+def _get_encoder():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken 인코더를 사용할 수 없어 토큰 수를 추정합니다: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """프롬프트 토큰 수 (tiktoken 없으면 보수적으로 추정)"""
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    # 한글은 대략 1~2자당 1토큰
+    return max(1, math.ceil(len(text) / 1.5))
+
+
+def default_embed_fn() -> Optional[EmbedFn]:
+    """설정된 임베딩 백엔드의 배치 함수 (백엔드를 만들 수 없으면 None - 키워드 검색만 사용)"""
+    from .embeddings import get_embedder, get_embeddings_batch
+
+    try:
+        get_embedder()
+    except Exception as e:
+        logger.warning(f"임베딩 백엔드를 사용할 수 없어 키워드 검색만 사용합니다: {e}")
+        return None
+    return get_embeddings_batch
+
+
+class SearchHit(NamedTuple):
+    doc_id: str
+    score: float
+    text: str
+    payload: Dict[str, Any]
+
+
+class HybridIndex:
+    """키워드(BM25) + 임베딩 하이브리드 검색 인덱스"""
+
+    def __init__(self, embed_fn: Optional[EmbedFn] = None):
+        self.embed_fn = embed_fn
+        self._texts: Dict[str, str] = {}
+        self._payloads: Dict[str, Dict[str, Any]] = {}
+        self._doc_tokens: Dict[str, Counter] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[str] = []
+
+        # payload["expiry_date"]가 있는 문서의 (유통기한, doc_id) 정렬 목록
+        self._by_expiry: List[Tuple[str, str]] = []
+        self._expiry_keys: Dict[str, Tuple[str, str]] = {}
+
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._texts
+
+    def payloads(self) -> Iterable[Dict[str, Any]]:
+        return self._payloads.values()
+
+    def upsert_many(self, docs: Sequence[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """
+        (doc_id, 검색 텍스트, payload) 문서 추가/갱신 - 텍스트가 바뀐 문서만 재임베딩.
+        payload["text"]가 있으면 검색 결과에 그 텍스트를 표시합니다.
+        """
+        changed = [(doc_id, text) for doc_id, text, _ in docs if self._texts.get(doc_id) != text]
+        vectors = self._embed([text for _, text in changed]) if changed else None
+
+        with self._lock:
+            for doc_id, text, payload in docs:
+                self._payloads[doc_id] = payload
+                self._index_expiry(doc_id, payload.get("expiry_date"))
+            for i, (doc_id, text) in enumerate(changed):
+                self._remove_tokens(doc_id)
+                self._texts[doc_id] = text
+                tokens = Counter(tokenize(text))
+                self._doc_tokens[doc_id] = tokens
+                self._doc_lengths[doc_id] = sum(tokens.values())
+                self._total_length += self._doc_lengths[doc_id]
+                for token, tf in tokens.items():
+                    self._postings.setdefault(token, {})[doc_id] = tf
+                if vectors is not None:
+                    self._vectors[doc_id] = vectors[i]
+            if vectors is not None:
+                self._matrix = None
+
+    def remove_many(self, doc_ids: Iterable[str]) -> None:
+        with self._lock:
+            for doc_id in doc_ids:
+                if doc_id not in self._texts:
+                    continue
+                self._remove_tokens(doc_id)
+                del self._texts[doc_id]
+                self._payloads.pop(doc_id, None)
+                self._index_expiry(doc_id, None)
+                if self._vectors.pop(doc_id, None) is not None:
+                    self._matrix = None
+
+    def search(
+        self,
+        query: str,
+        top_k: int = DEFAULT_TOP_K,
+        query_vector: Optional[np.ndarray] = None,
+    ) -> List[SearchHit]:
+        """BM25 순위와 임베딩 순위를 RRF로 결합한 상위 k개"""
+        with self._lock:
+            rankings = [self._keyword_ranking(query)]
+            if query_vector is not None and self._vectors:
+                rankings.append(self._vector_ranking(query_vector))
+
+            fused: Dict[str, float] = {}
+            for ranking in rankings:
+                for rank, doc_id in enumerate(ranking):
+                    fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+
+            best = heapq.nlargest(top_k, fused.items(), key=lambda kv: kv[1])
+            return [
+                SearchHit(doc_id, score, self._display_text(doc_id), self._payloads[doc_id])
+                for doc_id, score in best
+            ]
+
+    def earliest_expiring(self, n: int) -> List[str]:
+        """유통기한이 가장 이른 문서 n개의 표시 텍스트 (유통기한 없는 문서 제외)"""
+        with self._lock:
+            return [self._display_text(doc_id) for _, doc_id in self._by_expiry[:n]]
+
+    def embed_query(self, query: str) -> Optional[np.ndarray]:
+        if self.embed_fn is None or not self._vectors:
+            return None
+        vectors = self._embed([query])
+        return vectors[0] if vectors is not None else None
+
+    # ── 내부 구현 ─────────────────────────────────────────────────────
+
+    def _display_text(self, doc_id: str) -> str:
+        return self._payloads[doc_id].get("text") or self._texts[doc_id]
+
+    def _index_expiry(self, doc_id: str, expiry_date: Any) -> None:
+        """유통기한 정렬 목록 갱신 (락 안에서 호출)"""
+        old = self._expiry_keys.pop(doc_id, None)
+        if old is not None:
+            del self._by_expiry[bisect.bisect_left(self._by_expiry, old)]
+        if expiry_date:
+            key = (str(expiry_date), doc_id)
+            bisect.insort(self._by_expiry, key)
+            self._expiry_keys[doc_id] = key
+
+    def _embed(self, texts: List[str]) -> Optional[np.ndarray]:
+        if self.embed_fn is None:
+            return None
+        try:
+            vectors = np.asarray(self.embed_fn(texts), dtype=np.float32)
+        except Exception as e:
+            # 임베딩 실패 시 키워드 검색만으로 계속 동작
+            logger.error(f"임베딩 생성 실패, 키워드 검색만 사용합니다: {e}")
+            return None
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _remove_tokens(self, doc_id: str) -> None:
+        tokens = self._doc_tokens.pop(doc_id, None)
+        if not tokens:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[token]
+
+    def _keyword_ranking(self, query: str) -> List[str]:
+        n_docs = len(self._texts)
+        if n_docs == 0:
+            return []
+        avg_length = self._total_length / n_docs
+        scores: Dict[str, float] = {}
+        for token in set(tokenize(query)):
+            posting = self._postings.get(token)
+            if not posting or (n_docs > CANDIDATES_PER_RANKER and len(posting) > n_docs * MAX_POSTING_RATIO):
+                continue
+            idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                length = self._doc_lengths[doc_id]
+                norm = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * norm
+        best = heapq.nlargest(CANDIDATES_PER_RANKER, scores.items(), key=lambda kv: kv[1])
+        return [doc_id for doc_id, _ in best]
+
+    def _vector_ranking(self, query_vector: np.ndarray) -> List[str]:
+        if self._matrix is None:
+            self._matrix_ids = list(self._vectors)
+            self._matrix = np.stack([self._vectors[doc_id] for doc_id in self._matrix_ids])
+        sims = self._matrix @ query_vector
+        k = min(CANDIDATES_PER_RANKER, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return [self._matrix_ids[i] for i in top]
+
+
+class RetrievedContext(NamedTuple):
+    inventory: List[str]
+    knowledge: List[str]
+    tokens: int
+    candidates: int
+
+
+def inventory_doc(record: Dict[str, Any]) -> Tuple[str, str, Dict[str, Any]]:
+    """재고 행 → (doc_id, 검색 텍스트, payload)
+
+    수량/유통기한은 검색 텍스트에서 제외해 수량만 바뀐 행은 재임베딩하지 않습니다.
+    """
+    doc_id = str(record.get("item_id") or record.get("id") or record.get("name"))
+    category = record.get("category") or "기타"
+    location = record.get("location") or "-"
+    display = (
+        f"- {record.get('name')} [{category}] "
+        f"(수량: {record.get('quantity')}{record.get('unit') or ''}, "
+        f"보관: {location}, 유통기한: {record.get('expiry_date') or '-'})"
+    )
+    search_text = f"{record.get('name')} {category} {location}"
+    return doc_id, search_text, {"text": display, "expiry_date": record.get("expiry_date")}
+
+
+def recipe_doc(recipe: Dict[str, Any]) -> Tuple[str, str, Dict[str, Any]]:
+    ingredients = ", ".join(recipe.get("ingredients", []))
+    text = (
+        f"- 레시피 {recipe.get('title')}: 재료 {ingredients} "
+        f"({recipe.get('cooking_time', '-')}, 난이도 {recipe.get('difficulty', '-')}) "
+        f"{recipe.get('description', '')}".rstrip()
+    )
+    return f"recipe:{recipe.get('title')}", text, {"kind": "recipe"}
+
+
+def report_doc(report: Dict[str, Any]) -> Tuple[str, str, Dict[str, Any]]:
+    """generate_recipe_report 결과 → 문서 (본문은 report["content"] 아래)"""
+    content = report.get("content")
+    content = content if isinstance(content, dict) else {}
+    ingredients = ", ".join(
+        i.get("name", "") if isinstance(i, dict) else str(i) for i in content.get("ingredients") or []
+    )
+    text = f"- 리포트 {report.get('title')}: {content.get('intro', '')} 재료 {ingredients}".rstrip()
+    return f"report:{report.get('title')}", text, {"kind": "report"}
+
+
+class QARetriever:
+    """냉장고별 재고 인덱스 + 공용 레시피/리포트 인덱스"""
+
+    def __init__(self, embed_fn: Optional[EmbedFn] = None):
+        self.embed_fn = embed_fn
+        self._inventory: Dict[str, HybridIndex] = {}
+        self._versions: Dict[str, int] = {}
+        self._knowledge = HybridIndex(embed_fn)
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, asyncio.Lock] = {}
+
+    # ── 색인 ──────────────────────────────────────────────────────────
+
+    def has_inventory(self, fridge_id: str) -> bool:
+        return fridge_id in self._inventory
+
+    def inventory_version(self, fridge_id: str) -> int:
+        """재고 인덱스가 갱신될 때마다 증가 (세션 캐시 무효화용)"""
+        return self._versions.get(fridge_id, 0)
+
+    def load_inventory(self, fridge_id: str, records: Sequence[Dict[str, Any]]) -> None:
+        """냉장고 재고 인덱스를 새로 구성"""
+        index = HybridIndex(self.embed_fn)
+        index.upsert_many([inventory_doc(r) for r in records])
+        with self._lock:
+            self._inventory[fridge_id] = index
+            self._versions[fridge_id] = self._versions.get(fridge_id, 0) + 1
+
+    def apply_inventory_delta(
+        self,
+        fridge_id: str,
+        upserts: Sequence[Dict[str, Any]],
+        deleted_item_ids: Sequence[str],
+    ) -> None:
+        """스캔 변경분만 반영 (아직 적재되지 않은 냉장고는 최초 조회 시 DB에서 적재)"""
+        index = self._inventory.get(fridge_id)
+        if index is None:
+            return
+        index.remove_many(deleted_item_ids)
+        index.upsert_many([inventory_doc(r) for r in upserts])
+        with self._lock:
+            self._versions[fridge_id] = self._versions.get(fridge_id, 0) + 1
+
+    def add_recipes(self, recipes: Sequence[Dict[str, Any]]) -> None:
+        self._knowledge.upsert_many([recipe_doc(r) for r in recipes])
+
+    def add_report(self, report: Dict[str, Any]) -> bool:
+        """리포트 색인 (생성에 실패한 리포트는 건너뜀)"""
+        content = report.get("content")
+        if report.get("format") == "error" or not isinstance(content, dict) or "error" in content:
+            return False
+        self._knowledge.upsert_many([report_doc(report)])
+        return True
+
+    async def ensure_inventory(self, fridge_id: str, loader: Callable[[], Any]) -> None:
+        """최초 1회 `loader()` 결과(재고 행 목록)로 인덱스 구성"""
+        if fridge_id in self._inventory:
+            return
+        lock = self._load_locks.setdefault(fridge_id, asyncio.Lock())
+        async with lock:
+            if fridge_id in self._inventory:
+                return
+            records = await loader()
+            await asyncio.to_thread(self.load_inventory, fridge_id, records)
+
+    # ── 검색 ──────────────────────────────────────────────────────────
+
+    def retrieve(
+        self,
+        question: str,
+        fridge_id: str,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        top_k: int = DEFAULT_TOP_K,
+        prefer_expiring: bool = False,
+    ) -> RetrievedContext:
+        """질문 관련 재고/지식 문서를 토큰 예산 안에서 선택"""
+        index = self._inventory.get(fridge_id) or HybridIndex()
+
+        query_vector = index.embed_query(question)
+        if query_vector is None:
+            query_vector = self._knowledge.embed_query(question)
+
+        inventory_hits = index.search(question, top_k, query_vector)
+        knowledge_hits = self._knowledge.search(question, top_k, query_vector)
+
+        # 관련 재료 → 레시피/리포트 순으로 채우되, 유통기한 질문이면 임박 재료를 맨 앞에,
+        # 관련 재료가 적으면 남은 예산을 임박 재료로 채움
+        inventory_texts = [hit.text for hit in inventory_hits]
+        knowledge_texts = [hit.text for hit in knowledge_hits]
+        sections = [(inventory_texts, True), (knowledge_texts, False)]
+        if prefer_expiring:
+            sections.insert(0, (index.earliest_expiring(FALLBACK_EXPIRING_ITEMS), True))
+        elif len(inventory_hits) < FALLBACK_EXPIRING_ITEMS:
+            sections.append((index.earliest_expiring(FALLBACK_EXPIRING_ITEMS), True))
+
+        selected_inventory, selected_knowledge = [], []
+        used, seen = 0, set()
+        for texts, is_inventory in sections:
+            selected = selected_inventory if is_inventory else selected_knowledge
+            for text in texts:
+                if text in seen:
+                    continue
+                cost = count_tokens(text) + 1
+                if used + cost > token_budget:
+                    continue
+                seen.add(text)
+                selected.append(text)
+                used += cost
+
+        return RetrievedContext(
+            inventory=selected_inventory,
+            knowledge=selected_knowledge,
+            tokens=used,
+            candidates=len(index),
+        )
+
+
+# 전역 인스턴스
+_qa_retriever: Optional[QARetriever] = None
+_qa_retriever_lock = threading.Lock()
+
+
+def get_qa_retriever() -> QARetriever:
+    """QA 검색기 인스턴스 반환 (기본 레시피 포함)"""
+    global _qa_retriever
+    if _qa_retriever is None:
+        with _qa_retriever_lock:
+            if _qa_retriever is None:
+                from .vector_store import DEFAULT_RECIPES
+
+                retriever = QARetriever(default_embed_fn())
+                retriever.add_recipes(DEFAULT_RECIPES)
+                _qa_retriever = retriever
+    return _qa_retriever
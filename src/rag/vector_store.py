@@ -1,8 +1,15 @@
 """Vector Store 설정"""
 import os
+import re
 import json
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .ingredient_index import IngredientIndex, RecipeBitsets
 
 # chromadb 선택적 임포트
 try:
@@ -14,6 +21,19 @@ except ImportError:
     chromadb = None
     Settings = None
 
+logger = logging.getLogger(__name__)
+
+# 하이브리드 검색: 각 검색기에서 가져올 후보 수 하한과 RRF 상수
+HYBRID_MIN_CANDIDATES = 20
+HYBRID_RRF_K = 60
+
+# 레시피 저장 형식 버전 (1: 문서에 레시피 JSON, 2: 타입이 있는 메타데이터)
+RECIPE_SCHEMA_VERSION = 2
+RECIPE_FIELDS = ("title", "description", "cooking_time", "cooking_minutes", "difficulty", "calories")
+
+_HOURS_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(?:시간|(?:hours?|hrs?|h)(?![a-z]))", re.IGNORECASE)
+_MINUTES_PATTERN = re.compile(r"(\d+)\s*(?:분|(?:minutes?|mins?|m)(?![a-z]))", re.IGNORECASE)
+
 # 기본 레시피 데이터
 DEFAULT_RECIPES = [
     {
@@ -83,13 +103,140 @@ DEFAULT_RECIPES = [
 ]
 
 
+def recipe_id(recipe: Dict[str, Any]) -> str:
+    """레시피 내용 기반 고유 ID (같은 제목의 다른 레시피는 구분, 같은 레시피는 재적재해도 동일)"""
+    title = " ".join(str(recipe.get("title", "")).split())
+    ingredients = sorted(" ".join(str(i).split()) for i in recipe.get("ingredients", []))
+    key = json.dumps([title, ingredients], ensure_ascii=False)
+    return "recipe_" + hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def recipe_text(recipe: Dict[str, Any]) -> str:
+    """임베딩/본문 검색용 레시피 텍스트"""
+    ingredients_text = ", ".join(recipe.get("ingredients", []))
+    return f"{recipe.get('title', '')} {ingredients_text} {recipe.get('description', '')}"
+
+
+def parse_cooking_minutes(value: Any) -> Optional[int]:
+    """조리 시간 표기 → 분 ("15분" → 15, "1시간 30분" → 90, "10-15분" → 15)"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    text = str(value or "")
+    hours = sum(float(h) for h in _HOURS_PATTERN.findall(text))
+    minutes = sum(int(m) for m in _MINUTES_PATTERN.findall(text))
+    if not hours and not minutes:
+        bare = re.fullmatch(r"\s*(\d+)\s*", text)
+        return int(bare.group(1)) if bare else None
+    return int(round(hours * 60 + minutes))
+
+
+def recipe_metadata(recipe: Dict[str, Any]) -> Dict[str, Any]:
+    """레시피 → 타입이 있는 메타데이터 (값이 없는 필드는 넣지 않음 - ChromaDB는 None을 허용하지 않음)"""
+    metadata: Dict[str, Any] = {"title": str(recipe.get("title", ""))}
+    ingredients = [str(i) for i in recipe.get("ingredients", []) if str(i)]
+    if ingredients:
+        metadata["ingredients"] = ingredients
+    for field in ("description", "difficulty", "cooking_time"):
+        if recipe.get(field):
+            metadata[field] = str(recipe[field])
+    calories = recipe.get("calories")
+    if isinstance(calories, (int, float)) and not isinstance(calories, bool):
+        metadata["calories"] = int(calories)
+    cooking_minutes = parse_cooking_minutes(recipe.get("cooking_time"))
+    if cooking_minutes is not None:
+        metadata["cooking_minutes"] = cooking_minutes
+    return metadata
+
+
+def recipe_from_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """메타데이터 → 레시피 (검색 결과 변환, JSON 파싱 없음)"""
+    recipe = {field: metadata[field] for field in RECIPE_FIELDS if field in metadata}
+    recipe["ingredients"] = list(metadata.get("ingredients", []))
+    return recipe
+
+
+@dataclass
+class RecipeFilter:
+    """레시피 검색 조건 - 검색기 안에서 적용되어 결과 수를 줄이지 않음
+
+    칼로리/조리 시간 상한이 있으면 해당 값을 모르는 레시피는 제외합니다 (조건을 확인할 수 없음).
+    회피 키워드는 레시피 본문(제목/재료/설명)에 포함되면 제외합니다.
+    """
+
+    max_calories: Optional[int] = None
+    max_cooking_minutes: Optional[int] = None
+    difficulties: Sequence[str] = ()
+    avoid: Sequence[str] = ()
+
+    def __bool__(self) -> bool:
+        return bool(self._conditions() or self.avoid)
+
+    def _conditions(self) -> List[Dict[str, Any]]:
+        conditions = []
+        if self.max_calories is not None:
+            conditions.append({"calories": {"$lte": self.max_calories}})
+        if self.max_cooking_minutes is not None:
+            conditions.append({"cooking_minutes": {"$lte": self.max_cooking_minutes}})
+        if self.difficulties:
+            conditions.append({"difficulty": {"$in": list(self.difficulties)}})
+        return conditions
+
+    def where(self) -> Optional[Dict[str, Any]]:
+        conditions = self._conditions()
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+    def where_document(self) -> Optional[Dict[str, Any]]:
+        clauses = [{"$not_contains": keyword} for keyword in self.avoid]
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def matches(self, recipe: Dict[str, Any]) -> bool:
+        metadata = recipe_metadata(recipe)
+        for field, limit in (("calories", self.max_calories), ("cooking_minutes", self.max_cooking_minutes)):
+            if limit is not None and (field not in metadata or metadata[field] > limit):
+                return False
+        if self.difficulties and metadata.get("difficulty") not in self.difficulties:
+            return False
+        text = recipe_text(recipe)
+        return not any(keyword in text for keyword in self.avoid)
+
+
+# 벡터 검색(임베딩 요청 포함)을 키워드 검색과 동시에 실행
+_search_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_search_executor() -> ThreadPoolExecutor:
+    global _search_executor
+    if _search_executor is None:
+        _search_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="recipe-search")
+    return _search_executor
+
+
 class RecipeVectorStore:
-    """레시피 벡터 저장소"""
+    """레시피 벡터 저장소
+
+    레시피는 타입이 있는 메타데이터(제목, 재료 목록, calories:int, cooking_minutes:int,
+    difficulty 등)로 저장하고, 문서에는 본문 검색용 텍스트만 둡니다. 검색 결과는
+    메타데이터에서 바로 레시피로 변환되고, 식단 조건은 `where` 필터로 인덱스에서 처리됩니다.
+    """
     
-    def __init__(self, persist_directory: str = "./data/vectors"):
+    def __init__(self, persist_directory: str = "./data/vectors", backend: str = None):
         self.persist_directory = Path(persist_directory)
         self.persist_directory.mkdir(parents=True, exist_ok=True)
-        self.use_chromadb = CHROMADB_AVAILABLE
+        backend = (backend or os.getenv("VECTOR_STORE_BACKEND") or "chroma").lower()
+        self.use_chromadb = CHROMADB_AVAILABLE and backend != "numpy"
+        
+        # 임베딩 모델마다 차원이 달라 모델별 컬렉션 사용
+        from .embeddings import EMBEDDING_MODEL, get_embedding_model
+        
+        model = get_embedding_model()
+        self.collection_name = (
+            "recipes" if model == EMBEDDING_MODEL
+            else "recipes__" + re.sub(r"[^0-9A-Za-z_-]+", "_", model)
+        )
         
         if self.use_chromadb:
             # ChromaDB 클라이언트 초기화
@@ -100,100 +247,255 @@ class RecipeVectorStore:
             
             # 컬렉션 생성 또는 로드
             self.collection = self.client.get_or_create_collection(
-                name="recipes",
-                metadata={"description": "Recipe collection"}
+                name=self.collection_name,
+                metadata={
+                    "description": "Recipe collection",
+                    "embedding_model": model,
+                    "recipe_schema": RECIPE_SCHEMA_VERSION,
+                }
             )
-            
-            # 초기 데이터 로드
-            self._initialize_recipes()
         else:
-            # 메모리 기반 저장소 사용
-            self.recipes = DEFAULT_RECIPES.copy()
-            import logging
-            logging.warning("chromadb가 설치되지 않았습니다. 간단한 메모리 기반 검색을 사용합니다.")
+            # 인프로세스 벡터 인덱스 사용 (data/vectors 아래 memmap 파일)
+            from .ann_index import NumpyVectorIndex
+            
+            if backend != "numpy":
+                logger.warning("chromadb가 설치되지 않았습니다. 인프로세스 벡터 인덱스를 사용합니다.")
+            self.index = NumpyVectorIndex(str(self.persist_directory), self.collection_name)
+            if len(self.index) == 0:
+                self.index.set_attribute("recipe_schema", RECIPE_SCHEMA_VERSION)
+        
+        # 재료 역색인 (첫 키워드 검색 시 저장된 레시피로 구성, 이후 add_recipes에서 갱신)
+        self._ingredient_index: Optional[IngredientIndex] = None
+        self._recipe_cache: Dict[str, Dict[str, Any]] = {}
+        
+        # 이전 형식(JSON 문서) 레시피 변환 후 초기 데이터 로드
+        self._migrate_legacy_recipes()
+        self._initialize_recipes()
     
     def _initialize_recipes(self):
         """기본 레시피 데이터 초기화"""
-        if self.use_chromadb and self.collection.count() == 0:
-            # 기본 레시피 추가
-            for recipe in DEFAULT_RECIPES:
-                self.add_recipe(recipe)
+        if self.count() == 0:
+            # 기본 레시피 일괄 추가
+            self.add_recipes(DEFAULT_RECIPES)
     
     def add_recipe(self, recipe: Dict[str, Any]):
         """레시피 추가"""
-        if not self.use_chromadb:
-            self.recipes.append(recipe)
+        self.add_recipes([recipe])
+    
+    def add_recipes(self, recipes: List[Dict[str, Any]]):
+        """레시피 일괄 추가/갱신 (임베딩은 배치 요청 + 캐시, ID는 내용 기반이라 재실행해도 중복 없음)"""
+        if not recipes:
             return
+        from .embeddings import get_embeddings_batch
         
-        from .embeddings import get_embeddings
-        
-        # 재료 리스트를 문자열로 변환
-        ingredients_text = ", ".join(recipe.get("ingredients", []))
-        text = f"{recipe.get('title', '')} {ingredients_text} {recipe.get('description', '')}"
+        # 같은 배치 안의 중복 레시피는 마지막 것만 사용
+        unique = {recipe_id(r): r for r in recipes}
+        ids = list(unique)
+        recipes = list(unique.values())
         
         # 임베딩 생성
-        embedding = get_embeddings(text)
+        documents = [recipe_text(r) for r in recipes]
+        embeddings = get_embeddings_batch(documents)
+        metadatas = [recipe_metadata(r) for r in recipes]
+        
+        if self._ingredient_index is not None:
+            self._ingredient_index.add_many((rid, r.get("ingredients", [])) for rid, r in unique.items())
+            self._recipe_cache.update(
+                (rid, recipe_from_metadata(meta)) for rid, meta in zip(ids, metadatas)
+            )
         
-        # ChromaDB에 추가
-        self.collection.add(
-            embeddings=[embedding],
-            documents=[json.dumps(recipe, ensure_ascii=False)],
-            ids=[f"recipe_{recipe.get('title', 'unknown')}"]
-        )
-    
-    def search_recipes(self, ingredients: List[str], top_k: int = 5) -> List[Dict[str, Any]]:
-        """재료 기반 레시피 검색"""
         if not self.use_chromadb:
-            # 간단한 키워드 기반 검색
-            return self._simple_search(ingredients, top_k)
+            self.index.upsert(ids, embeddings, documents, metadatas)
+            return
         
-        from .embeddings import get_embeddings
+        # ChromaDB에 upsert (클라이언트 최대 배치 크기 단위)
+        batch_size = self.client.get_max_batch_size()
+        for start in range(0, len(recipes), batch_size):
+            end = start + batch_size
+            self.collection.upsert(
+                embeddings=embeddings[start:end],
+                documents=documents[start:end],
+                metadatas=metadatas[start:end],
+                ids=ids[start:end]
+            )
+    
+    def count(self) -> int:
+        """저장된 레시피 수"""
+        return self.collection.count() if self.use_chromadb else len(self.index)
+    
+    def search_recipes(
+        self,
+        ingredients: List[str],
+        top_k: int = 5,
+        recipe_filter: Optional[RecipeFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """재료 기반 레시피 검색 (재료 매칭 + 임베딩 유사도를 RRF로 결합)
+
+        두 검색기를 동시에 실행하고 각각 조건을 통과한 후보만 가져오므로, 많이 가져와서
+        파이썬에서 버리는 과정이 없습니다. 결과에는 보유 재료 매칭률(match_rate)이 붙습니다.
+        """
+        if not ingredients or top_k <= 0:
+            return []
+        candidates = max(2 * top_k, HYBRID_MIN_CANDIDATES)
+        vector_future = _get_search_executor().submit(
+            self.vector_search, ingredients, candidates, recipe_filter
+        )
+        keyword_hits = [
+            (rid, recipe) for rid, _, recipe in self._keyword_hits(ingredients, candidates, recipe_filter)
+        ]
+        try:
+            vector_hits = vector_future.result()
+        except Exception as e:
+            # 임베딩 실패 시 재료 매칭 결과만 사용
+            logger.error(f"벡터 검색 실패, 재료 매칭 결과만 사용합니다: {e}")
+            vector_hits = []
+        
+        fused: Dict[str, float] = {}
+        recipes: Dict[str, Dict[str, Any]] = {}
+        for hits in (keyword_hits, vector_hits):
+            for rank, (rid, recipe) in enumerate(hits):
+                fused[rid] = fused.get(rid, 0.0) + 1.0 / (HYBRID_RRF_K + rank + 1)
+                recipes.setdefault(rid, recipe)
         
-        # 재료를 문자열로 변환
-        query_text = ", ".join(ingredients)
+        results = [dict(recipes[rid]) for rid in sorted(fused, key=fused.get, reverse=True)[:top_k]]
+        rates = RecipeBitsets([r.get("ingredients", []) for r in results]).match_rates(ingredients)
+        for recipe, rate in zip(results, rates):
+            recipe["match_rate"] = round(float(rate), 2)
+        return results
+    
+    def vector_search(
+        self,
+        ingredients: List[str],
+        top_k: int = 5,
+        recipe_filter: Optional[RecipeFilter] = None,
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """임베딩 유사도 검색 → [(레시피 ID, 레시피)] (조건은 인덱스 안에서 적용)"""
+        from .embeddings import get_embeddings
         
         # 쿼리 임베딩 생성
-        query_embedding = get_embeddings(query_text)
+        query_embedding = get_embeddings(", ".join(ingredients))
+        where = recipe_filter.where() if recipe_filter else None
+        where_document = recipe_filter.where_document() if recipe_filter else None
         
-        # 유사도 검색
+        if not self.use_chromadb:
+            hits = self.index.search(query_embedding, top_k, where=where, where_document=where_document)
+            return [(rid, recipe_from_metadata(meta)) for rid, _, meta in hits]
+        
+        # 유사도 검색 (메타데이터만 받아 바로 레시피로 변환)
         results = self.collection.query(
             query_embeddings=[query_embedding],
-            n_results=top_k
+            n_results=top_k,
+            where=where,
+            where_document=where_document,
+            include=["metadatas"],
         )
-        
-        # 결과 파싱
-        recipes = []
-        if results["documents"] and len(results["documents"][0]) > 0:
-            for doc in results["documents"][0]:
-                recipe = json.loads(doc)
-                recipes.append(recipe)
-        
-        return recipes
+        if not results["ids"]:
+            return []
+        return [
+            (rid, recipe_from_metadata(meta or {}))
+            for rid, meta in zip(results["ids"][0], results["metadatas"][0])
+        ]
+    
+    def keyword_search(
+        self,
+        ingredients: List[str],
+        top_k: int = 5,
+        recipe_filter: Optional[RecipeFilter] = None,
+    ) -> List[Dict[str, Any]]:
+        """재료명 매칭률 기반 검색 (재료 역색인, 일치한 레시피만 점수 계산)"""
+        results = []
+        for _, rate, recipe in self._keyword_hits(ingredients, top_k, recipe_filter):
+            recipe = dict(recipe)
+            recipe["match_rate"] = round(rate, 2)
+            results.append(recipe)
+        return results
     
-    def _simple_search(self, ingredients: List[str], top_k: int = 5) -> List[Dict[str, Any]]:
-        """간단한 키워드 기반 검색 (chromadb 없을 때 사용)"""
-        scored_recipes = []
+    def _keyword_hits(
+        self,
+        ingredients: List[str],
+        top_k: int,
+        recipe_filter: Optional[RecipeFilter] = None,
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """재료 역색인 검색 → [(레시피 ID, 매칭률, 레시피)]"""
+        index = self._get_ingredient_index()
+        accept = (lambda rid: recipe_filter.matches(self._recipe_cache[rid])) if recipe_filter else None
+        return [
+            (rid, rate, self._recipe_cache[rid])
+            for rate, rid in index.top_k(ingredients, top_k, accept=accept)
+        ]
+    
+    def _get_ingredient_index(self) -> IngredientIndex:
+        if self._ingredient_index is None:
+            index = IngredientIndex()
+            for rid, _, metadata in self._iter_records():
+                recipe = recipe_from_metadata(metadata)
+                self._recipe_cache[rid] = recipe
+                index.add(rid, recipe["ingredients"])
+            self._ingredient_index = index
+        return self._ingredient_index
+    
+    def _iter_records(
+        self, include_documents: bool = False, page_size: int = 5000
+    ) -> Iterator[Tuple[str, Optional[str], Dict[str, Any]]]:
+        """저장된 (ID, 문서, 메타데이터) 전체 순회"""
+        if not self.use_chromadb:
+            for rid, document, metadata in self.index.records():
+                yield rid, document if include_documents else None, metadata
+            return
+        include = ["metadatas", "documents"] if include_documents else ["metadatas"]
+        offset = 0
+        while True:
+            page = self.collection.get(include=include, limit=page_size, offset=offset)
+            documents = page["documents"] if include_documents else [None] * len(page["ids"])
+            for rid, document, metadata in zip(page["ids"], documents, page["metadatas"]):
+                yield rid, document, metadata or {}
+            if len(page["ids"]) < page_size:
+                return
+            offset += page_size
+    
+    def _schema_version(self) -> int:
+        attributes = (self.collection.metadata or {}) if self.use_chromadb else self.index.attributes
+        return int(attributes.get("recipe_schema", 1))
+    
+    def _migrate_legacy_recipes(self, batch_size: int = 1000):
+        """레시피 JSON을 문서에만 담던 이전 형식 → 메타데이터 채우기 (임베딩/문서는 그대로)"""
+        if self._schema_version() >= RECIPE_SCHEMA_VERSION:
+            return
+        pending_ids: List[str] = []
+        pending_metadatas: List[Dict[str, Any]] = []
+        migrated = 0
         
-        for recipe in self.recipes:
-            recipe_ingredients = recipe.get("ingredients", [])
-            
-            # 매칭 점수 계산
-            match_count = 0
-            for ingredient in ingredients:
-                for recipe_ing in recipe_ingredients:
-                    if ingredient in recipe_ing or recipe_ing in ingredient:
-                        match_count += 1
-                        break
-            
-            if match_count > 0:
-                score = match_count / max(len(recipe_ingredients), 1)
-                scored_recipes.append((score, recipe))
+        def flush():
+            if not pending_ids:
+                return
+            if self.use_chromadb:
+                self.collection.update(ids=pending_ids, metadatas=pending_metadatas)
+            else:
+                self.index.update_metadata(pending_ids, pending_metadatas)
+            pending_ids.clear()
+            pending_metadatas.clear()
         
-        # 점수로 정렬
-        scored_recipes.sort(key=lambda x: x[0], reverse=True)
+        for rid, document, metadata in list(self._iter_records(include_documents=True)):
+            if "title" in metadata:
+                continue
+            try:
+                recipe = json.loads(document or "")
+            except json.JSONDecodeError:
+                continue
+            pending_ids.append(rid)
+            pending_metadatas.append(recipe_metadata(recipe))
+            migrated += 1
+            if len(pending_ids) >= batch_size:
+                flush()
+        flush()
         
-        # 상위 k개 반환
-        return [recipe for _, recipe in scored_recipes[:top_k]]
+        if self.use_chromadb:
+            self.collection.modify(
+                metadata={**(self.collection.metadata or {}), "recipe_schema": RECIPE_SCHEMA_VERSION}
+            )
+        else:
+            self.index.set_attribute("recipe_schema", RECIPE_SCHEMA_VERSION)
+        logger.info(f"레시피 메타데이터 변환 완료: {migrated}건")
 
 
 # 전역 인스턴스
@@ -0,0 +1,109 @@
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.rag.ann_index import NumpyVectorIndex
+from src.rag.embeddings import BatchEmbedder
+from src.rag.embedding_backends import HashedNgramBackend
+from src.rag.vector_store import RecipeVectorStore
+
+
+def _clustered_vectors(n, dim=32, clusters=40, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=n)
+    return (centers[labels] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+class TestNumpyVectorIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_ivf_recall_against_brute_force(self):
+        vectors = _clustered_vectors(5000)
+        ids = [f"doc{i}" for i in range(len(vectors))]
+        exact = NumpyVectorIndex(self.tmpdir.name, "exact", brute_force_max=10**9)
+        ivf = NumpyVectorIndex(self.tmpdir.name, "ivf", brute_force_max=500, nprobe=8)
+        for index in (exact, ivf):
+            index.upsert(ids, vectors, ids)
+
+        queries = _clustered_vectors(50, seed=1)
+        recall = np.mean([
+            len({r[0] for r in exact.search(q, 10)} & {r[0] for r in ivf.search(q, 10)}) / 10
+            for q in queries
+        ])
+
+        self.assertTrue(ivf.uses_ivf)
+        self.assertFalse(exact.uses_ivf)
+        self.assertGreaterEqual(recall, 0.9)
+
+    def test_persistence_and_upsert(self):
+        vectors = _clustered_vectors(100)
+        ids = [f"doc{i}" for i in range(100)]
+        index = NumpyVectorIndex(self.tmpdir.name, "recipes")
+        index.upsert(ids, vectors, [f"본문{i}" for i in range(100)], [{"n": i} for i in range(100)])
+        # 기존 ID 갱신은 행을 늘리지 않음
+        index.upsert(["doc3"], vectors[7:8], ["갱신된 본문"], [{"n": 7}])
+        index.update_metadata(["doc42"], [{"tag": "갱신"}])
+        index.set_attribute("schema", 2)
+
+        reopened = NumpyVectorIndex(self.tmpdir.name, "recipes")
+        top_id, score, _ = reopened.search(vectors[7], 1)[0]
+
+        self.assertEqual(len(reopened), 100)
+        self.assertIn(top_id, ("doc3", "doc7"))
+        self.assertAlmostEqual(score, 1.0, places=5)
+        self.assertEqual(reopened.search(vectors[42], 1)[0][2], {"n": 42, "tag": "갱신"})
+        self.assertEqual(dict((i, d) for i, d, _ in reopened.records())["doc3"], "갱신된 본문")
+        self.assertEqual(reopened.attributes, {"schema": 2})
+        with self.assertRaises(ValueError):
+            reopened.upsert(["bad"], np.ones((1, 8)), ["차원 불일치"])
+
+    def test_list_contains_and_log_compaction(self):
+        vectors = _clustered_vectors(4)
+        ids = [f"doc{i}" for i in range(4)]
+        index = NumpyVectorIndex(self.tmpdir.name, "lists")
+        # 모든 행의 재료 수가 같아도 목록 원소 단위로 필터
+        index.upsert(ids, vectors, ids, [{"ingredients": ["김치", "밥"]}, {"ingredients": ["두부", "파"]},
+                                         {"ingredients": ["김치", "두부"]}, {"ingredients": ["계란", "밥"]}])
+        hits = index.search(vectors[0], 4, where={"ingredients": {"$contains": "김치"}})
+        self.assertEqual(sorted(h[0] for h in hits), ["doc0", "doc2"])
+
+        for round_ in range(600):
+            index.update_metadata(["doc1", "doc3"], [{"round": round_}] * 2)
+        docs_path = os.path.join(self.tmpdir.name, "lists.docs.jsonl")
+        with open(docs_path, encoding="utf-8") as f:
+            self.assertLessEqual(len(f.readlines()), 2 * 4 + 1024)
+
+        index.compact()
+        reopened = NumpyVectorIndex(self.tmpdir.name, "lists")
+        with open(docs_path, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 4)
+        self.assertEqual(reopened.search(vectors[3], 1)[0][2], {"ingredients": ["계란", "밥"], "round": 599})
+
+    def test_recipe_store_without_chroma(self):
+        embedder = BatchEmbedder(HashedNgramBackend(), model="hashed-test")
+        with patch("src.rag.embeddings.get_embedder", return_value=embedder):
+            store = RecipeVectorStore(persist_directory=self.tmpdir.name, backend="numpy")
+            store.add_recipes([{"title": "김치볶음밥", "ingredients": ["김치", "밥", "계란"]}])
+            results = store.search_recipes(["김치", "밥"], top_k=3)
+            reopened = RecipeVectorStore(persist_directory=self.tmpdir.name, backend="numpy")
+
+        self.assertFalse(store.use_chromadb)
+        self.assertEqual(results[0]["title"], "김치볶음밥")
+        self.assertEqual(reopened.count(), store.count())
+
+
+if __name__ == '__main__':
+    unittest.main()
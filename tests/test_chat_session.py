@@ -0,0 +1,181 @@
+import sys
+import os
+import asyncio
+import unittest
+from unittest.mock import patch
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents import qa_agent
+from src.core.chat_session import ChatSessionStore
+from src.rag.qa_retriever import QARetriever, count_tokens
+
+
+class _FakeChain:
+    """LLM 체인 대역 - 입력을 기록하고 고정 응답 반환"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = []
+
+    async def ainvoke(self, inputs):
+        self.calls.append(inputs)
+        return self.reply
+
+    async def astream(self, inputs):
+        self.calls.append(inputs)
+        self.closed = False
+        self.produced = 0
+        try:
+            for token in self.reply.split(" "):
+                self.produced += 1
+                yield token + " "
+                await asyncio.sleep(0)
+        finally:
+            self.closed = True
+
+
+class TestChatSession(unittest.TestCase):
+
+    def setUp(self):
+        self.retriever = QARetriever()
+        self.loads = 0
+
+        async def loader():
+            self.loads += 1
+            return [{"item_id": "milk-1", "name": "우유", "category": "유제품", "quantity": 1,
+                     "unit": "개", "location": "냉장", "expiry_date": "2030-01-01"}]
+
+        self.retriever.ensure_inventory = self._wrap_ensure(self.retriever.ensure_inventory, loader)
+        self.qa_chain = _FakeChain("우유가 1개 있어요. " * 20)
+        self.summary_chain = _FakeChain("사용자는 우유 요리에 관심이 있음")
+        self.patches = [
+            patch.object(qa_agent, "get_qa_retriever", return_value=self.retriever),
+            patch.object(qa_agent, "get_qa_chain", return_value=self.qa_chain),
+            patch.object(qa_agent, "get_summary_chain", return_value=self.summary_chain),
+            patch.object(qa_agent, "CHAT_HISTORY_TOKEN_BUDGET", 400),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    @staticmethod
+    def _wrap_ensure(ensure, loader):
+        async def wrapped(fridge_id, _loader):
+            await ensure(fridge_id, loader)
+        return wrapped
+
+    def test_history_is_bounded_and_summarized(self):
+        store = ChatSessionStore()
+
+        async def conversation():
+            session = store.get_or_create(None, "f1")
+            for i in range(12):
+                await qa_agent.answer_user_question(f"우유로 뭐 만들까? {i}", session=store.get_or_create(session.session_id, "f1"))
+                await asyncio.gather(*qa_agent._background_tasks)
+            return session
+
+        session = asyncio.run(conversation())
+
+        self.assertEqual(self.loads, 1)  # 재고는 세션 첫 턴에만 적재
+        self.assertGreater(session.summarized_turns, 0)
+        self.assertEqual(session.summary, "사용자는 우유 요리에 관심이 있음")
+        # 요약은 접힌 턴만 입력으로 받음 (전체 대화 재전송 없음)
+        self.assertNotIn("? 11", self.summary_chain.calls[-1]["transcript"])
+        # 매 턴 전달되는 최근 대화는 예산 이내로 유지
+        for call in self.qa_chain.calls:
+            self.assertLessEqual(sum(count_tokens(text) + 4 for _, text in call["history"]), 400)
+        self.assertLess(len(self.summary_chain.calls), 12)
+        self.assertEqual(self.qa_chain.calls[-1]["summary"], session.summary)
+
+    def test_inventory_cache_invalidated_on_write(self):
+        store = ChatSessionStore()
+
+        async def conversation():
+            session = store.get_or_create("s1", "f1")
+            await qa_agent.answer_user_question("우유 있어?", session=session)
+            self.assertTrue(any("수량: 1개" in line for line in session.inventory_lines))
+
+            self.retriever.apply_inventory_delta("f1", [
+                {"item_id": "milk-1", "name": "우유", "category": "유제품", "quantity": 3,
+                 "unit": "개", "location": "냉장", "expiry_date": "2030-01-01"}
+            ], [])
+            await qa_agent.answer_user_question("그럼 몇 개야?", session=session)
+            return session
+
+        session = asyncio.run(conversation())
+
+        inventory = self.qa_chain.calls[-1]["inventory"]
+        self.assertIn("수량: 3개", inventory)
+        self.assertNotIn("수량: 1개", inventory)
+        self.assertEqual(session.inventory_version, self.retriever.inventory_version("f1"))
+
+    def test_stream_records_turn_when_complete(self):
+        store = ChatSessionStore()
+
+        async def conversation():
+            session = store.get_or_create("s1", "f1")
+            chunks = [c async for c in qa_agent.stream_user_answer("우유 있어?", session=session)]
+            return session, chunks
+
+        session, chunks = asyncio.run(conversation())
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(session.turns[-1], ("ai", "".join(chunks)))
+
+    def test_stream_cancelled_by_consumer_stops_generation(self):
+        store = ChatSessionStore()
+
+        async def conversation():
+            session = store.get_or_create("s1", "f1")
+            answer = qa_agent.stream_user_answer("우유 있어?", session=session)
+            await answer.__anext__()
+            await answer.__anext__()
+            await answer.aclose()  # 클라이언트 연결 종료
+            return session
+
+        session = asyncio.run(conversation())
+
+        self.assertTrue(self.qa_chain.closed)
+        self.assertEqual(self.qa_chain.produced, 2)
+        self.assertEqual(session.turns, [])
+        self.assertFalse(session.lock.locked())
+
+    def test_sse_endpoint(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from src.api.routes import router
+
+        app = FastAPI()
+        app.include_router(router)
+        with TestClient(app) as client:
+            with client.stream("POST", "/api/v1/chat/stream", json={"message": "우유 있어?", "fridge_id": "f1"}) as resp:
+                self.assertEqual(resp.headers["content-type"].split(";")[0], "text/event-stream")
+                body = "".join(resp.iter_text())
+
+        events = [block.split("\n")[0] for block in body.strip().split("\n\n")]
+        self.assertEqual(events[0], "event: session")
+        self.assertEqual(events[-1], "event: done")
+        self.assertIn("event: delta", events)
+
+    def test_store_evicts_expired_and_lru(self):
+        store = ChatSessionStore(ttl_seconds=3600, max_sessions=2)
+        a = store.get_or_create(None, "f1")
+        store.get_or_create(None, "f1")
+        store.get_or_create(a.session_id, "f1")  # a를 최근 사용으로 갱신
+        store.get_or_create(None, "f1")
+
+        self.assertEqual(len(store), 2)
+        self.assertIs(store.get_or_create(a.session_id, "f1"), a)
+
+        expired = ChatSessionStore(ttl_seconds=0)
+        b = expired.get_or_create(None, "f1")
+        self.assertIsNot(expired.get_or_create(b.session_id, "f1"), b)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from PIL import Image, ImageDraw
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents.vision_agent import classify_tiered, residual_image
+from src.core.crop_cache import CropCache, CropSignature, get_crop_cache, residual_cells
+
+
+def _response(items):
+    response = MagicMock()
+    response.choices[0].message.content = json.dumps({"i": items})
+    response.choices[0].finish_reason = "stop"
+    return response
+
+
+def _item(k, name, bbox=(0, 0, 1000, 1000)):
+    return {"k": k, "n": name, "c": "기타", "q": 1, "u": "개", "f": "좋음", "p": "병",
+            "s": 0.9, "b": list(bbox), "e": None}
+
+
+def _shelf(path, right_color, apple=True):
+    image = Image.new("RGB", (1600, 1200), (235, 235, 235))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((100, 50, 700, 550), fill=(250, 250, 245))
+    draw.rectangle((300, 100, 500, 500), fill=(40, 120, 200))
+    draw.rectangle((900, 50, 1500, 550), fill=right_color)
+    if apple:  # 박스 밖 나머지 영역의 식재료
+        draw.ellipse((160, 720, 480, 960), fill=(200, 30, 40))
+    image.save(path)
+
+
+class TestCropSignature(unittest.TestCase):
+
+    def test_signature_tolerates_noise_but_not_new_objects(self):
+        image = Image.new("L", (200, 200))
+        image.putdata([(x * 3 + y) % 256 for y in range(200) for x in range(200)])
+        image = image.convert("RGB")
+        brighter = image.point(lambda v: min(255, v + 10))
+        other = image.transpose(Image.FLIP_LEFT_RIGHT)
+
+        cache = CropCache(max_distance=6)
+        cache.store("f1", CropSignature.of(image), "bottle", {"name": "우유", "bbox_2d": [1, 2, 3, 4]})
+
+        self.assertEqual(cache.lookup("f1", CropSignature.of(brighter), "bottle")["name"], "우유")
+        self.assertNotIn("bbox_2d", cache.lookup("f1", CropSignature.of(image), "bottle"))
+        self.assertIsNone(cache.lookup("f1", CropSignature.of(other), "bottle"))
+        self.assertIsNone(cache.lookup("f1", CropSignature.of(image), "cup"))
+        self.assertIsNone(cache.lookup("f2", CropSignature.of(image), "bottle"))
+
+    def test_residual_detects_single_removed_item(self):
+        # 4000x3000 선반의 박스 밖 영역에 물건 25개 - 하나씩 빼도 모두 캐시 미스여야 함
+        positions = [(180 + 760 * (i % 5), 1250 + 340 * (i // 5)) for i in range(25)]
+
+        def shelf(skip=None):
+            image = Image.new("RGB", (4000, 3000), (230, 230, 225))
+            draw = ImageDraw.Draw(image)
+            draw.rectangle((0, 0, 4000, 1100), fill=(90, 90, 90))  # YOLO 박스로 분류된 윗칸
+            for i, (x, y) in enumerate(positions):
+                if i != skip:
+                    draw.rectangle((x, y, x + 160, y + 200), fill=(40 + 8 * i, 160, 200 - 6 * i))
+            return residual_cells(residual_image(image, [[0, 0, 370, 1000]]))
+
+        cache = CropCache()
+        cache.store_residual("f1", shelf(), [{"name": "요거트", "bbox_2d": [500, 100, 560, 140]}])
+
+        self.assertEqual(cache.lookup_residual("f1", shelf())[0]["name"], "요거트")
+        for i in range(25):
+            self.assertIsNone(cache.lookup_residual("f1", shelf(skip=i)), i)
+
+
+class TestIncrementalRescan(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.image_path = os.path.join(self.tmpdir.name, "fridge.jpg")
+        get_crop_cache().clear()
+        self.detections = [
+            {"yolo_class": "bottle", "yolo_conf": 0.6, "bbox_2d": [50, 70, 450, 430]},
+            {"yolo_class": "bottle", "yolo_conf": 0.6, "bbox_2d": [50, 570, 450, 930]},
+        ]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        get_crop_cache().clear()
+
+    def _scan(self, right_color, responses, apple=True):
+        _shelf(self.image_path, right_color, apple)
+        with patch("src.agents.vision_agent.OpenAI") as mock_openai:
+            create = mock_openai.return_value.chat.completions.create
+            create.side_effect = responses
+            items, stats = classify_tiered(self.image_path, [dict(d) for d in self.detections], "fridge-1")
+        return items, stats, create
+
+    def test_rescan_sends_only_changed_crops(self):
+        apple = _item(-1, "사과", (600, 100, 800, 300))
+        items, stats, create = self._scan((60, 160, 60), [
+            _response([_item(0, "우유"), _item(1, "사이다")]),
+            _response([apple]),  # 박스 밖 나머지 영역
+        ])
+        self.assertEqual(create.call_count, 2)
+        self.assertEqual([i["name"] for i in items], ["우유", "사이다", "사과"])
+
+        # 그대로 다시 찍으면 LLM 호출 없음
+        items, stats, create = self._scan((60, 160, 60), [])
+        create.assert_not_called()
+        self.assertEqual([(i["name"], i["vision_tier"]) for i in items],
+                         [("우유", "cache"), ("사이다", "cache"), ("사과", "cache")])
+        self.assertEqual(items[1]["bbox_2d"], self.detections[1]["bbox_2d"])
+        self.assertEqual((stats["cached"], stats["residual_cached"], stats["gpt4o_image_tokens"]), (2, 1, 0))
+
+        # 오른쪽 박스만 바뀌면 그 박스 하나만 분류
+        items, stats, create = self._scan((200, 60, 60), [_response([_item(0, "토마토주스")])])
+        self.assertEqual(create.call_count, 1)
+        sent = create.call_args.kwargs["messages"][1]["content"]
+        self.assertEqual(sum(part["type"] == "image_url" for part in sent), 1)
+        self.assertEqual(sorted(i["name"] for i in items), ["사과", "우유", "토마토주스"])
+
+        # 나머지 영역에서 사과를 꺼내면 나머지 영역을 다시 분류 (이전 항목을 재사용하지 않음)
+        items, stats, create = self._scan((200, 60, 60), [_response([])], apple=False)
+        self.assertEqual(create.call_args.kwargs["model"], "gpt-4o")
+        self.assertEqual((stats["residual"], stats["residual_cached"]), (1, 0))
+        self.assertEqual(sorted(i["name"] for i in items), ["우유", "토마토주스"])
+
+
+if __name__ == '__main__':
+    unittest.main()
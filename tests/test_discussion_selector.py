@@ -0,0 +1,94 @@
+import sys
+import os
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents import discussion_agent
+from src.agents.discussion_agent import discussion_agent_node, recipe_style, select_recipes
+
+
+def _suggestion(title, ingredients, match_rate, cooking_time="20분"):
+    return {
+        "title": title,
+        "ingredients_needed": ingredients,
+        "match_rate": match_rate,
+        "cooking_time": cooking_time,
+        "priority_score": match_rate * 100,
+    }
+
+
+def _state(suggestions, narrative=False):
+    return {
+        "recipe_suggestions": suggestions,
+        "detected_items": [{"name": n} for n in ("돼지고기", "김치", "두부", "대파", "계란")],
+        "user_confirmed_items": [],
+        "expiry_data": [{"item": "두부", "urgency": "즉시소비"}],
+        "discussion_narrative": narrative,
+        "errors": [],
+    }
+
+
+class TestDiscussionSelector(unittest.TestCase):
+
+    def setUp(self):
+        discussion_agent.DISCUSSION_STATS.clear()
+
+    def test_recipe_style(self):
+        self.assertEqual(recipe_style("김치볶음밥"), "밥/면")
+        self.assertEqual(recipe_style("돼지고기 김치찌개"), "국물")
+        self.assertEqual(recipe_style("잔치국수"), "밥/면")
+        self.assertEqual(recipe_style("계란말이"), "기타")
+
+    def test_selection_prefers_new_styles(self):
+        recipes = [{"title": t} for t in ("김치찌개", "된장찌개", "두부조림", "제육볶음")]
+        picks, margin = select_recipes(recipes, [0.9, 0.85, 0.6, 0.5])
+
+        self.assertEqual(picks, [0, 2, 3])  # 같은 국물 스타일인 된장찌개는 밀려남
+        self.assertAlmostEqual(margin, 0.9 - 0.85)
+        self.assertEqual(select_recipes(recipes[:2], [0.9, 0.1]), ([0, 1], float("inf")))
+
+    @patch("src.agents.discussion_agent.OpenAI")
+    def test_decisive_ranking_skips_llm(self, mock_openai):
+        state = discussion_agent_node(_state([
+            _suggestion("두부 김치찌개", ["두부", "김치", "돼지고기"], 1.0, "15분"),
+            _suggestion("제육볶음", ["돼지고기", "고추장", "양파"], 0.33, "25분"),
+            _suggestion("계란말이", ["계란", "대파"], 1.0, "10분"),
+            _suggestion("소고기 미역국", ["소고기", "미역"], 0.0, "60분"),
+        ]))
+
+        mock_openai.assert_not_called()
+        result = state["discussion_result"]
+        self.assertEqual(result["method"], "deterministic")
+        self.assertEqual(
+            [r["title"] for r in state["recipe_suggestions"]], ["두부 김치찌개", "계란말이", "제육볶음"]
+        )
+        self.assertEqual(discussion_agent.DISCUSSION_STATS["deterministic"], 1)
+
+    @patch("src.agents.discussion_agent.OpenAI")
+    def test_close_scores_or_narrative_use_llm(self, mock_openai):
+        response = MagicMock()
+        response.choices[0].message.content = json.dumps(
+            {"s": [{"t": "B찌개", "r": "", "p": 90}], "d": "토론"}
+        )
+        mock_openai.return_value.chat.completions.create.return_value = response
+        close = [_suggestion(f"{c}찌개", ["두부"], 1.0) for c in "AB"] + [
+            _suggestion(f"{c}볶음", ["김치"], 1.0) for c in "CD"
+        ]
+
+        state = discussion_agent_node(_state(close))
+        self.assertEqual(state["discussion_result"]["method"], "llm")
+        self.assertEqual(
+            [r["title"] for r in state["recipe_suggestions"]], ["B찌개", "A찌개", "C볶음"]
+        )
+
+        discussion_agent_node(_state([_suggestion("두부찌개", ["두부"], 1.0)], narrative=True))
+        self.assertEqual(mock_openai.return_value.chat.completions.create.call_count, 2)
+        self.assertEqual(discussion_agent.DISCUSSION_STATS["llm"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.rag.embeddings import EmbeddingCache
+from src.rag.embedding_backends import (
+    HashedNgramBackend,
+    OpenAIBackend,
+    create_backend,
+)
+
+
+class TestEmbeddingBackends(unittest.TestCase):
+
+    def test_hashed_backend_is_deterministic_and_normalized(self):
+        backend = HashedNgramBackend(dim=256)
+        first = backend(["김치볶음밥", "우유 두부"])
+        second = HashedNgramBackend(dim=256)(["김치볶음밥", "우유 두부"])
+
+        self.assertEqual(first.shape, (2, 256))
+        np.testing.assert_array_equal(first, second)
+        np.testing.assert_allclose(np.linalg.norm(first, axis=1), 1.0, rtol=1e-5)
+        # 빈 텍스트는 0 벡터
+        self.assertEqual(float(np.abs(backend([""])).sum()), 0.0)
+
+    def test_hashed_backend_matches_spacing_variants(self):
+        backend = HashedNgramBackend()
+        query, spaced, unrelated = backend(["김치볶음밥", "김치 볶음밥", "연어 샐러드"])
+
+        self.assertGreater(float(query @ spaced), 0.5)
+        self.assertGreater(float(query @ spaced), float(query @ unrelated) + 0.3)
+
+    def test_quantized_cache_round_trip(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(20, 64)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        items = {f"k{i}": v for i, v in enumerate(vectors)}
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            EmbeddingCache("local-model", cache_dir=cache_dir, quantize=True).put_many(items)
+            reopened = EmbeddingCache("local-model", cache_dir=cache_dir, quantize=True)
+            found = reopened.get_many(list(items))
+
+            self.assertEqual(len(found), 20)
+            self.assertTrue(any(name.endswith(".i8") for name in os.listdir(cache_dir)))
+        for key, vector in items.items():
+            restored = found[key]
+            cosine = float(vector @ restored / np.linalg.norm(restored))
+            self.assertGreater(cosine, 0.99)
+
+    def test_create_backend_selection(self):
+        with patch.dict(os.environ, {"EMBEDDING_BACKEND": "", "OPENAI_API_KEY": ""}):
+            self.assertIsInstance(create_backend(), HashedNgramBackend)
+        with patch.dict(os.environ, {"EMBEDDING_BACKEND": "", "OPENAI_API_KEY": "sk-test"}):
+            self.assertIsInstance(create_backend(), OpenAIBackend)
+        # sentence-transformers가 없으면 hashed로 대체
+        with patch("src.rag.embedding_backends.SENTENCE_TRANSFORMERS_AVAILABLE", False):
+            self.assertIsInstance(create_backend("local"), HashedNgramBackend)
+        with self.assertRaises(ValueError):
+            create_backend("unknown")
+
+
+if __name__ == '__main__':
+    unittest.main()
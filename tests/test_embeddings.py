@@ -0,0 +1,71 @@
+import sys
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.rag.embeddings import BatchEmbedder, EmbeddingCache
+
+
+class _CountingProvider:
+    """입력 텍스트 길이로 만든 결정적 벡터를 반환하고 호출을 기록"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(t)), float(sum(map(ord, t)) % 97), 1.0] for t in texts]
+
+
+class TestBatchEmbedder(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_chunks_to_provider_limit_and_dedupes(self):
+        provider = _CountingProvider()
+        embedder = BatchEmbedder(provider, cache=EmbeddingCache("m", cache_dir=None), max_batch_size=4)
+        texts = [f"레시피{i}" for i in range(10)] + ["레시피0", "레시피1"]
+
+        vectors = embedder.embed(texts)
+
+        self.assertEqual(vectors.shape, (12, 3))
+        self.assertEqual(vectors.dtype, np.float32)
+        self.assertEqual([len(b) for b in provider.batches], [4, 4, 2])
+        np.testing.assert_array_equal(vectors[10], vectors[0])
+
+    def test_query_embeddings_are_reused(self):
+        provider = _CountingProvider()
+        embedder = BatchEmbedder(provider, cache=EmbeddingCache("m", cache_dir=None))
+
+        for _ in range(5):
+            embedder.embed(["두부, 김치"])
+
+        self.assertEqual(len(provider.batches), 1)
+        self.assertEqual(embedder.cache.hits, 4)
+
+    def test_disk_cache_survives_restart(self):
+        provider = _CountingProvider()
+        texts = [f"재료{i}" for i in range(3000)]
+        first = BatchEmbedder(provider, cache=EmbeddingCache("m", cache_dir=self.tmpdir.name, lru_size=10))
+        expected = first.embed(texts)
+
+        restarted = BatchEmbedder(provider, cache=EmbeddingCache("m", cache_dir=self.tmpdir.name, lru_size=10))
+        vectors = restarted.embed(texts + ["새 재료"])
+
+        self.assertEqual(restarted.provider_calls, 1)
+        self.assertEqual(provider.batches[-1], ["새 재료"])
+        np.testing.assert_array_equal(vectors[:3000], expected)
+        self.assertEqual(len(restarted.cache), 3001)
+
+
+if __name__ == '__main__':
+    unittest.main()
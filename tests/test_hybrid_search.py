@@ -0,0 +1,94 @@
+import sys
+import os
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents.recipe_agent import get_recipes_by_diet_type
+from src.rag.ann_index import NumpyVectorIndex
+from src.rag.embeddings import BatchEmbedder
+from src.rag.embedding_backends import HashedNgramBackend
+from src.rag.vector_store import CHROMADB_AVAILABLE, RecipeFilter, RecipeVectorStore
+
+RECIPES = [
+    {"title": f"김치볶음밥 {i}", "ingredients": ["김치", "밥", "식용유"], "calories": 500 + i,
+     "description": "기름에 볶은 밥"}
+    for i in range(30)
+] + [
+    {"title": "김치 샐러드", "ingredients": ["김치", "양배추"], "calories": 150, "description": "상큼한 샐러드"},
+    {"title": "두부 김치", "ingredients": ["두부", "김치"], "calories": 250, "description": "담백한 반찬"},
+    {"title": "김치전", "ingredients": ["김치", "밀가루"], "description": "칼로리 정보 없음"},
+]
+
+
+class TestHybridSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.embedder = BatchEmbedder(HashedNgramBackend(), model="hashed-test")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _store(self, backend):
+        with patch("src.rag.embeddings.get_embedder", return_value=self.embedder):
+            store = RecipeVectorStore(os.path.join(self.tmpdir.name, backend), backend=backend)
+            store.add_recipes(RECIPES)
+        return store
+
+    def test_index_filters_before_top_k(self):
+        index = NumpyVectorIndex(self.tmpdir.name, "filtered")
+        vectors = np.eye(4, dtype=np.float32)[[0] * 50 + [1] * 3]
+        index.upsert(
+            [f"d{i}" for i in range(53)],
+            vectors + 0.01 * np.arange(53)[:, None],
+            [("튀김 " if i % 2 else "") + f"문서{i}" for i in range(53)],
+            [{"calories": 800} if i < 50 else {"calories": 100} for i in range(53)],
+        )
+
+        hits = index.search(np.eye(4)[0], 3, where={"calories": {"$lte": 300}})
+        self.assertEqual(sorted(h[0] for h in hits), ["d50", "d51", "d52"])
+        hits = index.search(np.eye(4)[0], 5, where_document={"$not_contains": "튀김"})
+        self.assertEqual(len(hits), 5)
+        self.assertTrue(all("튀김" not in h[2] for h in hits))
+
+    def test_filter_is_pushed_down(self):
+        backends = ["numpy"] + (["chroma"] if CHROMADB_AVAILABLE else [])
+        recipe_filter = RecipeFilter(max_calories=300, avoid=["기름"])
+        for backend in backends:
+            store = self._store(backend)
+            with patch("src.rag.embeddings.get_embedder", return_value=self.embedder):
+                results = store.search_recipes(["김치", "밥"], top_k=3, recipe_filter=recipe_filter)
+                unfiltered = store.search_recipes(["김치", "밥"], top_k=3)
+
+            # 조건을 만족하는 레시피가 김치볶음밥 30개에 밀려 사라지지 않아야 함
+            titles = {r["title"] for r in results}
+            self.assertEqual(len(results), 3, backend)
+            self.assertTrue({"김치 샐러드", "두부 김치"} <= titles, backend)
+            self.assertTrue(all(r["calories"] <= 300 and "기름" not in r["description"] for r in results))
+            self.assertTrue(all(r["title"].startswith("김치볶음밥") for r in unfiltered), backend)
+            self.assertEqual(unfiltered[0]["match_rate"], 0.67)
+
+    def test_diet_recipes_use_recipe_filter(self):
+        store = MagicMock()
+        store.search_recipes.return_value = [
+            {"title": "구운 닭가슴살 샐러드", "ingredients": ["닭가슴살"], "calories": 200, "match_rate": 1.0},
+        ]
+        with patch("src.agents.recipe_agent.get_vector_store", return_value=store):
+            results = asyncio.run(get_recipes_by_diet_type("diet", [{"name": "닭가슴살"}]))
+
+        recipe_filter = store.search_recipes.call_args.kwargs["recipe_filter"]
+        self.assertEqual(recipe_filter.max_calories, 300)
+        self.assertIn("튀김", recipe_filter.avoid)
+        self.assertEqual(results[0]["diet_score"], 130)
+        self.assertTrue(results[0]["id"].startswith("recipe_"))
+
+
+if __name__ == '__main__':
+    unittest.main()
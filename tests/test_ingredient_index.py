@@ -0,0 +1,109 @@
+import sys
+import os
+import random
+import unittest
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents.recipe_agent import calculate_match_rate
+from src.rag.ingredient_index import (
+    IngredientIndex,
+    IngredientMatcher,
+    IngredientVocabulary,
+    RecipeBitsets,
+    get_vocabulary,
+    normalize_ingredient,
+)
+
+VOCABULARY = ["대파", "쪽파", "파", "양파", "계란", "밥", "볶음밥", "김치", "돼지고기", "고기", "두부", "된장"]
+
+
+def _pairwise_rate(recipe_ingredients, available):
+    """기존 전체 쌍 부분 문자열 비교 (정규화 후)"""
+    if not recipe_ingredients:
+        return 0.0
+    recipe = [normalize_ingredient(i) for i in recipe_ingredients]
+    owned = [normalize_ingredient(a) for a in available]
+    matched = sum(1 for r in recipe if any(r in a or a in r for a in owned))
+    return matched / len(recipe)
+
+
+class TestIngredientIndex(unittest.TestCase):
+
+    def test_normalization_and_synonyms(self):
+        self.assertEqual(normalize_ingredient("달걀 (2개)"), "계란")
+        self.assertEqual(normalize_ingredient("Egg"), "계란")
+        self.assertEqual(normalize_ingredient("다진 마늘 1큰술"), "다진마늘")
+        self.assertEqual(calculate_match_rate(["달걀", "대파", "소금"], ["계란", "파"]), 2 / 3)
+        self.assertEqual(calculate_match_rate([], ["계란"]), 0.0)
+
+    def test_matcher_agrees_with_pairwise_rule(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            recipe = rng.sample(VOCABULARY, rng.randint(1, 5))
+            available = rng.sample(VOCABULARY, rng.randint(1, 4))
+            self.assertAlmostEqual(
+                IngredientMatcher(available).match_rate(recipe), _pairwise_rate(recipe, available)
+            )
+
+    def test_top_k_matches_full_scan(self):
+        rng = random.Random(1)
+        recipes = {f"r{i}": rng.sample(VOCABULARY, rng.randint(2, 6)) for i in range(300)}
+        index = IngredientIndex()
+        index.add_many(recipes.items())
+        available = ["파", "계란", "돼지고기 앞다리"]
+
+        expected = sorted(
+            ((_pairwise_rate(ings, available), key) for key, ings in recipes.items()),
+            key=lambda x: -x[0],
+        )
+        top = index.top_k(available, 10)
+
+        self.assertEqual(len(top), 10)
+        self.assertEqual([rate for rate, _ in top], [rate for rate, _ in expected[:10]])
+        for rate, key in top:
+            self.assertAlmostEqual(rate, _pairwise_rate(recipes[key], available))
+
+    def test_upsert_replaces_recipe(self):
+        index = IngredientIndex()
+        index.add("r1", ["김치", "두부"])
+        index.add("r1", ["된장"])
+
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.top_k(["김치"], 5), [])
+        self.assertEqual(index.top_k(["된장"], 5), [(1.0, "r1")])
+
+
+class TestRecipeBitsets(unittest.TestCase):
+
+    def test_bitsets_agree_with_matcher(self):
+        rng = random.Random(2)
+        recipes = [rng.sample(VOCABULARY, rng.randint(1, 6)) for _ in range(300)] + [[]]
+        bitsets = RecipeBitsets(recipes, vocabulary=IngredientVocabulary())
+        for _ in range(20):
+            available = rng.sample(VOCABULARY, rng.randint(1, 4))
+            matcher = IngredientMatcher(available)
+            rates = bitsets.match_rates(available)
+            missing = bitsets.missing(available)
+            for row, recipe in enumerate(recipes):
+                self.assertAlmostEqual(rates[row], matcher.match_rate(recipe))
+                self.assertEqual(missing[row], [i for i in recipe if not matcher.matches(i)])
+
+    def test_uses_any_and_missing_keep_original_names(self):
+        bitsets = RecipeBitsets([["달걀 2개", "대파", "소금"], ["두부", "된장"], []])
+
+        self.assertEqual(bitsets.uses_any(["파"]).tolist(), [True, False, False])
+        self.assertEqual(bitsets.uses_any([]).tolist(), [False, False, False])
+        self.assertEqual(bitsets.missing(["계란", "파"]), [["소금"], ["두부", "된장"], []])
+        self.assertEqual(bitsets.match_rates(["계란"]).tolist(), [1 / 3, 0.0, 0.0])
+
+    def test_bitsets_do_not_grow_shared_vocabulary(self):
+        before = len(get_vocabulary())
+        bitsets = RecipeBitsets([[f"요청마다 다른 재료 {i}호" for i in range(50)]])
+        self.assertEqual(len(get_vocabulary()), before)
+        self.assertEqual(bitsets.n_bits, 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
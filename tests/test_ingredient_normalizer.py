@@ -0,0 +1,70 @@
+import sys
+import os
+import unittest
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents.expiry_agent import EXPIRY_DB, get_expiry_info
+from src.agents.inventory_agent import determine_storage_location
+from src.agents.recipe_agent import calculate_match_rate
+from src.rag.ingredient_normalizer import (
+    annotate_ingredient_ids,
+    get_resolver,
+    item_ingredient_id,
+    normalize_ingredient,
+    to_jamo,
+)
+
+
+class TestIngredientResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.resolver = get_resolver()
+
+    def test_catalog_covers_expiry_db(self):
+        for name in EXPIRY_DB:
+            self.assertEqual(self.resolver.match(name).kind, "exact", name)
+            self.assertEqual(self.resolver.canonical_name(name), name)
+
+    def test_synonyms_partial_and_fuzzy(self):
+        self.assertEqual(to_jamo("파김치"), "ㅍㅏㄱㅣㅁㅊㅣ")
+        self.assertEqual(self.resolver.resolve("달걀 10개"), self.resolver.resolve("계란"))
+        self.assertEqual(self.resolver.canonical_name("다진 마늘 1큰술"), "마늘")
+        self.assertEqual(self.resolver.canonical_name("양배추 반 통"), "양배추")
+        self.assertEqual(self.resolver.canonical_name("참치"), "참치캔")
+
+        typo = self.resolver.match("브로컬리")
+        self.assertEqual((typo.name, typo.kind, typo.category), ("브로콜리", "fuzzy", "채소"))
+        self.assertEqual(self.resolver.canonical_name("파프리까"), "파프리카")
+        # 두 음절 이름은 오타 보정하지 않음 ("고수"는 "고추"가 아님)
+        self.assertIsNone(self.resolver.resolve("고수"))
+        self.assertIsNone(self.resolver.resolve(""))
+
+    def test_english_aliases_match_whole_words(self):
+        self.assertEqual(normalize_ingredient("Milk 200ml"), "우유")
+        self.assertEqual(self.resolver.canonical_name("2 eggs"), "계란")
+        self.assertEqual(self.resolver.canonical_name("eggplant"), "가지")
+        self.assertEqual(self.resolver.canonical_name("pork belly"), "삼겹살")
+        # 별칭을 부분 문자열로 포함한 다른 재료는 별칭의 재료로 해석하지 않음
+        for name in ("milkshake", "butter milk", "onion rings"):
+            self.assertIsNone(self.resolver.resolve(name), name)
+
+    def test_agents_share_ingredient_ids(self):
+        items = annotate_ingredient_ids([
+            {"name": "햇양파", "category": "채소"},
+            {"name": "브로컬리", "category": "채소"},
+            {"name": "정체불명", "category": "기타"},
+        ])
+
+        self.assertEqual(items[0]["ingredient_id"], self.resolver.resolve("양파"))
+        self.assertIsNone(item_ingredient_id(items[2]))
+        self.assertEqual(determine_storage_location(items[0]), "실온")
+        self.assertEqual(get_expiry_info("브로컬리", items[1]["ingredient_id"]), EXPIRY_DB["브로콜리"])
+        self.assertEqual(get_expiry_info("정체불명"), {"base_days": 7, "storage": "냉장"})
+        # 보유 재료 오타도 레시피 매칭에 반영
+        self.assertEqual(calculate_match_rate(["브로콜리", "소금"], ["브로컬리"]), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
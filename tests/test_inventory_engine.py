@@ -0,0 +1,178 @@
+import sys
+import os
+import threading
+import unittest
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.inventory_engine import InventoryEngine, FridgeInventory
+from src.core.inventory_reconciler import reconcile_scan
+from src.agents.inventory_agent import inventory_agent_node
+
+
+class TestFridgeInventory(unittest.TestCase):
+
+    def test_location_aggregates_are_incremental(self):
+        fridge = FridgeInventory("f1")
+        fridge.apply_scan([
+            {"name": "우유", "category": "유제품", "quantity": 1, "location": "냉장"},
+            {"name": "양파", "category": "채소", "quantity": 2, "location": "실온"},
+        ])
+        # 같은 품목이 다른 위치로 재스캔되면 집계가 이동해야 함
+        result = fridge.apply_scan([
+            {"name": "우유", "category": "유제품", "quantity": 2, "location": "냉동"},
+        ])
+
+        self.assertEqual(result["status"], {"총 품목 수": 1, "냉장": 0, "냉동": 1, "실온": 0})
+        self.assertEqual(result["added"], [])
+        self.assertEqual([r["name"] for r in result["quantity_changed"]], ["우유"])
+        self.assertEqual([r["name"] for r in result["consumed"]], ["양파"])
+
+    def test_excess_warning_fires_and_clears_on_update(self):
+        fridge = FridgeInventory("f1")
+        result = fridge.apply_scan([{"name": "계란", "quantity": 30, "location": "냉장"}])
+        self.assertEqual(len(result["warnings"]), 1)
+        self.assertIn("계란", result["warnings"][0])
+
+        result = fridge.apply_scan([{"name": "계란", "quantity": 4, "location": "냉장"}])
+        self.assertEqual(result["warnings"], [])
+
+    def test_snapshot_is_not_mutated_by_later_writes(self):
+        fridge = FridgeInventory("f1")
+        fridge.apply_scan([{"name": "두부", "quantity": 1, "location": "냉장"}])
+        before = fridge.snapshot()
+
+        fridge.apply_scan([{"name": "두부", "quantity": 5, "location": "냉장"}])
+
+        (item_id,) = before.items
+        self.assertEqual(before.items[item_id]["quantity"], 1)
+        self.assertEqual(fridge.snapshot().items[item_id]["quantity"], 5)
+        self.assertEqual(fridge.version, before.version + 1)
+
+
+class TestInventoryEngine(unittest.TestCase):
+
+    def test_fridges_are_isolated(self):
+        engine = InventoryEngine()
+        engine.fridge("a").apply_scan([{"name": "당근", "quantity": 1, "location": "냉장"}])
+
+        self.assertEqual(len(engine.fridge("a").snapshot().items), 1)
+        self.assertEqual(len(engine.fridge("b").snapshot().items), 0)
+
+    def test_multithreaded_stress(self):
+        engine = InventoryEngine()
+        n_threads = 8
+        n_fridges = 4
+        scans_per_thread = 500
+        names = [f"재료{i}" for i in range(20)]
+        errors = []
+
+        def worker(worker_id: int):
+            try:
+                for i in range(scans_per_thread):
+                    fridge = engine.fridge(f"fridge-{(worker_id + i) % n_fridges}")
+                    fridge.apply_scan([
+                        {"name": names[(i + k) % len(names)], "quantity": (i % 15) + 1,
+                         "location": ("냉장", "냉동", "실온")[k % 3]}
+                        for k in range(5)
+                    ])
+                    # 락 없는 읽기도 항상 일관된 스냅샷이어야 함
+                    snapshot = fridge.snapshot()
+                    total = sum(snapshot.location_counts.values())
+                    if total != len(snapshot.items):
+                        errors.append((total, len(snapshot.items)))
+            except Exception as e:  # pragma: no cover - 실패 시 보고용
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(t,)) for t in range(n_threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        total_scans = sum(engine.fridge(f).version for f in engine.fridge_ids())
+        self.assertEqual(total_scans, n_threads * scans_per_thread)
+        for fridge_id in engine.fridge_ids():
+            fridge = engine.fridge(fridge_id)
+            snapshot = fridge.snapshot()
+            self.assertEqual(sum(snapshot.location_counts.values()), len(snapshot.items))
+            # 증분 경고가 실제 수량과 일치하는지 검증
+            expected = {i for i, r in snapshot.items.items() if r["quantity"] > 10}
+            self.assertEqual(set(snapshot.excess), expected)
+
+
+class TestInventoryAgent(unittest.TestCase):
+
+    def test_node_uses_fridge_partition(self):
+        state = {
+            "fridge_id": "test-agent-fridge",
+            "detected_items": [
+                {"name": "감자", "category": "채소", "quantity": 3},
+                {"name": "만두", "category": "기타", "quantity": 12, "packaging": "냉동 봉지"},
+            ],
+            "errors": [],
+        }
+        new_state = inventory_agent_node(state)
+
+        self.assertEqual(new_state["current_step"], "inventory_completed")
+        self.assertEqual(new_state["inventory_status"]["실온"], 1)
+        self.assertEqual(new_state["inventory_status"]["냉동"], 1)
+        self.assertEqual(new_state["inventory_changes"]["새로 추가"], ["감자", "만두"])
+        self.assertEqual(len(new_state["inventory_warnings"]), 1)
+
+        # 두 번째 스캔: 감자는 사라지고 만두는 수량만 변경
+        state["detected_items"] = [
+            {"name": "만두", "category": "기타", "quantity": 5, "packaging": "냉동 봉지"},
+        ]
+        new_state = inventory_agent_node(state)
+
+        self.assertEqual(new_state["inventory_changes"]["소진됨"], ["감자"])
+        self.assertEqual(new_state["inventory_changes"]["수량 변경"], ["만두"])
+        self.assertEqual(new_state["inventory_warnings"], [])
+        self.assertEqual(len(new_state["inventory_delta"]["consumed"]), 1)
+
+
+class TestReconcileScan(unittest.TestCase):
+
+    def _previous(self, *detections):
+        fridge = FridgeInventory("prev")
+        fridge.apply_scan(list(detections))
+        return fridge.snapshot().items
+
+    def test_added_consumed_moved_and_quantity_changed(self):
+        previous = self._previous(
+            {"name": "우유", "category": "유제품", "quantity": 1, "bbox_2d": [100, 100, 300, 200]},
+            {"name": "계란", "category": "유제품", "quantity": 10, "bbox_2d": [500, 500, 600, 700]},
+            {"name": "김치", "category": "기타", "quantity": 1, "bbox_2d": [700, 100, 900, 300]},
+        )
+        delta = reconcile_scan(previous, [
+            {"name": "우유", "category": "유제품", "quantity": 1, "bbox_2d": [600, 700, 800, 800]},
+            {"name": "계란", "category": "유제품", "quantity": 6, "bbox_2d": [505, 500, 605, 700]},
+            {"name": "사과", "category": "과일", "quantity": 2, "bbox_2d": [0, 0, 100, 100]},
+        ])
+
+        self.assertEqual([d["name"] for d in delta["added"]], ["사과"])
+        self.assertEqual([r["name"] for r in delta["consumed"]], ["김치"])
+        self.assertEqual([c["previous"]["name"] for c in delta["moved"]], ["우유"])
+        self.assertEqual([c["previous"]["name"] for c in delta["quantity_changed"]], ["계란"])
+
+    def test_duplicate_names_are_matched_by_proximity(self):
+        previous = self._previous(
+            {"name": "맥주", "category": "기타", "quantity": 1, "bbox_2d": [0, 0, 100, 100]},
+            {"name": "맥주", "category": "기타", "quantity": 1, "bbox_2d": [0, 800, 100, 900]},
+        )
+        # 오른쪽 맥주만 남음 -> 왼쪽 맥주가 소진, 이동은 없음
+        delta = reconcile_scan(previous, [
+            {"name": "맥주", "category": "기타", "quantity": 1, "bbox_2d": [0, 810, 100, 910]},
+        ])
+
+        self.assertEqual(len(delta["consumed"]), 1)
+        self.assertEqual(delta["consumed"][0]["bbox_2d"], [0, 0, 100, 100])
+        self.assertEqual(delta["moved"], [])
+        self.assertEqual(delta["added"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import sys
+import os
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents.orchestrator import build_inventory_delta_rows, run_orchestrator
+from src.core.inventory_engine import FridgeInventory, get_inventory_engine
+from src.database.repository import InventoryRepository
+from src.database.session import dispose_engine, get_database_url
+
+
+class TestInventoryRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{self.tmpdir.name}/fridge.db"
+        self.env = patch.dict(os.environ, {"DATABASE_URL": url})
+        self.env.start()
+
+    def tearDown(self):
+        asyncio.run(dispose_engine())
+        self.env.stop()
+        self.tmpdir.cleanup()
+
+    def test_database_url_normalization(self):
+        with patch.dict(os.environ, {"DATABASE_URL": "postgres://u:p@db:5432/fridge"}):
+            self.assertEqual(get_database_url(), "postgresql+asyncpg://u:p@db:5432/fridge")
+
+    def test_delta_roundtrip_and_hydrate(self):
+        fridge = FridgeInventory("user-1")
+        result = fridge.apply_scan([
+            {"name": "우유", "category": "유제품", "quantity": 1, "location": "냉장",
+             "bbox_2d": [0, 0, 100, 100]},
+            {"name": "양파", "category": "채소", "quantity": 3, "location": "실온"},
+        ])
+
+        async def scenario():
+            repo = InventoryRepository()
+            upserts = [dict(r, expiry_date="2030-01-01") for r in result["added"]]
+            await repo.apply_delta("user-1", upserts, [])
+
+            # 양파 소진 + 우유 수량 변경
+            second = fridge.apply_scan([
+                {"name": "우유", "category": "유제품", "quantity": 2, "location": "냉장",
+                 "bbox_2d": [0, 0, 100, 100]},
+            ])
+            await repo.apply_delta(
+                "user-1",
+                second["quantity_changed"],
+                [r["item_id"] for r in second["consumed"]],
+            )
+            rows = await repo.load_inventory("user-1")
+            other = await repo.load_inventory("user-2")
+            await dispose_engine()
+            return rows, other
+
+        rows, other = asyncio.run(scenario())
+
+        self.assertEqual(other, [])
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["name"], "우유")
+        self.assertEqual(rows[0]["quantity"], 2)
+        self.assertEqual(rows[0]["bbox_2d"], [0, 0, 100, 100])
+
+        # 재시작 후 새 엔진이 DB에서 로드하면 같은 item_id로 차이 계산
+        restarted = FridgeInventory("user-1")
+        self.assertTrue(restarted.hydrate(rows))
+        delta = restarted.apply_scan([
+            {"name": "우유", "category": "유제품", "quantity": 2, "location": "냉장",
+             "bbox_2d": [0, 0, 100, 100]},
+        ])
+        self.assertEqual(delta["added"], [])
+        self.assertEqual(delta["consumed"], [])
+
+    def test_updates_keep_stored_expiry(self):
+        fridge = FridgeInventory("user-1")
+        first = fridge.apply_scan([
+            {"name": "우유", "category": "유제품", "quantity": 1, "location": "냉장",
+             "bbox_2d": [0, 0, 100, 100], "purchase_date": "2030-01-01", "expiry_date": "2030-01-08"},
+            {"name": "우유", "category": "유제품", "quantity": 1, "location": "냉장",
+             "bbox_2d": [500, 500, 600, 600], "purchase_date": "2030-01-01", "expiry_date": "2030-01-03"},
+        ])
+        # 다음 스캔: 하나는 이동, 하나는 수량 변경 (이번 스캔의 날짜는 무시)
+        second = fridge.apply_scan([
+            {"name": "우유", "category": "유제품", "quantity": 1, "location": "냉장",
+             "bbox_2d": [0, 400, 100, 500], "purchase_date": "2030-01-05", "expiry_date": "2030-01-12"},
+            {"name": "우유", "category": "유제품", "quantity": 2, "location": "냉장",
+             "bbox_2d": [500, 500, 600, 600], "purchase_date": "2030-01-05", "expiry_date": "2030-01-12"},
+        ])
+
+        async def scenario():
+            repo = InventoryRepository()
+            for delta in (first, second):
+                upserts, deleted = build_inventory_delta_rows(delta)
+                await repo.apply_delta("user-1", upserts, deleted)
+            rows = await repo.load_inventory("user-1")
+            await dispose_engine()
+            return rows
+
+        self.assertEqual((len(second["moved"]), len(second["quantity_changed"])), (1, 1))
+        rows = sorted(asyncio.run(scenario()), key=lambda r: r["bbox_2d"])
+        self.assertEqual(
+            [(r["bbox_2d"], r["quantity"], r["purchase_date"], r["expiry_date"]) for r in rows],
+            [([0, 400, 100, 500], 1, "2030-01-01", "2030-01-08"),
+             ([500, 500, 600, 600], 2, "2030-01-01", "2030-01-03")],
+        )
+
+    def test_failed_load_fails_scan_and_retries(self):
+        stored = [{"item_id": "k-0", "name": "우유", "category": "유제품", "quantity": 1,
+                   "location": "냉장", "bbox_2d": [0, 0, 100, 100]}]
+        repo = AsyncMock()
+        repo.load_inventory.side_effect = [OSError("connection refused"), stored]
+
+        with patch("src.agents.orchestrator.get_inventory_repository", return_value=repo), \
+                patch("src.agents.orchestrator.create_fridge_graph") as create_graph:
+            result = asyncio.run(run_orchestrator(image_path="x.jpg", fridge_id="load-fail"))
+
+            # 빈 재고로 스캔하지 않고 요청 실패, 냉장고도 로드되지 않은 상태로 남음
+            self.assertFalse(result["success"])
+            self.assertIn("재고 DB 로드 실패", result["errors"][0])
+            create_graph.assert_not_called()
+            fridge = get_inventory_engine().fridge("load-fail")
+            self.assertFalse(fridge.hydrated)
+
+            # 다음 요청에서 다시 로드
+            create_graph.return_value.invoke.side_effect = RuntimeError("stop")
+            asyncio.run(run_orchestrator(image_path="x.jpg", fridge_id="load-fail"))
+        self.assertTrue(fridge.hydrated)
+        self.assertEqual(list(fridge.snapshot().items), ["k-0"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import sys
+import os
+import unittest
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.rag.qa_retriever import HybridIndex, QARetriever, count_tokens, tokenize
+
+
+def _inventory(n):
+    return [
+        {"item_id": f"item-{i}", "name": f"재료{i}", "category": "기타", "quantity": 1,
+         "unit": "개", "location": "냉장", "expiry_date": f"2030-01-{i % 28 + 1:02d}"}
+        for i in range(n)
+    ]
+
+
+class TestHybridIndex(unittest.TestCase):
+
+    def test_earliest_expiring_follows_upserts_and_removals(self):
+        index = HybridIndex()
+        index.upsert_many([
+            ("a", "우유", {"text": "우유", "expiry_date": "2030-01-05"}),
+            ("b", "두부", {"text": "두부", "expiry_date": "2030-01-02"}),
+            ("c", "소금", {"text": "소금"}),
+            ("d", "계란", {"text": "계란", "expiry_date": "2030-01-09"}),
+        ])
+        self.assertEqual(index.earliest_expiring(2), ["두부", "우유"])
+
+        index.upsert_many([("b", "두부", {"text": "두부 (새로 산 것)", "expiry_date": "2030-01-20"})])
+        index.remove_many(["a"])
+        self.assertEqual(index.earliest_expiring(5), ["계란", "두부 (새로 산 것)"])
+
+
+class TestQARetriever(unittest.TestCase):
+
+    def setUp(self):
+        self.retriever = QARetriever()
+        records = _inventory(2000) + [
+            {"item_id": "milk-1", "name": "우유", "category": "유제품", "quantity": 2,
+             "unit": "개", "location": "냉장", "expiry_date": "2030-02-01"},
+            {"item_id": "pork-1", "name": "돼지고기", "category": "육류", "quantity": 1,
+             "unit": "팩", "location": "냉동", "expiry_date": "2029-12-01"},
+        ]
+        self.retriever.load_inventory("f1", records)
+        self.retriever.add_recipes([
+            {"title": "제육볶음", "ingredients": ["돼지고기", "양파", "고추장"], "description": "매콤한 볶음"},
+        ])
+
+    def test_tokenize_matches_with_particles(self):
+        self.assertIn("우유", tokenize("우유가 얼마나 남았어?"))
+
+    def test_retrieves_relevant_rows_within_budget(self):
+        context = self.retriever.retrieve("돼지고기로 뭐 만들 수 있어?", "f1", token_budget=300)
+
+        self.assertEqual(context.candidates, 2002)
+        self.assertTrue(any("돼지고기" in line for line in context.inventory))
+        self.assertTrue(any("제육볶음" in line for line in context.knowledge))
+        self.assertLessEqual(context.tokens, 300)
+        self.assertLessEqual(
+            sum(count_tokens(line) + 1 for line in context.inventory + context.knowledge), 300
+        )
+
+    def test_delta_updates_index(self):
+        self.retriever.apply_inventory_delta(
+            "f1",
+            [{"item_id": "milk-1", "name": "우유", "category": "유제품", "quantity": 5,
+              "unit": "개", "location": "냉장", "expiry_date": "2030-02-01"}],
+            ["pork-1"],
+        )
+
+        milk = self.retriever.retrieve("우유 얼마나 있어?", "f1", token_budget=200)
+        self.assertTrue(any("우유" in line and "수량: 5개" in line for line in milk.inventory))
+        pork = self.retriever.retrieve("돼지고기 있어?", "f1")
+        self.assertFalse(any("돼지고기" in line for line in pork.inventory))
+
+    def test_expiring_items_first(self):
+        context = self.retriever.retrieve("유통기한 임박한 거", "f1", prefer_expiring=True)
+        self.assertIn("돼지고기", context.inventory[0])
+
+    def test_reports_index_nested_content(self):
+        report = {
+            "title": "연어 스테이크",
+            "content": {"intro": "버터 향 가득한 연어", "ingredients": [{"name": "연어", "amount": "200g"}]},
+            "format": "json",
+        }
+        failed = {"title": "실패 리포트", "content": {"error": "보고서 생성 실패"}, "format": "error"}
+
+        self.assertTrue(self.retriever.add_report(report))
+        self.assertFalse(self.retriever.add_report(failed))
+        context = self.retriever.retrieve("연어 요리 알려줘", "f1", token_budget=1000)
+        self.assertIn("- 리포트 연어 스테이크: 버터 향 가득한 연어 재료 연어", context.knowledge)
+        self.assertFalse(any("실패 리포트" in line for line in context.knowledge))
+
+    def test_vector_ranking_with_embed_fn(self):
+        def embed(texts):
+            return [[1.0, 0.0] if "우유" in t or "milk" in t else [0.0, 1.0] for t in texts]
+
+        retriever = QARetriever(embed)
+        retriever.load_inventory("f1", _inventory(50) + [
+            {"item_id": "milk-1", "name": "우유", "category": "유제품", "quantity": 1}
+        ])
+        context = retriever.retrieve("milk", "f1", token_budget=10_000)
+        self.assertIn("우유", "\n".join(context.inventory))
+
+
+if __name__ == '__main__':
+    unittest.main()
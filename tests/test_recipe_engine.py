@@ -0,0 +1,160 @@
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents import recipe_agent
+from src.agents.recipe_agent import (
+    collect_speculative_recipes,
+    flush_recipe_writeback,
+    start_speculative_recipes,
+    suggest_recipes,
+)
+from src.agents.vision_agent import speculative_seed
+from src.core.inventory_engine import InventoryEngine
+from src.rag.embeddings import BatchEmbedder
+from src.rag.embedding_backends import HashedNgramBackend
+from src.rag.vector_store import RecipeVectorStore
+
+AVAILABLE = ["김치", "두부", "대파", "계란"]
+
+
+def _recipe(title, ingredients, calories=200):
+    return {"title": title, "ingredients": ingredients, "calories": calories, "cooking_time": "15분"}
+
+
+class TestRecipeEngine(unittest.TestCase):
+
+    def setUp(self):
+        recipe_agent.RECIPE_ENGINE_STATS.clear()
+
+    @patch("src.agents.recipe_agent.generate_recipes_with_gpt")
+    @patch("src.agents.recipe_agent.get_vector_store")
+    def test_index_hits_skip_llm(self, mock_get_store, mock_generate):
+        store = MagicMock()
+        store.search_recipes.return_value = [_recipe(f"김치두부{i}", ["김치", "두부"]) for i in range(12)]
+        mock_get_store.return_value = store
+
+        recipes = suggest_recipes(AVAILABLE, [], "general")
+
+        mock_generate.assert_not_called()
+        self.assertEqual(len(recipes), 12)
+        self.assertTrue(all(r["source"] == "index" and r["match_rate"] == 1.0 for r in recipes))
+        self.assertEqual(recipe_agent.RECIPE_ENGINE_STATS["index_only"], 1)
+
+    @patch("src.agents.recipe_agent.generate_recipes_with_gpt")
+    @patch("src.agents.recipe_agent.get_vector_store")
+    def test_llm_fills_shortfall_and_writes_back(self, mock_get_store, mock_generate):
+        store = MagicMock()
+        store.search_recipes.return_value = [
+            _recipe("김치찌개", ["김치", "두부", "돼지고기"]),
+            _recipe("모둠전", ["밀가루", "호박", "새우", "계란"]),  # 매칭률 0.25 → 기준 미달
+        ]
+        mock_get_store.return_value = store
+        mock_generate.return_value = [
+            _recipe("두부조림", ["두부", "대파", "간장"]),
+            _recipe("김치전", ["김치", "밀가루", "식용유"], calories=450),  # 다이어트 조건 위반
+        ]
+
+        recipes = suggest_recipes(AVAILABLE, [], "diet")
+        flush_recipe_writeback(timeout=5)
+
+        kwargs = mock_generate.call_args.kwargs
+        self.assertEqual(kwargs["count"], 19)
+        self.assertEqual(kwargs["exclude_titles"], ["김치찌개"])
+        self.assertEqual([r["title"] for r in recipes], ["김치찌개", "두부조림"])
+        self.assertEqual(recipes[1]["source"], "generated")
+        written = store.add_recipes.call_args.args[0]
+        self.assertEqual([r["title"] for r in written], ["두부조림", "김치전"])
+        self.assertNotIn("source", written[0])
+
+    @patch("src.agents.recipe_agent.RECIPE_MIN_INDEX_HITS", 3)
+    @patch("src.agents.recipe_agent.generate_recipes_with_gpt")
+    def test_generated_recipes_serve_next_request(self, mock_generate):
+        mock_generate.return_value = [
+            _recipe("김치두부찌개", ["김치", "두부", "대파"]),
+            _recipe("계란말이", ["계란", "대파"]),
+            _recipe("두부김치", ["두부", "김치"]),
+        ]
+        embedder = BatchEmbedder(HashedNgramBackend(), model="hashed-test")
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch("src.rag.embeddings.get_embedder", return_value=embedder):
+            store = RecipeVectorStore(tmp, backend="numpy")
+            with patch("src.agents.recipe_agent.get_vector_store", return_value=store):
+                first = suggest_recipes(AVAILABLE, [], "general")
+                flush_recipe_writeback(timeout=5)
+                second = suggest_recipes(AVAILABLE, [], "general")
+
+        self.assertEqual(mock_generate.call_count, 1)
+        self.assertTrue(any(r["source"] == "generated" for r in first))
+        self.assertTrue(all(r["source"] == "index" for r in second))
+        self.assertTrue({"김치두부찌개", "계란말이", "두부김치"} <= {r["title"] for r in second})
+        self.assertEqual(recipe_agent.RECIPE_ENGINE_STATS["written_back"], 3)
+
+
+class TestSpeculativeRecipes(unittest.TestCase):
+
+    def setUp(self):
+        recipe_agent.RECIPE_ENGINE_STATS.clear()
+
+    @patch("src.agents.recipe_agent.RECIPE_MIN_INDEX_HITS", 2)
+    @patch("src.agents.recipe_agent.write_back_recipes")
+    @patch("src.agents.recipe_agent.generate_recipes_with_gpt")
+    @patch("src.agents.recipe_agent.get_vector_store")
+    def test_speculation_is_rescored_and_fills_shortfall(self, mock_get_store, mock_generate, mock_write_back):
+        store = MagicMock()
+        store.search_recipes.return_value = []
+        mock_get_store.return_value = store
+        mock_generate.return_value = [
+            _recipe("김치두부찌개", ["김치", "두부", "대파"]),
+            _recipe("제육볶음", ["돼지고기", "양파", "고추장"]),  # 이전 재고의 돼지고기는 이미 소진
+        ]
+
+        future = start_speculative_recipes(["김치", "두부", "대파", "돼지고기", "양파", "고추장"], "general")
+        prefetched = collect_speculative_recipes(future)
+        # 추측 실행은 생성 레시피를 저장하지 않음
+        mock_write_back.assert_not_called()
+        mock_generate.return_value = [_recipe("계란말이", ["계란", "대파"])]
+        recipes = suggest_recipes(AVAILABLE, [], "general", count=2, prefetched=prefetched)
+
+        self.assertEqual(len(prefetched), 2)
+        self.assertEqual([r["title"] for r in recipes], ["김치두부찌개", "계란말이"])
+        # 추측 실행 결과 1개가 기준을 넘어 최종 생성은 나머지 1개만 요청
+        self.assertEqual(mock_generate.call_args.kwargs["count"], 1)
+        self.assertEqual(mock_generate.call_args.kwargs["exclude_titles"], ["김치두부찌개"])
+        self.assertEqual(recipe_agent.RECIPE_ENGINE_STATS["speculations"], 1)
+        # 최종 결과에 채택된 추측 레시피와 새로 생성한 레시피만 저장
+        saved = [r["title"] for call in mock_write_back.call_args_list for r in call.args[0]]
+        self.assertEqual(sorted(saved), ["계란말이", "김치두부찌개"])
+
+    def test_timed_out_speculation_is_cancelled(self):
+        future = MagicMock()
+        future.result.side_effect = TimeoutError()
+
+        self.assertEqual(collect_speculative_recipes(future, timeout=0.01), [])
+        future.cancel.assert_called_once()
+
+    def test_seed_requirements(self):
+        self.assertIsNone(start_speculative_recipes(["김치", "김치", ""], "general"))
+        self.assertEqual(collect_speculative_recipes(None), [])
+
+        engine = InventoryEngine()
+        engine.fridge("spec").hydrate([
+            {"item_id": "1", "name": "김치", "quantity": 1, "location": "냉장"},
+            {"item_id": "2", "name": "두부", "quantity": 1, "location": "냉장"},
+        ])
+        detections = [
+            {"yolo_class": "carrot", "yolo_conf": 0.8},
+            {"yolo_class": "apple", "yolo_conf": 0.2},
+            {"yolo_class": "bottle", "yolo_conf": 0.9},
+        ]
+        with patch("src.agents.vision_agent.get_inventory_engine", return_value=engine):
+            self.assertEqual(speculative_seed("spec", detections), ["김치", "두부", "당근"])
+
+
+if __name__ == '__main__':
+    unittest.main()
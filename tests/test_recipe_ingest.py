@@ -0,0 +1,101 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.rag.embeddings import BatchEmbedder
+from src.rag.ingest import ingest_recipes, normalize_recipe
+from src.rag.vector_store import RecipeVectorStore, recipe_id
+
+
+class _RecordingStore:
+    """벡터 저장소 대역 - 청크를 기록하고 지정한 청크에서 실패"""
+
+    def __init__(self, fail_on_chunk=None):
+        self.chunks = []
+        self.fail_on_chunk = fail_on_chunk
+
+    def add_recipes(self, recipes):
+        if self.fail_on_chunk is not None and len(self.chunks) == self.fail_on_chunk:
+            raise RuntimeError("중단")
+        self.chunks.append([r["title"] for r in recipes])
+
+    def count(self):
+        return sum(len(c) for c in self.chunks)
+
+
+class TestRecipeIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.checkpoints = os.path.join(self.tmpdir.name, "checkpoints")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write_jsonl(self, recipes):
+        path = os.path.join(self.tmpdir.name, "recipes.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for recipe in recipes:
+                f.write(json.dumps(recipe, ensure_ascii=False) + "\n")
+        return path
+
+    def test_csv_parsing(self):
+        path = os.path.join(self.tmpdir.name, "recipes.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("title,ingredients,calories\n")
+            f.write('김치찌개,"김치|돼지고기|두부",350\n')
+            f.write("제목만,,\n")
+        store = _RecordingStore()
+
+        stats = ingest_recipes(path, store=store, checkpoint_dir=self.checkpoints)
+
+        self.assertEqual(stats["ingested"], 1)
+        self.assertEqual(stats["invalid"], 1)
+        self.assertEqual(normalize_recipe({"title": "a", "ingredients": '["x", "y"]'})["ingredients"], ["x", "y"])
+        self.assertIn("recipes_per_second", stats)
+
+    def test_resume_after_interruption(self):
+        path = self._write_jsonl([{"title": f"레시피{i}", "ingredients": ["재료"]} for i in range(25)])
+
+        with self.assertRaises(RuntimeError):
+            ingest_recipes(path, store=_RecordingStore(fail_on_chunk=2), chunk_size=10,
+                           checkpoint_dir=self.checkpoints)
+
+        store = _RecordingStore()
+        stats = ingest_recipes(path, store=store, chunk_size=10, checkpoint_dir=self.checkpoints)
+
+        self.assertEqual(stats["resumed_from"], 20)
+        self.assertEqual(store.chunks, [[f"레시피{i}" for i in range(20, 25)]])
+        # 완료 후 체크포인트 삭제 → 다음 실행은 처음부터
+        self.assertEqual(os.listdir(self.checkpoints), [])
+
+    def test_idempotent_ids_in_chroma(self):
+        recipes = [
+            {"title": "김치볶음밥", "ingredients": ["김치", "밥"]},
+            {"title": "김치볶음밥", "ingredients": ["김치", "밥", "스팸"]},  # 같은 제목, 다른 레시피
+            {"title": "김치볶음밥", "ingredients": ["밥", "김치"]},  # 첫 번째와 동일
+        ] + [{"title": f"레시피{i}", "ingredients": ["재료", str(i)]} for i in range(30)]
+        path = self._write_jsonl(recipes)
+        embedder = BatchEmbedder(lambda texts: [[float(len(t)), 1.0, 0.5] for t in texts])
+
+        with patch("src.rag.embeddings.get_embedder", return_value=embedder):
+            store = RecipeVectorStore(persist_directory=os.path.join(self.tmpdir.name, "vectors"))
+            seeded = store.count()
+            ingest_recipes(path, store=store, chunk_size=8, checkpoint_dir=self.checkpoints)
+            first = store.count()
+            ingest_recipes(path, store=store, chunk_size=8, checkpoint_dir=self.checkpoints)
+
+        self.assertEqual(first - seeded, 32)
+        self.assertEqual(store.count(), first)
+        self.assertEqual(recipe_id(recipes[0]), recipe_id(recipes[2]))
+        self.assertNotEqual(recipe_id(recipes[0]), recipe_id(recipes[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
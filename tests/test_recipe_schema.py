@@ -0,0 +1,108 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.rag.ann_index import NumpyVectorIndex
+from src.rag.embeddings import BatchEmbedder
+from src.rag.embedding_backends import HashedNgramBackend
+from src.rag.vector_store import (
+    CHROMADB_AVAILABLE,
+    RecipeFilter,
+    RecipeVectorStore,
+    parse_cooking_minutes,
+    recipe_from_metadata,
+    recipe_id,
+    recipe_metadata,
+    recipe_text,
+)
+
+LEGACY_RECIPES = [
+    {"title": "김치찌개", "ingredients": ["김치", "돼지고기"], "cooking_time": "30분", "calories": 350},
+    {"title": "계란찜", "ingredients": ["계란", "대파"], "cooking_time": "10분", "calories": 120},
+]
+
+
+class TestRecipeSchema(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.embedder = BatchEmbedder(HashedNgramBackend(), model="hashed-test")
+        patcher = patch("src.rag.embeddings.get_embedder", return_value=self.embedder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_typed_metadata_round_trip(self):
+        recipe = {"title": "된장국", "ingredients": ["된장", "두부"], "cooking_time": "1시간 10분",
+                  "difficulty": "하", "calories": 120.0, "description": ""}
+        metadata = recipe_metadata(recipe)
+
+        self.assertEqual(metadata["calories"], 120)
+        self.assertEqual(metadata["cooking_minutes"], 70)
+        self.assertNotIn("description", metadata)
+        self.assertEqual(recipe_from_metadata(metadata)["ingredients"], ["된장", "두부"])
+        self.assertEqual(parse_cooking_minutes("10-15분"), 15)
+        self.assertIsNone(parse_cooking_minutes("금방"))
+
+    def test_filters_served_by_index(self):
+        backends = ["numpy"] + (["chroma"] if CHROMADB_AVAILABLE else [])
+        recipe_filter = RecipeFilter(max_calories=250, max_cooking_minutes=15, difficulties=["하"])
+        for backend in backends:
+            store = RecipeVectorStore(os.path.join(self.tmpdir.name, backend), backend=backend)
+            hits = store.vector_search(["계란", "대파"], top_k=10, recipe_filter=recipe_filter)
+
+            titles = {recipe["title"] for _, recipe in hits}
+            self.assertEqual(titles, {"시금치 두부 된장국", "양파 볶음", "우유 스무디"}, backend)
+            for _, recipe in hits:
+                self.assertIsInstance(recipe["cooking_minutes"], int)
+                self.assertTrue(recipe_filter.matches(recipe))
+
+    def test_legacy_numpy_index_is_migrated(self):
+        directory = os.path.join(self.tmpdir.name, "legacy")
+        name = "recipes__hashed-test"
+        index = NumpyVectorIndex(directory, name)
+        index.upsert(
+            [recipe_id(r) for r in LEGACY_RECIPES],
+            self.embedder.embed([recipe_text(r) for r in LEGACY_RECIPES]),
+            [json.dumps(r, ensure_ascii=False) for r in LEGACY_RECIPES],
+        )
+
+        store = RecipeVectorStore(directory, backend="numpy")
+        hits = store.vector_search(["계란"], top_k=5, recipe_filter=RecipeFilter(max_calories=200))
+
+        self.assertEqual(store.count(), 2)
+        self.assertEqual([recipe["title"] for _, recipe in hits], ["계란찜"])
+        self.assertEqual(NumpyVectorIndex(directory, name).attributes["recipe_schema"], 2)
+
+    @unittest.skipUnless(CHROMADB_AVAILABLE, "chromadb 미설치")
+    def test_legacy_chroma_collection_is_migrated(self):
+        import chromadb
+        from chromadb.config import Settings
+
+        directory = os.path.join(self.tmpdir.name, "legacy-chroma")
+        client = chromadb.PersistentClient(path=directory, settings=Settings(anonymized_telemetry=False))
+        collection = client.get_or_create_collection("recipes__hashed-test")
+        collection.add(
+            ids=[recipe_id(r) for r in LEGACY_RECIPES],
+            embeddings=self.embedder.embed([recipe_text(r) for r in LEGACY_RECIPES]).tolist(),
+            documents=[json.dumps(r, ensure_ascii=False) for r in LEGACY_RECIPES],
+        )
+
+        store = RecipeVectorStore(directory)
+        hits = store.vector_search(["김치"], top_k=5, recipe_filter=RecipeFilter(max_cooking_minutes=30))
+
+        self.assertEqual(store.count(), 2)
+        self.assertEqual(hits[0][1]["title"], "김치찌개")
+        self.assertEqual(store.collection.metadata["recipe_schema"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import sys
+import os
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents.vision_agent import classify_with_gpt
+from src.core.structured_output import (
+    IncrementalJSONParser,
+    expand_fields,
+    llm_stage_stats,
+    parse_partial_json,
+    reset_llm_stage_stats,
+)
+
+ITEMS = {"i": [
+    {"n": "우유", "c": "유제품", "q": 1, "u": "팩", "f": "좋음", "p": "팩", "s": 0.9, "b": [10, 20, 300, 400], "e": None},
+    {"n": "당근 {다발}", "c": "채소", "q": 3, "u": "개", "f": "보통", "p": "없음", "s": 0.7, "b": [500, 20, 700, 200], "e": "2024.1.1"},
+]}
+
+
+def _response(content, finish_reason="stop", completion_tokens=120):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    response.choices[0].finish_reason = finish_reason
+    response.usage.prompt_tokens = 1000
+    response.usage.completion_tokens = completion_tokens
+    return response
+
+
+class TestStructuredOutput(unittest.TestCase):
+
+    def setUp(self):
+        reset_llm_stage_stats()
+
+    def test_partial_json_keeps_completed_items(self):
+        text = json.dumps(ITEMS, ensure_ascii=False)
+        self.assertEqual(parse_partial_json("설명 문장\n```json\n" + text + "\n```"), (ITEMS, True))
+
+        truncated = text[: text.index('"n": "당근') + 12]
+        value, complete = parse_partial_json(truncated)
+        self.assertFalse(complete)
+        self.assertEqual(value, {"i": ITEMS["i"][:1]})
+
+        parser = IncrementalJSONParser()
+        for i in range(0, len(text), 7):
+            parser.feed(text[i:i + 7])
+        self.assertEqual(parser.result(), (ITEMS, True))
+        self.assertEqual(parse_partial_json('{"i": [{"n": "우'), (None, False))
+        self.assertEqual(parse_partial_json("JSON 없음"), (None, False))
+
+    def test_expand_fields(self):
+        fields = {"s": ("selected_recipes", {"t": "title"}), "d": "discussion"}
+        self.assertEqual(
+            expand_fields({"s": [{"t": "김치찌개"}], "d": "논의"}, fields),
+            {"selected_recipes": [{"title": "김치찌개"}], "discussion": "논의"},
+        )
+
+    @patch("src.agents.vision_agent.OpenAI")
+    def test_vision_uses_schema_and_survives_truncation(self, mock_openai):
+        create = mock_openai.return_value.chat.completions.create
+        text = json.dumps(ITEMS, ensure_ascii=False)
+        create.side_effect = [
+            _response(text),
+            _response(text[:-20], finish_reason="length", completion_tokens=5000),
+            _response("죄송합니다"),
+        ]
+
+        items = classify_with_gpt("aW1n", [])
+        self.assertEqual(create.call_args.kwargs["response_format"]["json_schema"]["strict"], True)
+        self.assertEqual(items[1]["name"], "당근 {다발}")
+        self.assertEqual(items[0]["bbox_2d"], [10, 20, 300, 400])
+        self.assertEqual([i["name"] for i in classify_with_gpt("aW1n", [])], ["우유"])
+        self.assertEqual(classify_with_gpt("aW1n", []), [])
+
+        stats = llm_stage_stats()["vision_classify"]
+        self.assertEqual(stats["calls"], 3)
+        self.assertEqual(stats["output_tokens"], 5240)
+        self.assertEqual(stats["truncated"], 1)
+        self.assertEqual(stats["partial_recoveries"], 1)
+        self.assertEqual(stats["parse_failures"], 1)
+        self.assertAlmostEqual(stats["parse_failure_rate"], 0.3333)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import sys
+import os
+import json
+import asyncio
+import threading
+import unittest
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from unittest.mock import patch
+
+import httpx
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.supabase_client import SupabaseManager
+
+
+class _PostgRESTStandIn(BaseHTTPRequestHandler):
+    """최소한의 PostgREST 대역 - 연결 수와 요청 수를 기록"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive 지원
+    disable_nagle_algorithm = True  # 헤더/본문 분할 전송 시 delayed-ACK 지연 방지
+    connections = 0
+    requests = []
+    fail_next = 0
+    rows = None  # 설정 시 id 기준 keyset 페이지네이션으로 응답
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with self.lock:
+            type(self).connections += 1
+
+    def _reply(self, status: int, body: bytes = b""):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        type(self).requests.append(("GET", self.path))
+        if type(self).fail_next > 0:
+            type(self).fail_next -= 1
+            self._reply(503)
+            return
+        if type(self).rows is not None:
+            self._reply(200, json.dumps(self._page()).encode("utf-8"))
+            return
+        self._reply(200, json.dumps([{"name": "우유", "quantity": 1}]).encode("utf-8"))
+
+    def _page(self):
+        query = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        after = int(query["id"][len("gt."):]) if "id" in query else 0
+        columns = query["select"].split(",")
+        matched = [r for r in type(self).rows if r["id"] > after]
+        if "category" in query:
+            allowed = query["category"][len("in.("):-1].replace('"', "").split(",")
+            matched = [r for r in matched if r["category"] in allowed]
+        return [{c: r[c] for c in columns} for r in matched[: int(query["limit"])]]
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        type(self).requests.append(("POST", self.path))
+        self._reply(201)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSupabaseConnectionPooling(unittest.TestCase):
+
+    N_CALLS = 1000
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _PostgRESTStandIn)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _PostgRESTStandIn.connections = 0
+        _PostgRESTStandIn.requests = []
+        _PostgRESTStandIn.fail_next = 0
+        _PostgRESTStandIn.rows = None
+        SupabaseManager._instance = None
+        self.env = patch.dict(os.environ, {"SUPABASE_URL": self.base_url, "SUPABASE_KEY": "test-key"})
+        self.env.start()
+
+    def tearDown(self):
+        SupabaseManager._instance = None
+        self.env.stop()
+
+    def test_pooled_client_reuses_connection(self):
+        async def pooled():
+            manager = SupabaseManager()
+            for _ in range(self.N_CALLS):
+                items = await manager.get_all_inventory()
+                assert items and items[0]["name"] == "우유"
+            await manager.aclose()
+
+        async def per_call_client():
+            # 이전 구현 방식: 호출마다 새 AsyncClient
+            headers = SupabaseManager().headers
+            for _ in range(self.N_CALLS):
+                async with httpx.AsyncClient() as client:
+                    resp = await client.get(f"{self.base_url}/rest/v1/inventory?select=*", headers=headers)
+                    resp.json()
+
+        asyncio.run(pooled())
+        pooled_connections = _PostgRESTStandIn.connections
+
+        _PostgRESTStandIn.connections = 0
+        asyncio.run(per_call_client())
+        fresh_connections = _PostgRESTStandIn.connections
+
+        self.assertLessEqual(pooled_connections, 2)
+        self.assertEqual(fresh_connections, self.N_CALLS)
+
+    def test_retries_transient_errors(self):
+        _PostgRESTStandIn.fail_next = 1
+
+        async def fetch():
+            manager = SupabaseManager()
+            with patch("src.core.supabase_client.RETRY_BACKOFF", 0):
+                items = await manager.get_all_inventory()
+            await manager.aclose()
+            return items
+
+        items = asyncio.run(fetch())
+
+        self.assertEqual(items[0]["name"], "우유")
+        self.assertEqual(len(_PostgRESTStandIn.requests), 2)
+        self.assertTrue(_PostgRESTStandIn.requests[0][1].startswith("/rest/v1/inventory"))
+
+    def test_keyset_pagination_with_projection_and_filters(self):
+        _PostgRESTStandIn.rows = [
+            {"id": i, "name": f"재료{i}", "category": "채소" if i % 2 else "육류",
+             "quantity": 1, "expiry_date": "2030-01-01"}
+            for i in range(1, 26)
+        ]
+
+        async def fetch():
+            manager = SupabaseManager()
+            rows = await manager.query_inventory(
+                columns=("name", "category"),
+                categories=["채소"],
+                exclude_expired=True,
+                limit=10,
+                page_size=4,
+            )
+            await manager.aclose()
+            return rows
+
+        rows = asyncio.run(fetch())
+
+        self.assertEqual([r["id"] for r in rows], [1, 3, 5, 7, 9, 11, 13, 15, 17, 19])
+        self.assertEqual(set(rows[0]), {"id", "name", "category"})
+        paths = [path for _, path in _PostgRESTStandIn.requests]
+        self.assertEqual(len(paths), 3)
+        self.assertNotIn("id=gt", paths[0])
+        self.assertIn("id=gt.7", paths[1])
+        self.assertIn("limit=2", paths[2])
+
+    def test_inventory_filters(self):
+        params = SupabaseManager._inventory_filters(
+            fridge_id="f1", exclude_expired=True, today=date(2026, 1, 1)
+        )
+        self.assertEqual(params["fridge_id"], "eq.f1")
+        self.assertEqual(params["or"], "(expiry_date.gte.2026-01-01,expiry_date.is.null)")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from PIL import Image
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents import vision_agent
+from src.agents.vision_agent import (
+    classify_tiered,
+    coverage_fraction,
+    detect_with_yolo,
+    gpt4o_image_tokens,
+    load_image,
+    tile_grid,
+)
+
+COLORS = {"apple": (255, 0, 0), "bottle": (0, 0, 255)}
+
+
+class ColorDetector:
+    """단색 물체를 찾는 가짜 YOLO (640 입력으로 줄였을 때 16px 미만이면 놓침)"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, images, **kwargs):
+        self.calls.append(len(images))
+        return [self._detect(image) for image in images]
+
+    def _detect(self, image):
+        pixels = np.asarray(image)
+        scale = 640 / max(image.size)
+        boxes = []
+        for cls, (name, color) in enumerate(COLORS.items()):
+            ys, xs = np.nonzero(np.all(pixels == color, axis=-1))
+            if len(xs) == 0 or min(np.ptp(xs), np.ptp(ys)) * scale < 16:
+                continue
+            boxes.append(SimpleNamespace(
+                xyxy=np.array([[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]], dtype=float),
+                cls=np.array([cls]),
+                conf=np.array([0.9 if len(xs) > 50_000 else 0.6]),
+            ))
+        return SimpleNamespace(boxes=boxes, names=dict(enumerate(COLORS)))
+
+
+def _detection(yolo_class, conf, bbox):
+    return {"yolo_class": yolo_class, "yolo_conf": conf, "bbox_2d": bbox}
+
+
+def _response(items):
+    response = MagicMock()
+    response.choices[0].message.content = json.dumps({"i": items})
+    response.choices[0].finish_reason = "stop"
+    return response
+
+
+def _crop_item(k, name, conf):
+    return {"k": k, "n": name, "c": "채소", "q": 1, "u": "개", "f": "좋음", "p": "없음",
+            "s": conf, "b": [0, 0, 1000, 1000], "e": None}
+
+
+class TestTieredVision(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.image_path = os.path.join(self.tmpdir.name, "fridge.jpg")
+        Image.new("RGB", (1600, 1200), (200, 220, 240)).save(self.image_path)
+        vision_agent.VISION_TIER_STATS.clear()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_image_tokens_and_coverage(self):
+        self.assertEqual(gpt4o_image_tokens(1600, 1200), 765)  # 1024x768 → 2x2 타일
+        self.assertEqual(gpt4o_image_tokens(400, 300), 255)
+        self.assertEqual(gpt4o_image_tokens(4000, 3000, "low"), 85)
+        self.assertAlmostEqual(coverage_fraction([[0, 0, 500, 1000], [0, 0, 500, 500]]), 0.5)
+
+    @patch("src.agents.vision_agent.OpenAI")
+    def test_confident_boxes_skip_gpt4o(self, mock_openai):
+        create = mock_openai.return_value.chat.completions.create
+        create.return_value = _response([_crop_item(0, "대파", 0.9)])
+        detections = [
+            _detection("broccoli", 0.9, [0, 0, 1000, 500]),
+            _detection("bottle", 0.6, [0, 500, 1000, 1000]),
+        ]
+
+        items, stats = classify_tiered(self.image_path, detections)
+
+        self.assertEqual(create.call_count, 1)  # 저가 모델만 호출
+        self.assertEqual(create.call_args.kwargs["model"], "gpt-4o-mini")
+        self.assertEqual(
+            [(i["name"], i["category"], i["vision_tier"]) for i in items],
+            [("브로콜리", "채소", "local"), ("대파", "채소", "cheap")],
+        )
+        self.assertEqual(items[1]["bbox_2d"], [0, 500, 1000, 1000])
+        self.assertEqual(stats["gpt4o_image_tokens"], 0)
+        self.assertEqual(stats["image_tokens_saved"], 765)
+        self.assertEqual(vision_agent.VISION_TIER_STATS["requests"], 1)
+
+    @patch("src.agents.vision_agent.OpenAI")
+    def test_uncertain_crops_and_residual_go_to_gpt4o(self, mock_openai):
+        create = mock_openai.return_value.chat.completions.create
+        residual_item = {**_crop_item(-1, "우유", 0.95), "c": "유제품", "b": [600, 600, 900, 900]}
+        create.side_effect = [
+            _response([_crop_item(0, "무언가", 0.3)]),
+            _response([_crop_item(0, "애호박", 0.85), residual_item]),
+        ]
+        detections = [
+            _detection("carrot", 0.9, [0, 0, 300, 300]),
+            _detection("bottle", 0.5, [0, 300, 300, 600]),
+        ]
+
+        items, stats = classify_tiered(self.image_path, detections)
+
+        self.assertEqual([c.kwargs["model"] for c in create.call_args_list], ["gpt-4o-mini", "gpt-4o"])
+        self.assertEqual(
+            [(i["name"], i["vision_tier"]) for i in items],
+            [("당근", "local"), ("애호박", "gpt-4o"), ("우유", "gpt-4o")],
+        )
+        self.assertEqual(items[1]["bbox_2d"], [0, 300, 300, 600])
+        self.assertEqual(items[2]["bbox_2d"], [600, 600, 900, 900])
+        self.assertEqual((stats["gpt4o_crops"], stats["residual"]), (1, 1))
+        self.assertGreater(stats["image_tokens_saved"], 0)
+
+    @patch("src.agents.vision_agent.OpenAI")
+    def test_omitted_crops_resolved_and_failures_degrade(self, mock_openai):
+        create = mock_openai.return_value.chat.completions.create
+        detections = [
+            _detection("carrot", 0.9, [0, 0, 1000, 400]),
+            _detection("bottle", 0.5, [0, 400, 1000, 700]),
+            _detection("bowl", 0.5, [0, 700, 1000, 1000]),
+        ]
+
+        # 완전한 응답에서 빠진 박스(bowl)는 식재료 아님으로 확정 → GPT-4o 호출 없음
+        create.side_effect = [_response([_crop_item(0, "사이다", 0.9)])]
+        items, stats = classify_tiered(self.image_path, detections)
+        self.assertEqual(create.call_count, 1)
+        self.assertEqual([i["name"] for i in items], ["당근", "사이다"])
+        self.assertEqual(stats["non_food"], 1)
+
+        # 저가 모델 실패 → 모든 박스를 GPT-4o로, GPT-4o도 실패하면 로컬 분류는 유지
+        create.reset_mock()
+        create.side_effect = [RuntimeError("429"), RuntimeError("429")]
+        items, stats = classify_tiered(self.image_path, detections)
+        self.assertEqual([c.kwargs["model"] for c in create.call_args_list], ["gpt-4o-mini", "gpt-4o"])
+        self.assertEqual([(i["name"], i["vision_tier"]) for i in items], [("당근", "local")])
+        self.assertEqual(stats["tier2_failed"], 1)
+
+    def test_load_image_applies_exif_orientation(self):
+        path = os.path.join(self.tmpdir.name, "rotated.jpg")
+        raw = Image.new("RGB", (400, 200), (255, 0, 0))
+        raw.paste((0, 0, 255), (200, 0, 400, 200))  # 저장된 픽셀: 왼쪽 빨강, 오른쪽 파랑
+        exif = Image.Exif()
+        exif[0x0112] = 6  # 시계 방향 90도 회전해서 보여야 함
+        raw.save(path, exif=exif)
+
+        image = load_image(path)
+        self.assertEqual(image.size, (200, 400))
+        top, bottom = image.getpixel((100, 50)), image.getpixel((100, 350))
+        self.assertGreater(top[0], 200)  # 위쪽 절반은 빨강만
+        self.assertGreater(bottom[2], 200)
+
+
+class TestTiledDetection(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.image_path = os.path.join(self.tmpdir.name, "shelf.png")
+        image = Image.new("RGB", (2000, 1000), (255, 255, 255))
+        image.paste(COLORS["apple"], (1500, 300, 1520, 320))  # 전체 이미지에서는 너무 작음
+        image.paste(COLORS["bottle"], (500, 200, 900, 500))  # 여러 타일에 걸침
+        image.save(self.image_path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_tile_grid_adapts_to_resolution(self):
+        self.assertEqual(tile_grid(640, 480), [(0, 0, 640, 480)])
+        tiles = tile_grid(2000, 1000)
+        self.assertEqual(len(tiles), 8)
+        self.assertEqual((tiles[0][:2], tiles[-1][2:]), ((0, 0), (2000, 1000)))
+        self.assertLessEqual(len(tile_grid(4032, 3024)), 12)
+
+    def test_tiles_find_small_items_and_merge_cut_boxes(self):
+        detector = ColorDetector()
+        with patch("src.agents.vision_agent._get_yolo_model", return_value=detector):
+            full = detect_with_yolo(self.image_path, tiling="false")
+            tiled = detect_with_yolo(self.image_path, tiling="auto")
+
+        self.assertEqual(detector.calls, [1, 9])  # 전체 + 8타일을 한 번에
+        self.assertEqual([d["yolo_class"] for d in full], ["bottle"])
+        by_class = {d["yolo_class"]: d for d in tiled}
+        self.assertEqual(len(tiled), 2)
+        self.assertEqual(by_class["bottle"]["bbox_2d"], [200, 250, 500, 450])
+        self.assertEqual(by_class["apple"]["bbox_2d"], [300, 750, 320, 760])
+        self.assertNotIn("tile_edge", by_class["apple"])
+
+
+if __name__ == '__main__':
+    unittest.main()
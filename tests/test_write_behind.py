@@ -0,0 +1,136 @@
+import sys
+import os
+import asyncio
+import tempfile
+import unittest
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.write_behind import WriteBehindQueue
+
+
+def _op(fridge_id, n):
+    return {
+        "fridge_id": fridge_id,
+        "upserts": [{"item_id": f"{fridge_id}-{i}", "name": f"재료{i}"} for i in range(n)],
+        "deleted_item_ids": [],
+    }
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.spool = os.path.join(self.tmpdir.name, "spool.jsonl")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_batches_across_requests_by_time(self):
+        batches = []
+
+        async def sink(ops):
+            batches.append(ops)
+            return True
+
+        async def scenario():
+            queue = WriteBehindQueue(sink, self.spool, max_batch_rows=100, max_delay_ms=50)
+            for i in range(5):
+                await queue.enqueue(_op(f"f{i}", 2))
+            # 요청 경로는 반영을 기다리지 않음
+            self.assertEqual(batches, [])
+            self.assertEqual(queue.stats()["queue_depth_ops"], 5)
+            await asyncio.sleep(0.2)
+            await queue.stop()
+            return queue.stats()
+
+        stats = asyncio.run(scenario())
+
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(len(batches[0]), 5)
+        self.assertEqual(stats["flushed_rows"], 10)
+        self.assertEqual(stats["queue_depth_ops"], 0)
+        self.assertEqual(os.path.getsize(self.spool), 0)
+
+    def test_flushes_when_row_limit_reached(self):
+        batches = []
+
+        async def sink(ops):
+            batches.append(sum(len(op["upserts"]) for op in ops))
+            return True
+
+        async def scenario():
+            queue = WriteBehindQueue(sink, self.spool, max_batch_rows=4, max_delay_ms=10_000)
+            for i in range(4):
+                await queue.enqueue(_op(f"f{i}", 2))
+            await asyncio.sleep(0.05)
+            await queue.stop(flush=False)
+
+        asyncio.run(scenario())
+
+        # 긴 지연 시간과 무관하게 4행 단위로 즉시 반영
+        self.assertEqual(batches, [4, 4])
+
+    def test_stop_during_flush_keeps_batch(self):
+        started = []
+
+        async def hanging_sink(ops):
+            started.append(len(ops))
+            await asyncio.sleep(3600)
+            return True
+
+        async def scenario():
+            queue = WriteBehindQueue(hanging_sink, self.spool, max_batch_rows=100, max_delay_ms=10)
+            await queue.enqueue(_op("f1", 3))
+            while not started:
+                await asyncio.sleep(0.01)
+            await queue.stop(flush=False)
+            return queue.stats()
+
+        stats = asyncio.run(scenario())
+
+        # 반영 중 취소된 배치는 대기열과 스풀에 남음
+        self.assertEqual(started, [1])
+        self.assertEqual((stats["queue_depth_ops"], stats["queue_depth_rows"]), (1, 3))
+        with open(self.spool, encoding="utf-8") as f:
+            self.assertEqual(len(f.read().splitlines()), 1)
+
+    def test_failed_writes_survive_restart(self):
+        async def failing_sink(ops):
+            return False
+
+        received = []
+
+        async def healthy_sink(ops):
+            received.extend(ops)
+            return True
+
+        async def crash():
+            queue = WriteBehindQueue(failing_sink, self.spool, max_delay_ms=10)
+            await queue.enqueue(_op("a", 1))
+            await queue.enqueue(_op("b", 3))
+            await asyncio.sleep(0.05)
+            stats = queue.stats()
+            await queue.stop(flush=False)
+            return stats
+
+        async def recover():
+            queue = WriteBehindQueue(healthy_sink, self.spool, max_delay_ms=10)
+            await queue.start()
+            await asyncio.sleep(0.05)
+            await queue.stop()
+            return queue.stats()
+
+        crash_stats = asyncio.run(crash())
+        self.assertGreaterEqual(crash_stats["flush_failures"], 1)
+        self.assertEqual(crash_stats["queue_depth_rows"], 4)
+
+        stats = asyncio.run(recover())
+        self.assertEqual(stats["replayed_ops"], 2)
+        self.assertEqual([op["fridge_id"] for op in received], ["a", "b"])
+        self.assertEqual(os.path.getsize(self.spool), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()